@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Sorting out server console lines: the old `MCServer.readconsole()`
+checks (a substring test per text looked for, one per spam filter, then
+an elif chain) against the ConsoleMatcher, which finds the same things
+with one search of each line.  Only the sorting is timed, not what is
+done with the lines.  Both sides must sort every line the same way.
+
+The lines come from a server log (`logs/latest.log`), or, without one,
+from a made up log of a modded server starting up and generating
+chunks, with some players joining, chatting and dying.
+
+usage: python benchmarks/bench_console.py [server log] [repeats]
+"""
+
+from __future__ import print_function
+
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from core import consolelines  # noqa
+from core.consolelines import ConsoleMatcher, MARKERS, SPAM  # noqa
+
+SPAMMY_STUFF = ["found nothing", "vehicle of", "Wrong location!",
+                "Tried to add entity", ]
+DEATHPREFIXES = ["fell", "was", "drowned", "blew", "walked", "went",
+                 "burned", "hit", "tried", "died", "got", "starved",
+                 "suffocated", "withered", "shot", "slain"]
+
+
+def old_sort(buff, offset):
+    """ The old readconsole() checks; :returns: (markers, kind). """
+    found = set()
+    line_words = buff.split(' ')[offset:]
+    for marker, text in MARKERS:
+        if text in buff:
+            found.add(marker)
+    server_spaming = False
+    for things in SPAMMY_STUFF:
+        if things in buff:
+            server_spaming = True
+    if server_spaming:
+        found.add(SPAM)
+    first_word = line_words[0] if line_words else ""
+    second_word = line_words[1] if len(line_words) > 1 else ""
+    if "Done (" in buff:
+        kind = consolelines.DONE
+    elif "Preparing level" in buff:
+        kind = consolelines.LEVEL
+    elif first_word[0] == "<":
+        kind = consolelines.CHAT
+    elif second_word == "logged":
+        kind = consolelines.LOGIN
+    elif "lost connection" in buff:
+        kind = consolelines.LOGOUT
+    elif first_word == "*":
+        kind = consolelines.ACTION
+    elif "has just earned the achievement" in buff:
+        kind = consolelines.ACHIEVEMENT
+    elif first_word[0] == "[" and first_word[-1] == "]":
+        kind = consolelines.SAY
+    elif second_word in DEATHPREFIXES:
+        kind = consolelines.DEATH
+    elif "Can't keep up!" in buff:
+        kind = consolelines.LAG
+    elif second_word == "Teleported" and len(line_words) > 3 and \
+            line_words[3] == "to":
+        kind = consolelines.TELEPORT
+    elif first_word == "Teleported" and len(line_words) > 2 and \
+            line_words[2] == "to":
+        kind = consolelines.TELEPORTED
+    else:
+        kind = None
+    return found, kind
+
+
+def new_sort(matcher, buff, offset):
+    found = matcher.markers(buff, SPAMMY_STUFF)
+    return found, matcher.kind(buff.split(' ', offset + 4)[offset:], found)
+
+
+def made_up_log(lines, rnd):
+    stamp = "[12:%02d:%02d] [Server thread/INFO]:"
+    mods = ["forge", "ic2", "thermal", "buildcraft", "mekanism", "tconstruct"]
+    log = [stamp % (0, 0) + " Starting minecraft server version 1.12.2",
+           stamp % (0, 1) + " Starting Minecraft server on *:25565",
+           stamp % (0, 2) + ' Preparing level "world"']
+    players = ["Player%d" % number for number in range(20)]
+    while len(log) < lines:
+        when = stamp % (len(log) // 3600 % 60, len(log) // 60 % 60)
+        roll = rnd.random()
+        player = rnd.choice(players)
+        if roll < 0.5:
+            log.append("%s Preparing spawn area: %d%%" % (
+                when, rnd.randrange(100)))
+        elif roll < 0.8:
+            log.append("[12:00:00] [Client thread/INFO] [%s]: Registered %s:"
+                       "block_%d with id %d" % (
+                           rnd.choice(mods), rnd.choice(mods),
+                           rnd.randrange(5000), rnd.randrange(4096)))
+        elif roll < 0.9:
+            log.append("%s Tried to add entity %s at %d, 64, %d but it was"
+                       " found nothing" % (when, rnd.choice(mods),
+                                           rnd.randrange(9999),
+                                           rnd.randrange(9999)))
+        elif roll < 0.95:
+            log.append("%s <%s> hello there, this is chat" % (when, player))
+        elif roll < 0.96:
+            log.append("%s %s[/127.0.0.1:4%04d] logged in with entity id %d"
+                       " at (1.5, 64.0, -2.5)" % (
+                           when, player, rnd.randrange(9999),
+                           rnd.randrange(999)))
+        elif roll < 0.97:
+            log.append("%s %s lost connection: Disconnected" % (when, player))
+        elif roll < 0.98:
+            log.append("%s %s was slain by Zombie" % (when, player))
+        elif roll < 0.99:
+            log.append("%s Can't keep up! Is the server overloaded? Running "
+                       "2000ms or 40 ticks behind" % when)
+        else:
+            log.append("%s Teleported %s to 1.5, 64.0, -2.5" % (when, player))
+    log.append(stamp % (59, 59) + ' Done (12.345s)! For help, type "help"')
+    return log
+
+
+def timed(function, log, offset, repeats):
+    start = time.time()
+    for _ in range(repeats):
+        answers = [function(buff, offset) for buff in log]
+    return len(log) * repeats / (time.time() - start), answers
+
+
+def main():
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    if len(sys.argv) > 1:
+        with io.open(sys.argv[1], encoding="utf-8", errors="replace") as f:
+            log = [line.rstrip("\r\n") for line in f if line.strip()]
+        source = sys.argv[1]
+    else:
+        log = made_up_log(100000, random.Random(21))
+        source = "made up log"
+    # the offset readconsole() finds on the "Starting" line
+    offset = 3
+    # lines readconsole() stops at before sorting them
+    log = [buff for buff in log if buff.split(' ')[offset:offset + 1] != [""]
+           and len(buff.split(' ')) > offset]
+    print("%d lines (%s), %d spam filters, %d repeats" % (
+        len(log), source, len(SPAMMY_STUFF), repeats))
+
+    matcher = ConsoleMatcher(DEATHPREFIXES)
+    old_rate, old_answers = timed(old_sort, log, offset, repeats)
+    new_rate, new_answers = timed(
+        lambda buff, offset: new_sort(matcher, buff, offset), log, offset,
+        repeats)
+    for buff, old, new in zip(log, old_answers, new_answers):
+        if old != new:
+            print("the lines are sorted differently!\n%s\nold: %s\nnew: %s"
+                  % (buff, old, new))
+            sys.exit(1)
+    print("old      %9.0f lines/s" % old_rate)
+    print("matcher  %9.0f lines/s  (x%.1f)" % (new_rate, new_rate / old_rate))
+
+
+if __name__ == "__main__":
+    main()
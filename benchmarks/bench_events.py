@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Event dispatch with many plugins loaded: the old `Events` (a scan of
+every plugin per event, non-abortable events polled every 10 ms by one
+thread) against the event index and worker pool, without and with
+plugin profiling.
+
+Each plugin registers `per_plugin` of a pool of event names; the events
+called are a mix of those names.  Reports abortable events/s, and the
+throughput and queue latency (callevent() to the first plugin seeing
+it) of non-abortable events.
+
+usage: python benchmarks/bench_events.py [plugins] [events] [per_plugin]
+"""
+
+from __future__ import print_function
+
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from core.events import Events  # noqa
+from core.profiler import PluginProfiler  # noqa
+
+EVENT_NAMES = 60
+
+
+class _HaltSig(object):
+    halt = False
+
+
+class _Vitals(object):
+    clients = []
+    players = {}
+
+
+class _Wrapper(object):
+    def __init__(self, workers, profiling=False):
+        self.log = logging.getLogger("bench")
+        self.config = {"General": {"event-workers": workers}}
+        self.profiler = PluginProfiler(self.log, profiling)
+        self.haltsig = _HaltSig()
+        self.servervitals = _Vitals()
+
+
+class OldEvents(Events):
+    """ the old dispatch: every plugin checked, one thread polling. """
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+        self.log = wrapper.log
+        self.listeners = []
+        self.events = {}
+        self.index = {}
+        self._index_lock = threading.Lock()
+        self.event_queue = deque([])
+        t = threading.Thread(target=self._old_processor, args=())
+        t.daemon = True
+        t.start()
+
+    def _reindex(self, event=None):
+        pass
+
+    def callevent(self, event, payload, abortable=True):
+        if abortable:
+            return self._callevent(event, payload)
+        self.event_queue.append((event, payload, False))
+
+    def _old_processor(self):
+        while not self.wrapper.haltsig.halt:
+            while len(self.event_queue) > 0:
+                _event, _payload, _abortable = self.event_queue.popleft()
+                self._callevent(_event, _payload, _abortable)
+            time.sleep(0.01)
+
+    def _callevent(self, event, payload, abortable=True):
+        payload_status = None
+        for plugin_id in self.events:
+            if event in self.events[plugin_id]:
+                result = self.events[plugin_id][event](payload)
+                if not abortable:
+                    payload_status = True
+                    continue
+                if result is False or payload_status is False:
+                    payload_status = False
+        return payload_status is not False
+
+
+class Plugin(object):
+    def __init__(self, seen):
+        self.seen = seen
+
+    def on_event(self, payload):
+        if payload["first"]:
+            payload["first"] = False
+            self.seen.append(time.time() - payload["at"])
+        return None
+
+
+def load(events, plugins, per_plugin, seen, rnd):
+    """ :returns: the names of the events some plugin registered. """
+    registered = set()
+    for number in range(plugins):
+        plugin = Plugin(seen)
+        for name in rnd.sample(range(EVENT_NAMES), per_plugin):
+            events.register("plugin%d" % number, "event.%d" % name,
+                            plugin.on_event)
+            registered.add("event.%d" % name)
+    return registered
+
+
+def wait_for(seen, expected, timeout):
+    deadline = time.time() + timeout
+    while len(seen) < expected and time.time() < deadline:
+        time.sleep(0.0005)
+
+
+def run(events, names, registered, seen):
+    start = time.time()
+    for name in names:
+        events.callevent(name, {"first": False, "at": 0})
+    abortable = len(names) / (time.time() - start)
+
+    # non-abortable, at a steady pace so latency is not queueing
+    del seen[:]
+    for name in names[:500]:
+        events.callevent(name, {"first": True, "at": time.time()},
+                         abortable=False)
+        time.sleep(0.001)
+    wait_for(seen, len([n for n in names[:500] if n in registered]), 5)
+    latency = sorted(seen)
+
+    # non-abortable, all at once
+    del seen[:]
+    start = time.time()
+    for name in names:
+        events.callevent(name, {"first": True, "at": start},
+                         abortable=False)
+    wait_for(seen, len([n for n in names if n in registered]), 60)
+    queued = len(names) / (time.time() - start)
+    return abortable, queued, latency
+
+
+def main():
+    plugins = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    per_plugin = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    logging.basicConfig(level=logging.CRITICAL)
+    rnd = random.Random(12)
+    names = ["event.%d" % rnd.randrange(EVENT_NAMES) for _ in range(count)]
+    print("%d plugins, %d event names, %d events each" % (
+        plugins, EVENT_NAMES, per_plugin))
+
+    for label, events in (("old", OldEvents(_Wrapper(1))),
+                          ("index+pool", Events(_Wrapper(4))),
+                          ("profiled", Events(_Wrapper(4, True)))):
+        seen = []
+        registered = load(events, plugins, per_plugin, seen,
+                          random.Random(30))
+        abortable, queued, latency = run(events, names, registered, seen)
+        print("%-11s abortable %9.0f events/s   queued %9.0f events/s   "
+              "queue latency median %6.2f ms, max %6.2f ms" % (
+                  label, abortable, queued,
+                  latency[len(latency) // 2] * 1000, latency[-1] * 1000))
+        events.wrapper.haltsig.halt = True
+        if label != "old":
+            events.stop()
+
+
+if __name__ == "__main__":
+    main()
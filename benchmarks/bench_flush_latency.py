@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Measures queue-to-receive latency of packets sent through a Packet's
+flush thread, for the old polled flush loop (sleep `flush-rate-ms`, then
+send each queued packet separately) and the event driven one
+(`Packet.wait_for_flush()`, batched sends).
+
+A producer thread plays a server: every 50 ms tick it queues a burst of
+packets (entity moves, block changes...) spread over a few ms, plus a
+keep alive or chat message now and then.  Each packet carries its queue
+time; a reader on the other end of a socketpair frames them with a
+second Packet.
+
+usage: python benchmarks/bench_flush_latency.py [ticks]
+"""
+
+from __future__ import print_function
+
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_lazy_inflate import THRESHOLD, _Obj  # noqa
+from proxy.packets.packet import Packet  # noqa
+
+FLUSH_RATE = .05
+FLUSH_DELAY = .002
+TICK = .05
+KEEP_ALIVE = 0x1f
+CHAT = 0x0f
+
+
+def polled_flusher(packet, done):
+    """ The flush loop as it was - poll, then one send per packet. """
+    while not done.is_set():
+        time.sleep(FLUSH_RATE)
+        while len(packet.queue) > 0:
+            compression, payload = packet.queue.popleft()
+            packet.socket_transmit(
+                packet.handle_compression(compression, payload))
+            packet.packets_sent += 1
+            packet.batches_sent += 1
+
+
+def event_flusher(packet, done):
+    while not done.is_set():
+        if packet.wait_for_flush(FLUSH_DELAY, FLUSH_RATE):
+            packet.flush()
+
+
+def produce(packet, ticks, rnd):
+    for tick in range(ticks):
+        start = time.time()
+        for number in range(rnd.randint(5, 60)):
+            pkid = rnd.choice((0x26, 0x26, 0x10, 0x3c))
+            body = b"\x00" * rnd.randint(10, 400)
+            packet.send_raw(packet.send_varint(pkid) +
+                            struct.pack(">d", time.time()) + body)
+            if number % 10 == 9:
+                time.sleep(.001)
+        if tick % 10 == 0:
+            pkid = KEEP_ALIVE if tick % 20 == 0 else CHAT
+            packet.send_raw(packet.send_varint(pkid) +
+                            struct.pack(">d", time.time()),
+                            pkid in packet.urgent_ids)
+        time.sleep(max(0, TICK - (time.time() - start)) + rnd.random() * .01)
+
+
+def receive(packet, latencies, urgent_latencies, expected):
+    got = 0
+    while got < expected:
+        pkid, _orig = packet.grabpacket()
+        got += 1
+        sent = struct.unpack(">d", packet.read_data(8))[0]
+        latency = time.time() - sent
+        if pkid in (KEEP_ALIVE, CHAT):
+            urgent_latencies.append(latency)
+        else:
+            latencies.append(latency)
+
+
+def run(flusher, ticks):
+    # count what produce() will send with the same seed
+    rnd = random.Random(7)
+    expected = 0
+    for tick in range(ticks):
+        count = rnd.randint(5, 60)
+        for _ in range(count):
+            rnd.choice((0x26, 0x26, 0x10, 0x3c))
+            rnd.randint(10, 400)
+        rnd.random()
+        expected += count
+        if tick % 10 == 0:
+            expected += 1
+
+    a, b = socket.socketpair()
+    sender = Packet(a, _Obj())
+    sender.compressThreshold = THRESHOLD
+    sender.urgent_ids = set([KEEP_ALIVE, CHAT])
+    reader = Packet(b, _Obj())
+    reader.compressThreshold = THRESHOLD
+    latencies = []
+    urgent_latencies = []
+    done = threading.Event()
+
+    flush_thread = threading.Thread(target=flusher, args=(sender, done))
+    flush_thread.daemon = True
+    flush_thread.start()
+    read_thread = threading.Thread(
+        target=receive, args=(reader, latencies, urgent_latencies, expected))
+    read_thread.daemon = True
+    read_thread.start()
+
+    produce(sender, ticks, random.Random(7))
+    read_thread.join()
+    done.set()
+    flush_thread.join()
+    a.close()
+    b.close()
+    return (sorted(latencies), sorted(urgent_latencies), sender.packets_sent,
+            sender.batches_sent)
+
+
+def _ms(values, fraction):
+    return 1000 * values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    results = {}
+    for name, flusher in (("polled", polled_flusher),
+                          ("event", event_flusher)):
+        latencies, urgent, packets, batches = run(flusher, ticks)
+        results[name] = latencies
+        print("%-6s latency ms: mean %6.2f  p50 %6.2f  p99 %6.2f  "
+              "urgent p99 %6.2f   %6d packets in %6d sends" % (
+                  name, 1000 * sum(latencies) / len(latencies),
+                  _ms(latencies, .5), _ms(latencies, .99), _ms(urgent, .99),
+                  packets, batches))
+    polled, event = results["polled"], results["event"]
+    print("event driven flushing: mean latency %.1fx lower" % (
+        (sum(polled) / len(polled)) / (sum(event) / len(event))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Compares eager and lazy (packet-ID peek) inflation of compressed packets
+in `Packet.grabpacket()`.
+
+The session is a generated client-bound stream shaped like a player
+joining and walking around a 1.12 server: mostly chunk data (large,
+compressed, passed through untouched), with entity movement, time
+updates and chat mixed in.  Only the packet IDs a ServerConnection
+actually parses are read; everything else is just forwarded.
+
+usage: python benchmarks/bench_lazy_inflate.py [packets]
+"""
+
+from __future__ import print_function
+
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from proxy.packets.packet import Packet  # noqa
+from proxy.utils.constants import RAW  # noqa
+
+THRESHOLD = 256
+
+# (packet id, weight, (min size, max size), parsed by ParseCB?)
+MIX = [
+    (0x20, 30, (4000, 24000), False),  # chunk data
+    (0x26, 25, (10, 40), False),  # entity relative move
+    (0x3c, 10, (300, 900), False),  # entity metadata
+    (0x47, 5, (16, 16), True),  # time update
+    (0x0f, 5, (40, 600), True),  # chat message
+    (0x2e, 5, (300, 2000), True),  # player list item
+    (0x10, 20, (20, 1200), False),  # multi block change
+]
+PARSED = set(pkid for pkid, _w, _s, parsed in MIX if parsed)
+
+
+class _Obj(object):
+    """ stands in for the client/server connection that owns a Packet """
+    class _Vitals(object):
+        protocolVersion = 340
+
+    def __init__(self):
+        import logging
+        self.log = logging.getLogger("bench")
+        self.srv_data = self._Vitals()
+
+
+class _StreamSocket(object):
+    """ plays back bytes as if they were arriving on a socket """
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    def recv(self, length):
+        return self.stream.read(length)
+
+    def recv_into(self, buf):
+        return self.stream.readinto(buf)
+
+
+def make_session(packets, seed=20):
+    rnd = random.Random(seed)
+    table = []
+    for entry in MIX:
+        table += [entry] * entry[1]
+    maker = Packet(None, _Obj())
+    maker.compressThreshold = THRESHOLD
+    frames = []
+    for _ in range(packets):
+        pkid, _w, (low, high), _p = rnd.choice(table)
+        size = rnd.randint(low, high)
+        # chunk-ish data: runs of a small palette of block states
+        body = bytearray()
+        while len(body) < size:
+            body += bytes(bytearray([rnd.randint(0, 15)])) * rnd.randint(1, 24)
+        payload = maker.pack_varint(pkid) + bytes(body[:size])
+        frames.append(maker.handle_compression(THRESHOLD, payload))
+    return b"".join(frames)
+
+
+def run(session, count, lazy):
+    packet = Packet(_StreamSocket(session), _Obj())
+    packet.compressThreshold = THRESHOLD
+    packet.lazy_inflate = lazy
+    inflated = 0
+    start = time.time()
+    for _ in range(count):
+        pkid, orig = packet.grabpacket()
+        datalength = packet._peek_varint(orig, 0)[0]
+        if pkid in PARSED:
+            packet.readpkt([RAW])
+        if datalength and (pkid in PARSED or not lazy):
+            inflated += datalength
+    return time.time() - start, inflated
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    session = make_session(count)
+    print("session: %d packets, %.1f MB on the wire" % (
+        count, len(session) / 1048576.0))
+    results = {}
+    for lazy in (False, True):
+        best = None
+        for _ in range(3):
+            elapsed, inflated = run(session, count, lazy)
+            best = elapsed if best is None else min(best, elapsed)
+        results[lazy] = (best, inflated)
+        print("%-6s %8.3f s  %10.0f packets/s  %8.1f MB inflated" % (
+            "lazy" if lazy else "eager", best, count / best,
+            inflated / 1048576.0))
+    eager, lazy = results[False], results[True]
+    print("lazy inflation: %.1fx faster, %.1f%% less data inflated" % (
+        eager[0] / lazy[0], 100.0 * (1 - lazy[1] / float(eager[1]))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Compares the old per-field `readpkt()`/`sendpkt()` (one `_PKTREAD`/
+`_PKTSEND` lookup, `read_data()` and `struct` call per field) with the
+compiled layouts from proxy/packets/layouts.py, for a few packets the
+proxy parses or sends a lot.
+
+usage: python benchmarks/bench_packet_layouts.py [iterations]
+"""
+
+from __future__ import print_function
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_lazy_inflate import _Obj  # noqa
+from proxy.packets.packet import Packet  # noqa
+from proxy.utils.constants import *  # noqa
+
+PACKETS = [
+    ("player position and look",
+     [DOUBLE, DOUBLE, DOUBLE, FLOAT, FLOAT, BOOL],
+     (101.5, 64.0, -230.25, 90.0, 12.5, True)),
+    ("entity relative move",
+     [VARINT, SHORT, SHORT, SHORT, BOOL],
+     (1234, 12, -40, 7, False)),
+    ("spawn object",
+     [VARINT, UUID, BYTE, DOUBLE, DOUBLE, DOUBLE, BYTE, BYTE, INT, SHORT,
+      SHORT, SHORT],
+     None),
+    ("chat message", [JSON, BYTE], ({"text": "hello world"}, 0)),
+    ("keep alive", [LONG], (1234567890123,)),
+]
+
+
+class _Sink(Packet):
+    """ a Packet that just keeps what it would send """
+    def send_raw(self, payload, urgent=False, pkid=-1):
+        self.sent = payload
+
+
+def legacy_readpkt(packet, args):
+    result = []
+    for arg in args:
+        item = packet._PKTREAD[arg]()
+        result.append(item)
+    return result
+
+
+def legacy_sendpkt(packet, pkid, args, payload):
+    result = b""
+    result += packet.send_varint(pkid)
+    for x, arg in enumerate(args):
+        pay = payload[x]
+        result += packet._PKTSEND[arg](pay)
+    packet.send_raw(result)
+    return result
+
+
+def timed(iterations, func, *args):
+    best = None
+    for _ in range(3):
+        start = time.time()
+        for _ in range(iterations):
+            func(*args)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    packet = _Sink(None, _Obj())
+    import uuid
+    for name, args, payload in PACKETS:
+        if payload is None:
+            payload = (77, uuid.uuid4(), 2, 1.5, 70.0, -3.25, 0, 0, 1, 0,
+                       0, 0)
+        data = packet.sendpkt(0x10, args, payload)
+        assert data == legacy_sendpkt(packet, 0x10, args, payload)
+
+        def read(reader):
+            packet.buffer = io.BytesIO(data)
+            packet.read_varint()
+            return reader(args)
+
+        def read_legacy(_args):
+            return legacy_readpkt(packet, _args)
+
+        assert read(packet.readpkt) == read(read_legacy)
+        old_read = timed(iterations, read, read_legacy)
+        new_read = timed(iterations, read, packet.readpkt)
+        old_send = timed(iterations, legacy_sendpkt, packet, 0x10, args,
+                         payload)
+        new_send = timed(iterations, packet.sendpkt, 0x10, args, payload)
+        print("%-25s read %6.2f -> %6.2f us (%.1fx)   "
+              "send %6.2f -> %6.2f us (%.1fx)" % (
+                  name, 1e6 * old_read / iterations,
+                  1e6 * new_read / iterations, old_read / new_read,
+                  1e6 * old_send / iterations, 1e6 * new_send / iterations,
+                  old_send / new_send))
+
+
+if __name__ == "__main__":
+    main()
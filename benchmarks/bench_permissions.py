@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Permission lookups: the old `Permissions.has_permission()` (fnmatch
+against every user, plugin default and group permission, child groups
+found on every call) against the compiled, cached permissions.
+
+Users have some nodes and wildcards of their own and a group or two;
+groups include child groups and plugins register defaults.  The nodes
+looked up are a mix of user, default and group nodes and misses, as
+region protection checks on every block placed or dug.  Both sides must
+give the same answers.
+
+usage: python benchmarks/bench_permissions.py [users] [lookups]
+"""
+
+from __future__ import print_function
+
+import fnmatch
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from core.permissions import Permissions  # noqa
+
+PLUGINS = 30
+GROUPS = 20
+
+
+class _Storage(object):
+    def __init__(self):
+        self.Data = {}
+
+
+class _Wrapper(object):
+    def __init__(self):
+        self.log = logging.getLogger("bench")
+        self.wrapper_permissions = _Storage()
+        self.registered_permissions = {}
+
+
+def old_has_permission(perms, uuid, node=None, group_match=True,
+                       find_child_groups=True):
+    """ the old lookup. """
+    data = perms.wrapper.wrapper_permissions.Data
+    if uuid not in data["users"]:
+        perms.fill_user(uuid)
+    if node is None:
+        return True
+    node = node.lower()
+    for perm in data["users"][uuid]["permissions"]:
+        if node in fnmatch.filter([node], perm):
+            return data["users"][uuid]["permissions"][perm]
+    for pid in perms.wrapper.registered_permissions:
+        if node in perms.wrapper.registered_permissions[pid]:
+            return perms.wrapper.registered_permissions[pid][node]
+    if not group_match:
+        return False
+    allgroups = []
+    for group in data["users"][uuid]["groups"]:
+        allgroups.append(group)
+    if find_child_groups:
+        allgroups = perms._group_find_children(allgroups)
+    for group in allgroups:
+        if group in data["groups"]:
+            for perm in data["groups"][group]["permissions"]:
+                if node in fnmatch.filter([node], perm):
+                    return data["groups"][group]["permissions"][perm]
+    return False
+
+
+def populate(users, rnd):
+    """ :returns: Permissions, the uuids and some nodes to look up. """
+    wrapper = _Wrapper()
+    perms = Permissions(wrapper)
+    nodes = []
+    for number in range(PLUGINS):
+        perms.clear_defaults("plugin%d" % number)
+        for item in range(10):
+            node = "plugin%d.default%d" % (number, item)
+            perms.register_default("plugin%d" % number, node, item % 2 == 0)
+            nodes.append(node)
+    for number in range(GROUPS):
+        group = "group%d" % number
+        perms.group_create(group)
+        for item in range(15):
+            node = "plugin%d.group%d" % (rnd.randrange(PLUGINS), item)
+            perms.group_set_permission(group, node, item % 3 != 0)
+            nodes.append(node)
+        perms.group_set_permission(group, "plugin%d.admin.*" % number)
+        if number:
+            # a child group
+            perms.group_set_permission(
+                group, "group%d" % rnd.randrange(number))
+    uuids = []
+    for number in range(users):
+        uuid = "%08x-0000-4000-8000-%012x" % (number, number)
+        uuids.append(uuid)
+        for item in range(8):
+            node = "plugin%d.user%d" % (rnd.randrange(PLUGINS), item)
+            perms.set_permission(uuid, node, item != 3)
+        perms.set_permission(uuid, "plugin%d.*" % rnd.randrange(PLUGINS))
+        perms.set_permission(uuid, "plugin%d.home.?" % rnd.randrange(PLUGINS))
+        for _ in range(rnd.randrange(1, 3)):
+            perms.set_group(uuid, "group%d" % rnd.randrange(GROUPS))
+    nodes.extend("plugin%d.admin.kick" % number for number in range(PLUGINS))
+    nodes.extend("plugin%d.missing" % number for number in range(PLUGINS))
+    return perms, uuids, nodes
+
+
+def timed(function, perms, checks):
+    start = time.time()
+    answers = [function(perms, uuid, node) for uuid, node in checks]
+    return len(checks) / (time.time() - start), answers
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    logging.basicConfig(level=logging.CRITICAL)
+    rnd = random.Random(16)
+    perms, uuids, nodes = populate(users, rnd)
+    checks = [(rnd.choice(uuids), rnd.choice(nodes))
+              for _ in range(lookups)]
+    print("%d users, %d groups, %d plugins, %d lookups" % (
+        users, GROUPS, PLUGINS, lookups))
+
+    old_rate, old_answers = timed(old_has_permission, perms, checks)
+    new_rate, new_answers = timed(Permissions.has_permission, perms, checks)
+    if old_answers != new_answers:
+        print("the answers differ!")
+        sys.exit(1)
+    print("old       %9.0f lookups/s" % old_rate)
+    print("compiled  %9.0f lookups/s  (x%.1f)" % (new_rate,
+                                                  new_rate / old_rate))
+
+    # a change to a group makes every user compile again
+    start = time.time()
+    for uuid in uuids:
+        perms.group_set_permission("group0", "plugin0.changed")
+        perms.has_permission(uuid, "plugin0.changed")
+    print("recompile %9.0f users/s" % (len(uuids) / (time.time() - start)))
+
+
+if __name__ == "__main__":
+    main()
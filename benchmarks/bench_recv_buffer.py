@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Compares the old per-field socket reader (one `recv()` per VarInt byte,
+payloads built up with `d += recv()`) with the buffered `RecvBuffer`
+reader used by `Packet.grabpacket()`.
+
+The stream is the same generated 1.12 session as bench_lazy_inflate.py,
+encrypted with AES/CFB8 like a real online-mode connection.  The socket
+hands out at most SEGMENT bytes per call, like a busy TCP connection.
+Socket calls and cipher calls are counted for both readers.
+
+usage: python benchmarks/bench_recv_buffer.py [packets]
+"""
+
+from __future__ import print_function
+
+import io
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_lazy_inflate import THRESHOLD, make_session, _Obj  # noqa
+from proxy.packets.packet import Packet  # noqa
+from proxy.utils import encryption  # noqa
+
+SEGMENT = 16384
+SECRET = b"0123456789abcdef"
+
+
+class _SegmentSocket(object):
+    """ plays back bytes, at most SEGMENT at a time """
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+        self.calls = 0
+
+    def recv(self, length):
+        self.calls += 1
+        return self.stream.read(min(length, SEGMENT))
+
+    def recv_into(self, buf):
+        self.calls += 1
+        return self.stream.readinto(buf[:SEGMENT])
+
+
+class _CountingCipher(object):
+    def __init__(self, cipher):
+        self.cipher = cipher
+        self.calls = 0
+
+    def update(self, data):
+        self.calls += 1
+        return self.cipher.update(data)
+
+
+class _LegacyPacket(Packet):
+    """ The reader Packet had before RecvBuffer. """
+    def unpack_varint(self):
+        total = 0
+        shift = 0
+        val = 0x80
+        while val & 0x80:
+            val = struct.unpack('B', self.recv(1))[0]
+            total |= ((val & 0x7F) << shift)
+            shift += 7
+        if total & (1 << 31):
+            total = total - (1 << 32)
+        return total
+
+    def recv(self, length):
+        if length > 200:
+            d = b""
+            while len(d) < length:
+                m = length - len(d)
+                if m > 5000:
+                    m = 5000
+                d += self.socket.recv(m)
+        else:
+            d = self.socket.recv(length)
+            if len(d) == 0:
+                raise EOFError("Packet stream ended (Client disconnected")
+        if self.recvCipher is None:
+            return d
+        return self.recvCipher.update(d)
+
+    def grabpacket(self):
+        packet_length = self.unpack_varint()
+        length = packet_length
+        datalength = 0
+        if self.compressThreshold != -1:
+            datalength = self.unpack_varint()
+            length = packet_length - len(self.pack_varint(datalength))
+        orig_payload = self.recv(length)
+        return self._unpack_frame(
+            memoryview(self.pack_varint(datalength) + orig_payload))
+
+
+def run(encrypted, count, packet_class):
+    sock = _SegmentSocket(encrypted)
+    packet = packet_class(sock, _Obj())
+    packet.compressThreshold = THRESHOLD
+    packet.recvCipher = _CountingCipher(
+        encryption.aes128cfb8(SECRET).decryptor())
+    start = time.time()
+    total = 0
+    for _ in range(count):
+        total += len(packet.grabpacket()[1])
+    return time.time() - start, sock.calls, packet.recvCipher.calls, total
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    session = make_session(count)
+    encrypted = encryption.aes128cfb8(SECRET).encryptor().update(session)
+    print("session: %d packets, %.1f MB on the wire" % (
+        count, len(session) / 1048576.0))
+    results = {}
+    for name, packet_class in (("legacy", _LegacyPacket),
+                               ("buffered", Packet)):
+        best = None
+        for _ in range(3):
+            elapsed, socks, ciphers, total = run(encrypted, count,
+                                                 packet_class)
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = (best, socks, ciphers, total)
+        print("%-8s %8.3f s  %10.0f packets/s  %8d recv calls  "
+              "%8d cipher calls" % (name, best, count / best, socks,
+                                    ciphers))
+    legacy, buffered = results["legacy"], results["buffered"]
+    assert legacy[3] == buffered[3]
+    print("buffered reader: %.1fx faster, %.1fx fewer recv calls, "
+          "%.1fx fewer cipher calls" % (
+              legacy[0] / buffered[0], legacy[1] / float(buffered[1]),
+              legacy[2] / float(buffered[2])))
+
+
+if __name__ == "__main__":
+    main()
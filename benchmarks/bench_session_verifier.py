@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Simulates a login storm (everyone reconnecting after a restart) against
+a local stand-in for Mojang's session server, comparing the old way (a
+thread and a fresh `requests.get()` per login) with the proxy's
+SessionVerifier pool.
+
+The stand-in answers `hasJoined` like the real thing after LATENCY
+seconds and counts TCP connections and the most requests it had in
+flight at once.
+
+usage: python benchmarks/bench_session_verifier.py [logins] [workers]
+"""
+
+from __future__ import print_function
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from proxy.utils.authenticator import SessionVerifier  # noqa
+
+LATENCY = .05
+
+
+class StandIn(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.connections = 0
+        self.requests = 0
+
+
+def make_handler(stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            BaseHTTPRequestHandler.setup(self)
+            with stats.lock:
+                stats.connections += 1
+
+        def do_GET(self):
+            with stats.lock:
+                stats.requests += 1
+                stats.in_flight += 1
+                stats.peak = max(stats.peak, stats.in_flight)
+            time.sleep(LATENCY)
+            query = parse_qs(urlparse(self.path).query)
+            name = query["username"][0]
+            body = json.dumps({
+                "id": "%032x" % abs(hash(name)), "name": name,
+                "properties": [{"name": "textures", "value": "e30=",
+                                "signature": ""}]}).encode("utf-8")
+            with stats.lock:
+                stats.in_flight -= 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_stand_in():
+    stats = StandIn()
+    server = _Server(("127.0.0.1", 0), make_handler(stats))
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    url = "http://127.0.0.1:%d/session/minecraft/hasJoined" % (
+        server.server_address[1])
+    return server, stats, url
+
+
+def old_way(url, logins):
+    done = []
+
+    def login(number):
+        r = requests.get("%s?username=player%d&serverId=abc" % (url, number))
+        if r.status_code == 200:
+            done.append(r.json())
+    threads = [threading.Thread(target=login, args=(n,))
+               for n in range(logins)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(done)
+
+
+def pooled(url, logins, workers):
+    verifier = SessionVerifier(logging.getLogger("bench"), url=url,
+                               workers=workers, max_queue=logins)
+    verifier.start()
+    done = threading.Semaphore(0)
+    results = []
+
+    def callback(profile, error):
+        results.append(profile)
+        done.release()
+    for number in range(logins):
+        verifier.submit("player%d" % number, "abc", callback)
+    for _ in range(logins):
+        done.acquire()
+    verifier.stop()
+    return len([r for r in results if r]), verifier.longest_wait
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    server, stats, url = start_stand_in()
+    start = time.time()
+    ok = old_way(url, logins)
+    print("thread per login: %3d/%d verified in %5.2f s, %3d connections, "
+          "%3d requests in flight at once" % (
+              ok, logins, time.time() - start, stats.connections,
+              stats.peak))
+    server.shutdown()
+
+    server, stats, url = start_stand_in()
+    start = time.time()
+    ok, longest_wait = pooled(url, logins, workers)
+    print("%d worker pool:    %3d/%d verified in %5.2f s, %3d connections, "
+          "%3d requests in flight at once (longest queue wait %.2f s)" % (
+              workers, ok, logins, time.time() - start, stats.connections,
+              stats.peak, longest_wait))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
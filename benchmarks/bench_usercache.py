@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Compares the old `UUIDS.getuuidbyusername()` usercache search (a scan of
+every record) with the UserCacheIndex, on a usercache of many
+historical players.  Every name looked up is cached and fresh, so
+neither side talks to Mojang.
+
+usage: python benchmarks/bench_usercache.py [users] [lookups]
+"""
+
+from __future__ import print_function
+
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from proxy.utils.mcuuid import UUIDS, MCUUID  # noqa
+
+
+def make_usercache(users):
+    now = time.time()
+    usercache = {}
+    for number in range(users):
+        name = "Player%d" % number
+        usercache["%08x-0000-4000-8000-%012x" % (number, number)] = {
+            "time": now, "original": name, "name": name, "online": True,
+            "localname": name, "IP": None, "names": []}
+    return usercache
+
+
+def scan(usercache, username):
+    """ the old search, minus the Mojang poll. """
+    user_name = "%s" % username
+    for useruuid in usercache:
+        if user_name.lower() == usercache[useruuid]["localname"].lower():
+            if (time.time() - usercache[useruuid]["time"]) < 86400:
+                return MCUUID(useruuid)
+    return False
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    usercache = make_usercache(users)
+    rnd = random.Random(8)
+    names = ["player%d" % rnd.randrange(users) for _ in range(lookups)]
+
+    start = time.time()
+    for name in names:
+        scan(usercache, name)
+    old = time.time() - start
+    print("scan:  %5d lookups in %7.3f s (%8.1f us each)" % (
+        lookups, old, old / lookups * 1e6))
+
+    uuids = UUIDS(logging.getLogger("bench"), usercache)
+    start = time.time()
+    for name in names:
+        assert uuids.getuuidbyusername(name)
+    new = time.time() - start
+    print("index: %5d lookups in %7.3f s (%8.1f us each, %d rebuild)" % (
+        lookups, new, new / lookups * 1e6, uuids.index.rebuilds))
+    print("%.0fx faster (including the first lookup's index build)" % (
+        old / new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Replays a packet capture (made with the proxy's "packet-capture" option,
+see wrapper/proxy/utils/capture.py) through the proxy's own packet
+handling, offline.
+
+A real `Client` and `ServerConnection` are set up on sockets that go
+nowhere.  Each captured packet is framed and unpacked by the receiving
+side's `Packet` and, in PLAY (or LOBBY), handed to its `_handle_packet()`
+- the ParseSB/ParseCB parsers, and forwarding to the other side's send
+queue, which is flushed to the null socket as the proxy would.
+HANDSHAKE, STATUS and LOGIN packets are only unpacked (their parsers log
+players in and open connections).  Events all return True, as if no
+plugins were loaded.
+
+Captures are decrypted, so encryption is not part of the replay.
+
+Reports packets/s and bytes/s, and the time spent per packet type.
+
+usage: python benchmarks/replay_capture.py <capture.wcap> [--realtime]
+        [--repeat N] [--top N] [--stats]
+
+    --realtime  replay at the pace the packets were captured, instead
+                of as fast as possible.
+    --repeat    replay the capture N times (default 1).
+    --top       packet types to list (default 20).
+    --stats     replay with "packet-stats" on (to measure what counting
+                costs).
+"""
+
+from __future__ import print_function
+
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from core.servervitals import ServerVitals  # noqa
+from proxy.base import ProxyConfig  # noqa
+from proxy.client.clientconnection import Client  # noqa
+from proxy.packets.packet import Packet  # noqa
+from proxy.server.parse_cb import ParseCB  # noqa
+from proxy.server.serverconnection import ServerConnection  # noqa
+from proxy.utils.capture import read_capture, CONTEXT, SERVERBOUND, \
+    CLIENTBOUND  # noqa
+from proxy.utils.constants import PLAY, LOBBY  # noqa
+from proxy.utils.statusresponder import pack_varint  # noqa
+from proxy.utils.trafficstats import TrafficStats, DIRECTIONS, describe  # noqa
+
+# flush the send queues every this many packets
+FLUSH_EVERY = 64
+
+
+class _NullSocket(object):
+    def sendall(self, data):
+        pass
+
+    def send(self, data):
+        return len(data)
+
+    def recv(self, size):
+        return b""
+
+    def recv_into(self, buf):
+        return 0
+
+    def shutdown(self, how):
+        pass
+
+    def close(self):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+
+class _Events(object):
+    def callevent(self, event, payload, abortable=True):
+        return True
+
+
+class _Player(object):
+    pass
+
+
+class _Proxy(object):
+    """ just enough of a Proxy for a Client and its ServerConnection """
+    def __init__(self, version, username, stats=False):
+        self.log = logging.getLogger("replay")
+        config = ProxyConfig()
+        self.config = config.proxy
+        self.config["flush-rate-ms"] = 50
+        self.ent_config = config.entity
+        self.srv_data = ServerVitals({username: _Player()})
+        self.srv_data.protocolVersion = version
+        self.public_key = None
+        self.private_key = None
+        self.onlinemode = False
+        self.usehub = False
+        self.encoding = "utf-8"
+        self.eventhandler = _Events()
+        self.commands = None
+        self.proxy_worlds = {}
+        self.registered_channels = []
+        self.entity_control = None
+        self.forge = False
+        self.clients = []
+        self.skins = {}
+        self.inv_slots = list(range(46))
+        self.traffic = TrafficStats(stats)
+
+    def removestaleclients(self):
+        pass
+
+    def getclientbyofflineserveruuid(self, uuid):
+        return None
+
+
+class Replay(object):
+    def __init__(self, records, stats=False):
+        self.records = records
+        self.counting = stats
+        first = {}
+        for kind, direction, when, payload in records:
+            if kind == CONTEXT and direction not in first:
+                first[direction] = payload
+        context = first.get(SERVERBOUND) or first.get(CLIENTBOUND)
+        self.version = context["version"]
+        self.username = context["username"]
+
+        # (direction, state, pkid): [count, bytes, seconds]
+        self.stats = {}
+        self.errors = 0
+        self.packets = 0
+        self.bytes = 0
+        self.elapsed = 0
+
+    def _setup(self):
+        proxy = _Proxy(self.version, self.username, self.counting)
+        client = Client(proxy, _NullSocket(), ("replay", 0))
+        client.username = self.username
+        client.clientversion = self.version
+        client.packet.version = self.version
+        client._inittheplayer()
+        server = ServerConnection(client)
+        server.packet = Packet(_NullSocket(), server)
+        server.packet.version = self.version
+        server.parse_cb = ParseCB(server, server.packet)
+        server._define_parsers()
+        if client.stats:
+            # as connect() does
+            server.packet.stats = client.stats.packet(CLIENTBOUND, server)
+            server.parse = server._parse_counted
+        client.server_connection = server
+        return client, server
+
+    def run(self, realtime=False):
+        client, server = self._setup()
+        owners = {SERVERBOUND: client, CLIENTBOUND: server}
+        readers = {SERVERBOUND: client.packet, CLIENTBOUND: server.packet}
+        senders = (client.packet, server.packet)
+        states = {SERVERBOUND: 0, CLIENTBOUND: 0}
+        stats = self.stats
+        clock = time.time
+        sincelastflush = 0
+
+        start = clock()
+        for kind, direction, when, payload in self.records:
+            if realtime:
+                wait = when - (clock() - start)
+                if wait > 0:
+                    time.sleep(wait)
+            if kind == CONTEXT:
+                states[direction] = payload["state"]
+                readers[direction].compressThreshold = payload["threshold"]
+                # these are what parsers and forwarding look at
+                owners[direction].state = payload["state"]
+                continue
+
+            owner = owners[direction]
+            packet = readers[direction]
+            state = states[direction]
+            begin = clock()
+            packet.recvbuf.feed(pack_varint(len(payload)) + payload)
+            pkid, orig_packet = packet.grab_buffered()
+            if state in (PLAY, LOBBY):
+                owner.abort = False
+                try:
+                    owner._handle_packet(pkid, orig_packet)
+                except Exception as e:
+                    self.errors += 1
+                    if self.errors < 10:
+                        print("%s 0x%02x: %s" % (
+                            DIRECTIONS[direction], pkid, e))
+            sincelastflush += 1
+            if sincelastflush == FLUSH_EVERY:
+                sincelastflush = 0
+                for sender in senders:
+                    sender.flush()
+            spent = clock() - begin
+
+            key = (direction, state, pkid)
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = [0, 0, 0.0]
+            entry[0] += 1
+            entry[1] += len(payload)
+            entry[2] += spent
+            self.packets += 1
+            self.bytes += len(payload)
+        for sender in senders:
+            sender.flush()
+        self.elapsed += clock() - start
+
+    def report(self, top):
+        print("%d packets, %.1f MB in %.3f s: %.0f packets/s, %.1f MB/s" % (
+            self.packets, self.bytes / 1e6, self.elapsed,
+            self.packets / self.elapsed, self.bytes / 1e6 / self.elapsed))
+        if self.errors:
+            print("%d packets raised an exception" % self.errors)
+        print()
+        print("%-40s %9s %11s %9s %7s" % (
+            "packet", "count", "bytes", "us each", "time %"))
+        total = sum(entry[2] for entry in self.stats.values()) or 1
+        rows = sorted(self.stats.items(), key=lambda item: -item[1][2])
+        for key, (count, size, spent) in rows[:top]:
+            print("%-40s %9d %11d %9.2f %6.1f%%" % (
+                describe(key, self.version), count, size, spent / count * 1e6,
+                spent / total * 100))
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0].startswith("-"):
+        print(__doc__)
+        return
+    path = args[0]
+    realtime = "--realtime" in args
+    repeat = int(args[args.index("--repeat") + 1]) if "--repeat" in args \
+        else 1
+    top = int(args[args.index("--top") + 1]) if "--top" in args else 20
+    stats = "--stats" in args
+
+    logging.basicConfig(level=logging.CRITICAL)
+    records = list(read_capture(path))
+    replay = Replay(records, stats)
+    print("%s: %d records, protocol %d, player %s" % (
+        path, len(records), replay.version, replay.username))
+    for _ in range(repeat):
+        replay.run(realtime)
+    replay.report(top)
+
+
+if __name__ == "__main__":
+    main()
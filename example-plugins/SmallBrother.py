@@ -31,13 +31,12 @@ class Main:
         self.minecraft = api.minecraft
         self.log = log
         
-        self.time = 0		
         self.toggled = []
 
     def onEnable(self):
         self.api.registerEvent("player.dig", self.breakBlock)
         self.api.registerEvent("player.place", self.placeBlock)
-        self.api.registerEvent("timer.second", self.timer)
+        self.api.scheduleRepeating(60 * 2, self.timer)
 
         self.api.registerEvent("server.started", self.onServerStart)
 
@@ -52,13 +51,10 @@ class Main:
         self.logger = Logger(self.minecraft.getWorldName())
         self.logger.init()
 
-    def timer(self, payload):
+    def timer(self):
         if not self.minecraft.isServerStarted():
             return
-        self.time += 1
-        if self.time == 60 * 2:
-            self.logger.flush()
-            self.time = 0
+        self.logger.flush()
 
     def breakBlock(self, payload):  # print self.minecraft.getServer().world.getBlock(payload["position"])
         player = payload["player"]
@@ -108,10 +108,8 @@ class Main:
             self.movement_walk = 6
             self.movement_numbers = 10
             self.movement_tp = 100
-            tr = threading.Thread(target=self._pos_tracker,
-                                  name="tracker", args=())
-            tr.daemon = True
-            tr.start()
+            self.locs = {}
+            self.api.scheduleRepeating(1, self._pos_tracker)
 
     def onDisable(self):
         self.run = False
@@ -125,60 +123,58 @@ class Main:
         self.pkts_cb = self.api.minecraft.getServerPackets()
 
     def _pos_tracker(self):
-        """Position tracker is also a global thread working with all player
-         clients, so it must use the try-except clauses.  If it fails
-         because one of the clients logs out, etc, the entire thread will
-         fail to perform its job."""
-        locs = {}
-        while self.run:
-            time.sleep(1)
-            players = self.api.minecraft.getPlayers()
-            for each in players:
-                player = self.api.minecraft.getPlayer(each)
+        """Position tracker runs each second for all player clients, so
+         it must use the try-except clauses.  If it fails because one of
+         the clients logs out, etc, the entire pass will fail to perform
+         its job."""
+        locs = self.locs
+        players = self.api.minecraft.getPlayers()
+        for each in players:
+            player = self.api.minecraft.getPlayer(each)
 
+            try:
+                gm = player.getGamemode()
+                dim = player.getDimension()
+                uuid = player.uuid
+            except AttributeError:
+                self.log.debug(
+                    "region POS_tracker bad payload - missing GM or dim"
+                )
+                continue
+            l_pos = player.getPosition()
+            present_pos = int(l_pos[0]), int(l_pos[1]), int(l_pos[2]), dim
+            if uuid not in locs:
+                locs[uuid] = {}
+                locs[uuid]["track"] = [present_pos, ]
+                locs[uuid]["back"] = present_pos
+                continue
+            pos_triple = int(l_pos[0]), int(l_pos[1]), int(l_pos[2])
+            if self._banned_from_area(gm, pos_triple, dim, player):
                 try:
-                    gm = player.getGamemode()
-                    dim = player.getDimension()
-                    uuid = player.uuid
-                except AttributeError:
-                    self.log.debug(
-                        "region POS_tracker bad payload - missing GM or dim"
-                    )
-                    continue
-                l_pos = player.getPosition()
-                present_pos = int(l_pos[0]), int(l_pos[1]), int(l_pos[2]), dim
-                if uuid not in locs:
-                    locs[uuid] = {}
-                    locs[uuid]["track"] = [present_pos, ]
-                    locs[uuid]["back"] = present_pos
-                    continue
-                pos_triple = int(l_pos[0]), int(l_pos[1]), int(l_pos[2])
-                if self._banned_from_area(gm, pos_triple, dim, player):
-                    try:
-                        # prime number of positions backwards from entering
-                        new_pos = locs[uuid]["track"][-17]
-                    except IndexError:
-                        new_pos = self.spawn
-
-                    self.api.minecraft.console(
-                        "spreadplayers %s %s 1 2 false %s" % (
-                            new_pos[0], new_pos[2], player.username)
-                    )
-                    continue
-                if self._signif_move(
-                        locs[uuid]["track"][-1],
-                        present_pos,
-                        self.movement_tp
-                ):
-                    locs[uuid]["back"] = locs[uuid]["track"][-1]
-                if self._signif_move(
-                        locs[uuid]["track"][-1],
-                        present_pos,
-                        self.movement_walk
-                ):
-                    locs[uuid]["track"].append(present_pos)
-                    while len(locs[uuid]["track"]) > self.movement_numbers:  # noqa
-                        locs[uuid]["track"].pop(0)
+                    # prime number of positions backwards from entering
+                    new_pos = locs[uuid]["track"][-17]
+                except IndexError:
+                    new_pos = self.spawn
+
+                self.api.minecraft.console(
+                    "spreadplayers %s %s 1 2 false %s" % (
+                        new_pos[0], new_pos[2], player.username)
+                )
+                continue
+            if self._signif_move(
+                    locs[uuid]["track"][-1],
+                    present_pos,
+                    self.movement_tp
+            ):
+                locs[uuid]["back"] = locs[uuid]["track"][-1]
+            if self._signif_move(
+                    locs[uuid]["track"][-1],
+                    present_pos,
+                    self.movement_walk
+            ):
+                locs[uuid]["track"].append(present_pos)
+                while len(locs[uuid]["track"]) > self.movement_numbers:  # noqa
+                    locs[uuid]["track"].pop(0)
 
     def _banned_from_area(self, gamemode, pos, dim, player):
         if gamemode in (0, 2):
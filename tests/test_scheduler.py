@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+import logging
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from core.scheduler import Scheduler  # noqa
+
+
+def dispatch(key, function, args):
+    """ Stands in for the event workers: a thread per call. """
+    t = threading.Thread(target=function, args=args)
+    t.daemon = True
+    t.start()
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler(logging.getLogger("test"), dispatch)
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_slow_repeating_task_skips_overlapping_runs(self):
+        starts = []
+
+        def slow():
+            starts.append(time.time())
+            time.sleep(0.25)
+
+        began = time.time()
+        taskid = self.scheduler.schedule(0.1, slow, interval=0.1)
+        time.sleep(1.0)
+        task = self.scheduler.tasks[taskid]
+        self.scheduler.cancel(taskid)
+        offsets = [start - began for start in starts]
+        # runs start on deadlines (0.1, 0.4, 0.7, 1.0), never straight
+        #  after the last run ends
+        self.assertTrue(3 <= len(offsets) <= 4, offsets)
+        for first, second in zip(offsets, offsets[1:]):
+            self.assertAlmostEqual(second - first, 0.3, delta=0.06)
+        self.assertGreaterEqual(task.skipped, 4)
+
+    def test_repeating_task_keeps_to_schedule(self):
+        starts = []
+        taskid = self.scheduler.schedule(0.05, lambda: starts.append(1),
+                                         interval=0.05)
+        time.sleep(0.53)
+        self.scheduler.cancel(taskid)
+        self.assertTrue(9 <= len(starts) <= 11, len(starts))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+import io
+import json
+import locale
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from core.storage import Storage  # noqa
+
+NAME = u"Jörg Ångström"
+
+
+class JsonStorageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        # as on a system whose encoding is not UTF-8 (Windows)
+        self._preferred = locale.getpreferredencoding
+        locale.getpreferredencoding = lambda do_setlocale=True: "cp1252"
+
+    def tearDown(self):
+        locale.getpreferredencoding = self._preferred
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def storage(self):
+        return Storage("usercache", root=self.root, pickle=False,
+                       encoding="utf-8")
+
+    def test_non_ascii_survives_saves(self):
+        store = self.storage()
+        store.Data["uuid"] = {"localname": NAME}
+        store.close()
+        for _ in range(3):
+            store = self.storage()
+            self.assertEqual(store.Data["uuid"]["localname"], NAME)
+            store.Data["other"] = 1
+            store.close()
+
+    def test_reads_files_in_the_system_encoding(self):
+        with io.open(os.path.join(self.root, "usercache.json"), "w",
+                     encoding="cp1252") as f:
+            f.write(u"%s" % json.dumps({"uuid": {"localname": NAME}},
+                                       ensure_ascii=False))
+        store = self.storage()
+        self.assertEqual(store.Data["uuid"]["localname"], NAME)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
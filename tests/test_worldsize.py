@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "wrapper"))
+
+from core.worldsize import WorldSize  # noqa
+
+
+class WorldSizeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.worldsize = WorldSize(logging.getLogger("test"), self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write(self, path, size):
+        full = os.path.join(self.root, path)
+        if not os.path.isdir(os.path.dirname(full)):
+            os.makedirs(os.path.dirname(full))
+        with open(full, "wb") as f:
+            f.write(b"x" * size)
+
+    def walked(self):
+        total = 0
+        for path, _, files in os.walk(self.root):
+            for name in files:
+                total += os.path.getsize(os.path.join(path, name))
+        return total
+
+    def refresh(self):
+        # directory mtimes may not change within the same tick
+        time.sleep(0.01)
+        self.worldsize.refresh()
+
+    def test_scan(self):
+        self.write("level.dat", 100)
+        self.write("region/r.0.0.mca", 4096)
+        self.write("DIM-1/region/r.0.0.mca", 1000)
+        self.write("dimensions/mod/moon/region/r.0.0.mca", 500)
+        self.worldsize.refresh()
+        self.assertEqual(self.worldsize.report(), {
+            "total": 5696,
+            "dimensions": {"overworld": 4196, "DIM-1": 1000,
+                           "mod:moon": 500}})
+        self.assertEqual(self.worldsize.regions("overworld"),
+                         {"region/r.0.0.mca": 4096})
+
+    def test_empty_files(self):
+        self.write("level.dat", 100)
+        self.write("DIM1/data/empty.dat", 0)
+        self.worldsize.refresh()
+        os.remove(os.path.join(self.root, "DIM1/data/empty.dat"))
+        self.refresh()
+        self.assertEqual(self.worldsize.report(),
+                         {"total": 100, "dimensions": {"overworld": 100}})
+        self.assertNotIn("DIM1/data/empty.dat", self.worldsize.files)
+        self.write("DIM1/data/empty2.dat", 0)
+        self.write("DIM-1/empty.dat", 0)
+        self.refresh()
+        self.assertIn("DIM1/data/empty2.dat", self.worldsize.files)
+        self.assertEqual(self.worldsize.total, 100)
+
+    def test_add_and_remove_directories(self):
+        self.write("level.dat", 100)
+        self.write("DIM-1/region/r.0.0.mca", 1000)
+        self.write("DIM-1/data/empty.dat", 0)
+        self.worldsize.refresh()
+        self.write("DIM1/region/r.0.0.mca", 333)
+        self.write("DIM1/data/empty.dat", 0)
+        shutil.rmtree(os.path.join(self.root, "DIM-1"))
+        self.refresh()
+        self.assertEqual(self.worldsize.report(), {
+            "total": 433, "dimensions": {"overworld": 100, "DIM1": 333}})
+        shutil.rmtree(os.path.join(self.root, "DIM1"))
+        self.refresh()
+        self.assertEqual(self.worldsize.report(),
+                         {"total": 100, "dimensions": {"overworld": 100}})
+        self.assertEqual(self.worldsize.total, self.walked())
+
+    def test_files_growing_in_place(self):
+        self.write("region/r.0.0.mca", 4096)
+        self.worldsize.refresh()
+        with open(os.path.join(self.root, "region/r.0.0.mca"), "ab") as f:
+            f.write(b"y" * 4096)
+        self.refresh()
+        self.assertEqual(self.worldsize.total, 8192)
+
+
+if __name__ == "__main__":
+    unittest.main()
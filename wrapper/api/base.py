@@ -10,6 +10,7 @@ import time
 
 from api.minecraft import Minecraft
 from core.storage import Storage
+from core.sqlitestorage import SQLiteStorage
 from api.backups import Backups
 from api import helpers
 from utils import version as version_mod
@@ -198,10 +199,8 @@ class API(object):
             if not self.internal:
                 self.wrapper.log.debug("[%s] Registered command '%s'",
                                        self.name, name)
-            if self.id not in self.wrapper.commands:
-                self.wrapper.commands[self.id] = {}
-            self.wrapper.commands[self.id][name] = {"callback": callback,
-                                                    "permission": permission}
+            self.wrapper.commands.register(self.id, name, callback,
+                                           permission)
 
     def registerEvent(self, eventname, callback):
         """
@@ -222,9 +221,7 @@ class API(object):
         if not self.internal:
             self.wrapper.log.debug("[%s] Registered event '%s'",
                                    self.name, eventname)
-        if self.id not in self.wrapper.events:
-            self.wrapper.events[self.id] = {}
-        self.wrapper.events[self.id][eventname] = callback
+        self.wrapper.events.register(self.id, eventname, callback)
 
     def registerPermission(self, permission=None, value=False):
         """
@@ -247,9 +244,7 @@ class API(object):
             self.wrapper.log.debug(
                 "[%s] Registered permission '%s' with default value: %s",
                 self.name, permission, value)
-        if self.id not in self.wrapper.registered_permissions:
-            self.wrapper.registered_permissions[self.id] = {}
-        self.wrapper.registered_permissions[self.id][permission] = value
+        self.wrapper.perms.register_default(self.id, permission, value)
 
     def registerHelp(self, groupname, summary, commands):
         """
@@ -363,6 +358,70 @@ class API(object):
         caller = self.wrapper.callevent
         return caller(event, payload, abortable)
 
+    def scheduleDelayed(self, delay, callback, args=()):
+        """
+        Call a plugin method once, after a delay.  The call is made by
+        one of wrapper's event threads, not by a thread of its own.
+
+        :Args:
+            :delay: seconds to wait (a float is fine).
+            :callback: the plugin method to call.
+            :args: a tuple of arguments to pass to `callback`.
+
+        :returns: the task ID (for `cancel()`).
+
+        """
+        return self.wrapper.events.scheduler.schedule(
+            delay, callback, args, owner=self.id)
+
+    def scheduleRepeating(self, interval, callback, args=(), delay=None):
+        """
+        Call a plugin method every `interval` seconds, until the task is
+        cancelled or the plugin is unloaded.  Use this instead of a
+        thread that sleeps in a loop, or of counting "timer.second"
+        events.
+
+        The calls keep to the schedule (a slow call does not push the
+        next ones back).  If a call is still running when the next is
+        due, that next call is skipped.
+
+        :Args:
+            :interval: seconds between calls (a float is fine).
+            :callback: the plugin method to call.
+            :args: a tuple of arguments to pass to `callback`.
+            :delay: seconds to the first call (default `interval`).
+
+        :sample usage:
+
+            .. code:: python
+
+                self.flushing = self.api.scheduleRepeating(120, self.flush)
+                ...
+                self.api.cancel(self.flushing)
+            ..
+
+        :returns: the task ID (for `cancel()`).
+
+        """
+        if delay is None:
+            delay = interval
+        return self.wrapper.events.scheduler.schedule(
+            delay, callback, args, interval, owner=self.id)
+
+    def cancel(self, taskid):
+        """
+        Cancel a task scheduled with `scheduleDelayed()` or
+        `scheduleRepeating()`.  A plugin's tasks are cancelled when it
+        is unloaded anyway.
+
+        :Args:
+            :taskid: the ID the task was scheduled with.
+
+        :returns: True if the task was still scheduled.
+
+        """
+        return self.wrapper.events.scheduler.cancel(taskid)
+
     def getPluginContext(self, plugin_id):
         """
         Returns the instance (content) of another running wrapper
@@ -391,7 +450,7 @@ class API(object):
         else:
             raise LookupError("Plugin %s does not exist!" % plugin_id)
 
-    def getStorage(self, name, world=False, pickle=True):
+    def getStorage(self, name, world=False, pickle=True, sqlite=False):
         """
         Returns a storage object manager for saving data between reboots.
 
@@ -408,6 +467,12 @@ class API(object):
              conform to json standards (like use of string keys).  However,
              pickle is not generally human-readable, whereas json is human
              readable.
+            :sqlite:  Keep the storage in an SQLite database.  Items
+             are read from disk as they are used instead of all at
+             load, for large data sets.  Keys must be strings or numbers.
+             Adds `query()` (items by key range) and `transaction()`;
+             see core/sqlitestorage.py.  An existing storage of the same
+             name is imported into it.
 
         :Returns: A storage object manager.  The manager contains a
          storage dictionary called 'Data'. 'Data' contains the
@@ -483,12 +548,16 @@ class API(object):
             ..
 
         """
+        if sqlite:
+            storage = SQLiteStorage
+        else:
+            storage = Storage
         if world:
-            return Storage(name, root="%s/%s/plugins/%s" % (
+            return storage(name, root="%s/%s/plugins/%s" % (
                 self.serverpath, self.minecraft.getWorldName(),
                 self.id), pickle=pickle)
         else:
-            return Storage(name, root="wrapper-data/plugins/%s" %
+            return storage(name, root="wrapper-data/plugins/%s" %
                                       self.id, pickle=pickle)
 
     def wrapperHalt(self):
@@ -424,24 +424,19 @@ def pickle_load(path, filename):
             return {}
 
 
-def pickle_save(path, filename, data, encoding="machine"):
+def pickle_protocol(encoding="machine"):
     """
-    Save data to Pickle file (*.pkl).  Allows saving dictionary or other
-    data in a way that json cannot always be saved due to json formatting
-    rules.
+    The pickle protocol `pickle_save` uses.
 
     :Args:
-        :path: path to file (no trailing slash)
-        :filename: filename including *.pkl extension
-        :data: Data to be pickled.
         :encoding: 'Machine' or 'Human' - determines whether file contents
          can be viewed in a text editor.
 
-    :returns: Nothing.  Assumes success; errors will raise exception.
+    :returns: the protocol number.
 
     """
     if "human" in encoding.lower():
-        _protocol = 0
+        return 0
     else:
         # using something less than HIGHEST allows both Pythons 2/3
         # to use the files interchangeably.  It should also allow
@@ -463,7 +458,26 @@ def pickle_save(path, filename, data, encoding="machine"):
         # I wanted the code to use something better/faster than
         # Human-readable (unless that is what you specify), while
         # still permitting some portability of the final files
-        _protocol = Pickle.HIGHEST_PROTOCOL // 2
+        return Pickle.HIGHEST_PROTOCOL // 2
+
+
+def pickle_save(path, filename, data, encoding="machine"):
+    """
+    Save data to Pickle file (*.pkl).  Allows saving dictionary or other
+    data in a way that json cannot always be saved due to json formatting
+    rules.
+
+    :Args:
+        :path: path to file (no trailing slash)
+        :filename: filename including *.pkl extension
+        :data: Data to be pickled.
+        :encoding: 'Machine' or 'Human' - determines whether file contents
+         can be viewed in a text editor.
+
+    :returns: Nothing.  Assumes success; errors will raise exception.
+
+    """
+    _protocol = pickle_protocol(encoding)
 
     with open("%s/%s" % (path, filename), "wb") as f:
         Pickle.dump(data, f, protocol=_protocol)
@@ -623,6 +637,30 @@ def putjsonfile(data, filename, directory=".", indent_spaces=2, sort=True):
     return False
 
 
+def _replace(source, target):
+    """ Rename `source` to `target`, replacing it. """
+    try:
+        os.replace(source, target)
+    except AttributeError:
+        # Python 2
+        if os.name == "nt" and os.path.exists(target):
+            os.remove(target)
+        os.rename(source, target)
+
+
+def write_atomic(path, data):
+    """
+    Write `data` (bytes) to a file by writing it to a temporary file and
+    renaming that over `path`, so `path` is never left half written.
+    """
+    temporary = "%s.tmp" % path
+    with open(temporary, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    _replace(temporary, path)
+
+
 def read_timestr(mc_time_string):
     """
     The Minecraft server (or wrapper, using epoch_to_timestr) creates
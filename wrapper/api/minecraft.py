@@ -229,6 +229,8 @@ class Minecraft(object):
         login data of all players ever connected to the server.
 
         """
+        # the records of online players are written now and then
+        self.wrapper.playerdata.flush()
         alluuidfiles = os.listdir("wrapper-data/players")
 
         # do this now so we don't re-run it in each 'for .. in ..' loop
@@ -438,6 +440,20 @@ class Minecraft(object):
         """
         return self.wrapper.uuids.getuuidbyusername(name)
 
+    def lookupbyNames(self, names):
+        """
+        Returns the UUIDs of several usernames at once.  Names not in
+        the user cache are looked up with a single (bulk) poll of
+        Mojang's API for every ten names, instead of one poll each.
+
+        :arg names:  a list of player names
+
+        :returns: a dictionary of each name: a UUID object (wrapper
+         type MCUUID), or False if the name is invalid.
+
+        """
+        return self.wrapper.uuids.getuuidsbyusernames(names)
+
     # World and console interaction
 
     def setLocalName(self, MojangUUID, desired_name, kick=True):
@@ -471,6 +487,7 @@ class Minecraft(object):
         # do the name change in the cache
         if MojangUUID in cache:
             cache[MojangUUID]["localname"] = desired_name
+            self.wrapper.uuids.index.add(MojangUUID)
             cache.save()
 
         # kicking them is needed to complete the process
@@ -751,6 +768,51 @@ class Minecraft(object):
         """
         return int(str(self.getLevelInfo()["Time"]))
 
+    def getResourceUsage(self, seconds=0):
+        """
+        Gets the server process's resource use, as sampled every
+        "resource-sample-seconds" (see wrapper.properties).
+
+        :arg seconds: also get this many seconds of history.  Beyond an
+         hour, it is one minute averages.
+
+        :returns: A dict:
+            :"latest": the last sample (None if there is none yet), a
+             dict of "time", "pid", "rss" (bytes), "cpu" (percent of
+             one core), "threads", "fds" (open files), "read" and
+             "write" (disk bytes per second).
+            :"history": (only if `seconds` is given) a dict of lists,
+             "time" and one per item of the samples, oldest first, and
+             "interval", the seconds between them.
+
+        """
+        sampler = self.wrapper.javaserver.sampler
+        usage = {"latest": sampler.latest()}
+        if seconds:
+            usage["history"] = sampler.history(seconds)
+        return usage
+
+    def getTickStats(self, seconds=60):
+        """
+        Gets the server's tick rate and latency over the last `seconds`,
+        from the time updates the proxy passes to players, the proxy's
+        keep alives and the server's "Can't keep up!" console lines.
+        The tick rate is only known while players are online (through
+        the proxy).
+
+        :returns: A dict:
+            :"tps": ticks per second (None if not known).
+            :"tps_min": that of the slowest second.
+            :"tick_ms": milliseconds per tick, a dict of percentiles
+             ("p50", "p95", "p99", "max") and "samples".
+            :"ping_ms": keep alive round trips, in the same form.
+            :"lag": "count" of "Can't keep up!" lines and the
+             milliseconds "behind" they add up to.
+            :"updated": time of the last tick sample, or None.
+
+        """
+        return self.wrapper.servervitals.ticks.report(seconds)
+
     def getServer(self):
         """
         Returns the server context.  Use at own risk - items
@@ -780,6 +842,28 @@ class Minecraft(object):
         """
         return self.getServer().world
 
+    def getWorldSize(self, regions=False, dimension=None):
+        """
+        Gets the size of the world folder, as last counted (it is kept
+        up to date every minute or so).
+
+        :arg regions: also get the size of each region (.mca) file.
+        :arg dimension: only get the region files of this dimension.
+
+        :returns: A dict of the "total" bytes, the bytes of each of the
+         "dimensions" ({"overworld": bytes, "DIM-1": bytes, ...}) and,
+         with `regions`, "regions" ({path in the world: bytes}).  None
+         if the world was not counted yet.
+
+        """
+        worldsize = self.wrapper.javaserver.worldsize
+        if worldsize is None or not worldsize.scanned:
+            return None
+        sizes = worldsize.report()
+        if regions:
+            sizes["regions"] = worldsize.regions(dimension)
+        return sizes
+
     def getWorldName(self):
         """
         Returns the world's name.  If worldname does not exist (server
@@ -6,14 +6,12 @@
 # General Public License, version 3 or later.
 
 import time
-import threading
 import pprint
 
 from proxy.packets.mcpackets_cb import Packets as Packets_cb
 from proxy.packets.mcpackets_sb import Packets as Packets_sb
 
 from proxy.utils.constants import *
-from core.storage import Storage
 from api.helpers import processoldcolorcodes
 
 
@@ -166,7 +164,7 @@ class Player(object):
         self.username = username
         self.loggedIn = time.time()
 
-        # mcserver will set this to false later to close the thread.
+        # set by _logout(), when the player leaves.
         self.abort = False
         self.data = None
         # meanwhile, it still needs to respect wrapper halts
@@ -242,28 +240,13 @@ class Player(object):
             # poll cache/mojang for proper uuid
             self.mojangUuid = self.wrapper.uuids.getuuidbyusername(username)
 
-        # Process login data
-        self.data = Storage(
-            self.mojangUuid.string, root="wrapper-data/players")
-        if "firstLoggedIn" not in self.data.Data:
-            self.data.Data["firstLoggedIn"] = (time.time(), time.tzname)
-        if "logins" not in self.data.Data:
-            self.data.Data["logins"] = {}
-        self.data.Data["lastLoggedIn"] = (self.loggedIn, time.tzname)
-        self.data.save()
-
-        # start player logged in time tracking thread
-        t = threading.Thread(target=self._track, args=())
-        t.daemon = True
-        t.start()
+        # Process login data (and start tracking play time)
+        self.data = self.wrapper.playerdata.login(
+            self.mojangUuid.string, self.loggedIn)
 
     def __str__(self):
         return self.username
 
-    def __del__(self):
-        if self.data:
-            self.data.close()
-
     @property
     def name(self):
         return self.username
@@ -285,20 +268,14 @@ class Player(object):
             return self.serverUuid.string
         return self.offlineUuid.string
 
-    def _track(self):
+    def _logout(self):
         """
-        internal tracking that updates a player's server play time.
+        internal - ends the player's session, noting their play time.
         Not a part of the public player object API.
         """
-        self.data.Data["logins"][int(self.loggedIn)] = time.time()
-        while not (self.abort or self.wrapper_signal.halt):
-            timeupdate = time.time()
-            if timeupdate % 60:  # Just update every 60 seconds
-                self.data.Data["logins"][int(self.loggedIn)] = int(time.time())
-            # this needs a fast response to ensure the storage closes 
-            # immediately on player logoff
-            time.sleep(.5)
-        self.data.close()
+        self.abort = True
+        if self.data:
+            self.wrapper.playerdata.logout(self.data.uuid, self.loggedIn)
 
     def kick(self, reason):
         """
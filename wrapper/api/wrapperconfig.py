@@ -250,10 +250,32 @@ CONFIG = {
 
             "command": "java -jar -Xmx2G -Xms1G server.jar nogui",
 
+         # The server's console output is read by its own thread and queued for wrapper to parse and print.  If more than 'console-queue-lines' lines are waiting (wrapper fell behind a flood of output), lines are dropped (and counted) so the server is never held up: 'drop-oldest' drops the lines that waited longest, 'drop-newest' the lines just read.
+
+            "console-overflow": "drop-oldest",
+
+            "console-queue-lines": 50000,
+
          # If not uft-8, specify your system's encoding here.
 
             "encoding": "utf-8",
 
+         # Events that plugins cannot abort (timer.second, irc.message, console messages, etc) are handed to plugins by this many threads.  Each kind of event is still handled in order, by one thread at a time.
+
+            "event-workers": 4,
+
+         # Time every plugin event handler and command, per plugin (see '/wrapper profile').  Off by default; it adds a little overhead to every plugin call.  A plugin call that takes slow-plugin-ms milliseconds or more is logged as a warning, with what it was called with (0 turns the warnings off).
+
+            "plugin-profiling": False,
+
+            "slow-plugin-ms": 50,
+
+         # Sample the server process's memory, CPU, threads, open files and disk I/O every 'resource-sample-seconds' (0 turns sampling off).  The last hour is kept as sampled; 'resource-history-days' days are kept as one minute averages.  See '/mem', the web panel or api.minecraft.getResourceUsage().
+
+            "resource-history-days": 7,
+
+            "resource-sample-seconds": 1,
+
          # Using the default '.' roots the server in the same folder with wrapper. Change this to another folder to keep the wrapper and server folders separate.  Do not use a trailing slash...  e.g. - '/full/pathto/the/server'.  relative paths are ok too, as long as there is no trailing slash.  For instance, to use a sister directory, use `../server`.
 
             "server-directory": ".",
@@ -355,10 +377,37 @@ CONFIG = {
 
             "max-players": 1024,
 
-         # Flush rate sets the interval for packet flushing.  This is a fine-tuning mechanism. 50 Ms is one minecraft tick.  Faster (smaller) rates result in dropped items disappearing.  Larger values can create jerkiness or lag, but result in more reliable transmission.  This is a fine tuning that may be different for each server based on the number of plugins, whether the server is hub, etc.. 50-100 is recommended for most servers.  Hub servers with limited play can be set at 10.
+         # Online mode logins are verified with Mojang's session server by a pool of 'auth-workers' workers (so at most that many requests are in flight at once).  Other logins wait in a queue of up to 'auth-queue-size' players; logins beyond that are asked to try again.  'auth-timeout' is how many seconds to wait for the session server.  'session-server' can point to a local stand-in for testing.
+
+            "auth-workers": 4,
+            "auth-queue-size": 100,
+            "auth-timeout": 5,
+            "session-server": "https://sessionserver.mojang.com/session/minecraft/hasJoined",
+
+         # How many server list pings (status requests) each IP address may send per minute.  Pings over this are dropped as soon as their handshake is read.  Logins are never limited.  0 means no limit.
+
+            "connection-rate-limit": 30,
+
+         # Flush rate is how often the proxy's flush threads (or event loops) check for closed connections while there is nothing to send.  Packets no longer wait for this interval; they are sent as soon as they are queued (see flush-coalesce-ms).  50 Ms is one minecraft tick.
 
             "flush-rate-ms": 50,
 
+         # Once a packet is queued to be sent, wait this long for more packets to send with it in one batch (one encryption and one socket write).  Keep alive and chat packets are always sent immediately.  0 sends each packet as soon as it is queued.
+
+            "flush-coalesce-ms": 2,
+
+         # Largest batch of packets (in bytes) the proxy sends with one socket write.
+
+            "flush-max-batch": 65536,
+
+         # Proxy engine - "threaded" runs several threads per player (handle, flush and keepalive threads for the client and its server connection).  "eventloop" serves all client and server sockets on a small fixed pool of event loops instead, which scales much better with many players.  "eventloop" requires Python 3.4 or later.
+
+            "proxy-engine": "threaded",
+
+         # Number of event loops used by the "eventloop" proxy-engine.  Each player (and their server connection) is assigned to one loop.  1 or 2 is plenty for most servers.
+
+            "proxy-event-loops": 1,
+
          # Auto name changes causes wrapper to automatically change the player's server name.  Enabling this makes name change handling automatic, but will prevent setting your own custom names on the server.
 
             "auto-name-changes": True,
@@ -379,6 +428,20 @@ CONFIG = {
 
             "silent-ipban": True,
 
+         # Skin textures shown by the web panel are downloaded in the background and kept in wrapper-data/skins.  skin-cache-size is how many textures are kept on disk and skin-cache-memory how many of those are also kept in memory.  The least recently used are dropped first.
+
+            "skin-cache-size": 2000,
+            "skin-cache-memory": 64,
+
+         # Record every player's traffic (decrypted) to a file in packet-capture-dir, one file per connection.  Captures can be replayed offline with benchmarks/replay_capture.py to measure the proxy's packet handling.  Captures include chat and everything else the player sends, so only turn this on for testing.
+
+            "packet-capture": False,
+            "packet-capture-dir": "wrapper-data/captures",
+
+         # Count every player's traffic per packet type: packets, bytes, time spent parsing and the time packets wait to be sent.  See the web panel or '/wrapper stats'.  Costs the proxy a few percent, so it is off by default ('/wrapper stats on' turns it on for new connections).
+
+            "packet-stats": False,
+
             "hidden-ops":
 
              # these players do not appear in the sample server player list pings.
@@ -6,6 +6,7 @@
 # General Public License, version 3 or later.
 from pprint import pprint
 
+import threading
 import time
 import json
 
@@ -14,11 +15,54 @@ from api.helpers import format_bytes, getargs, getargsafter, readout
 from api.helpers import get_int, set_item, getjsonfile, putjsonfile
 # noinspection PyProtectedMember
 from api.helpers import _secondstohuman, _showpage
+from core.profiler import COMMAND
 from utils.crypt import get_passphrase
 
+# built-in commands that replace the server's only in proxy mode.
+PROXY_COMMANDS = ("ban", "pardon", "ban-ip", "pardon-ip")
+
+
+class CommandTrie(object):
+    """
+    Command names by prefix.  Each node keeps the (sorted) names below
+    it, so completing a prefix only walks the prefix.
+    """
+    def __init__(self, names):
+        # node: [{character: node}, names]
+        self.root = [{}, []]
+        for name in sorted(names):
+            node = self.root
+            node[1].append(name)
+            for character in name:
+                child = node[0].get(character)
+                if child is None:
+                    child = node[0][character] = [{}, []]
+                node = child
+                node[1].append(name)
+
+    def complete(self, prefix):
+        """ :returns: the names that start with `prefix`. """
+        node = self.root
+        for character in prefix:
+            node = node[0].get(character)
+            if node is None:
+                return []
+        return node[1]
+
 
 # noinspection PyBroadException,PyMethodMayBeStatic
 class Commands(object):
+    """
+    Runs the commands of players (and of the console).
+
+    `self.commands` holds each plugin's commands ({plugin_id: {name:
+    {"callback", "permission"}}}) and `self.registry` every command by
+    its (lower case) name ({name: ((owner, callback, permission), ...)}),
+    the built-in commands (owner None) first, then the plugin commands
+    in plugin load order.  A command is run by the first of its entries
+    that can run.  The registry is rebuilt whenever a plugin registers a
+    command, is loaded or unloaded.
+    """
 
     def __init__(self, wrapper):
         self.wrapper = wrapper
@@ -31,6 +75,34 @@ class Commands(object):
         self.reset_confirmed = False
         self.reset_timeout = time.time()
 
+        # all of these override their Minecraft equivalent; some (like
+        #  op, ban, kick) vary based on whether proxymode is enabled.
+        self.builtins = (
+            (("plugins", "pl"), self.command_plugins),
+            (("op",), self.command_op),
+            (("deop",), self.command_deop),
+            (("kick",), self.command_kick),
+            (("whitelist",), self.command_whitelist),
+            (("wrapper",), self.command_wrapper),
+            (("reload",), self.command_reload),
+            (("help", "?"), self.command_help),
+            (("playerstats",), self.command_playerstats),
+            (("permissions", "perm", "perms", "super"), self.command_perms),
+            (("ent", "entity", "entities"), self.command_entities),
+            (("config", "con", "prop", "property", "properties"),
+             self.command_setconfig),
+            (("ban",), self.command_banplayer),
+            (("pardon",), self.command_pardon),
+            (("ban-ip",), self.command_banip),
+            (("pardon-ip",), self.command_pardonip),
+            (("password",), self.command_password),
+        )
+        self.registry = {}
+        # (registry, CommandTrie of it), built when first needed
+        self._trie = None
+        self._index_lock = threading.Lock()
+        self._reindex()
+
     def __getitem__(self, index):
         if not type(index) == str:
             raise Exception("A string must be passed - got %s" % type(index))
@@ -40,123 +112,113 @@ class Commands(object):
         if not type(index) == str:
             raise Exception("A string must be passed - got %s" % type(index))
         self.commands[index] = value
+        self._reindex()
         return self.commands[index]
 
     def __delitem__(self, index):
         if not type(index) == str:
             raise Exception("A string must be passed - got %s" % type(index))
         del self.commands[index]
+        self._reindex()
 
     def __iter__(self):
         for i in self.commands:
             yield i
 
+    def register(self, plugin_id, name, callback, permission=None):
+        """
+        Run `callback(player, args)` (of plugin `plugin_id`) for command
+        `name`, for players with `permission`.
+        """
+        if plugin_id not in self.commands:
+            self.commands[plugin_id] = {}
+        self.commands[plugin_id][name] = {"callback": callback,
+                                          "permission": permission}
+        self._reindex()
+
+    def _reindex(self):
+        """ Rebuild the registry. """
+        with self._index_lock:
+            registry = {}
+            for names, handler in self.builtins:
+                for name in names:
+                    registry[name] = [(None, handler, None)]
+            for plugin_id in list(self.commands):
+                for name, command in list(self.commands[plugin_id].items()):
+                    registry.setdefault(name.lower(), []).append(
+                        (plugin_id, command["callback"],
+                         command["permission"]))
+            # replaced, never changed, so playercommand() needs no lock.
+            self.registry = dict(
+                (name, tuple(entries)) for name, entries in registry.items())
+
+    def _can_run(self, name, owner):
+        """ If entry `owner` of command `name` can run at all. """
+        if owner is None:
+            return name not in PROXY_COMMANDS or self.wrapper.proxymode
+        if owner == "Wrapper.py":
+            return True
+        plugin = self.wrapper.plugins.plugins.get(owner)
+        return plugin is not None and plugin["good"]
+
+    def complete(self, player, prefix):
+        """
+        :returns: the (sorted) names of the commands starting with
+         `prefix` that `player` may run.
+        """
+        registry = self.registry
+        if self._trie is None or self._trie[0] is not registry:
+            self._trie = (registry, CommandTrie(registry))
+        names = []
+        for name in self._trie[1].complete(prefix.lower()):
+            for owner, callback, permission in registry[name]:
+                if not self._can_run(name, owner):
+                    continue
+                # the entry playercommand() would run
+                if owner is None or player.hasPermission(
+                        permission) or player.isOp() > 4:
+                    names.append(name)
+                break
+        return names
+
     def playercommand(self, payload):
         player = payload["player"]
         command = str(payload["command"]).lower()
         commandtext = "/%s %s" % (command, " ".join(payload["args"]))
         player.message(commandtext)
         if command not in ("password", "othersensitivecommand"):
-            self.log.info("%s executed: %s", payload["player"], commandtext)
-
-        # We should get out of this by creating a wrapper command registering set # noqa
-
-        if command in ("plugins", "pl"):
-            self.command_plugins(player)
-            return
-
-        # some minecraft commands (like op, ban, kick) will have implementations
-        # that should vary based on whether proxymode is enabled and are
-        # defined here to supercede the minecraft version.
-        # all commands here override their Minecraft equivalent.
-
-        elif command == "op":
-            return self.command_op(player, payload)
-
-        elif command == "deop":
-            return self.command_deop(player, payload)
-
-        elif command == "kick":
-            return self.command_kick(player, payload)
-
-        elif command == "whitelist":
-            return self.command_whitelist(player, payload)
-
-        elif command == "wrapper":
-            return self.command_wrapper(player, payload)
-
-        elif command == "reload":
-            return self.command_reload(player, payload)
-
-        elif command in ("help", "?"):
-            return self.command_help(player, payload)
-
-        elif command == "playerstats":
-            return self.command_playerstats(player, payload)
-
-        elif command in ("permissions", "perm", "perms", "super"):
-            return self.command_perms(player, payload)
-
-        elif command in ("ent", "entity", "entities"):
-            return self.command_entities(player, payload)
-
-        elif command in (
-                "config", "con", "prop", "property", "properties"):
-            return self.command_setconfig(player, payload)
+            self.log.info("%s executed: %s", player, commandtext)
 
-        elif self.wrapper.proxymode and command == "ban":
-            return self.command_banplayer(player, payload)
-
-        elif self.wrapper.proxymode and command == "pardon":
-            return self.command_pardon(player, payload)
-
-        elif self.wrapper.proxymode and command == "ban-ip":
-            return self.command_banip(player, payload)
-
-        elif self.wrapper.proxymode and command == "pardon-ip":
-            return self.command_pardonip(player, payload)
-
-        elif command == "password":
-            return self.command_password(player, payload)
-        # This section calls the commands defined by api.registerCommand()
-        for pluginID in self.commands:
-            command = payload["command"]
-            if pluginID == "Wrapper.py":
-                try:
-                    self.commands[pluginID][command](payload["player"],
-                                                     payload["args"])
-                except Exception as e:
-                    self.log.debug("Exception in 'Wrapper.py' while"
-                                   " trying to run '%s' command:\n%s",
-                                   (command, e))
+        # built-in commands, then the ones registered by
+        #  api.registerCommand()
+        for owner, callback, permission in self.registry.get(command, ()):
+            if not self._can_run(command, owner):
                 continue
-            if pluginID not in self.wrapper.plugins:
-                continue
-            plugin = self.wrapper.plugins[pluginID]
-            if not plugin["good"]:
-                continue
-            if command in self.commands[pluginID]:
-                try:
-                    command = self.commands[pluginID][command]
-                    # require super op to bypass explicit permission
-                    if player.hasPermission(
-                            command["permission"]) or player.isOp() > 4:
-                        command["callback"](payload["player"], payload["args"])
-                    else:
-                        player.message(
-                            {"translate": "commands.generic.permission",
-                             "color": "red"})
-                    return
-                except Exception as e:
-                    self.log.exception(
-                        "Plugin '%s' errored out when executing command:"
-                        " '<%s> /%s':\n%s", pluginID,
-                        payload["player"], command, e)
-                    payload["player"].message(
-                        {"text": "An internal error occurred in wrapper"
-                         "while trying to execute this command. Apologies.",
+            if owner is None:
+                return callback(player, payload)
+            try:
+                # require super op to bypass explicit permission
+                if player.hasPermission(permission) or player.isOp() > 4:
+                    started = self.wrapper.profiler.start()
+                    try:
+                        callback(player, payload["args"])
+                    finally:
+                        if started:
+                            self.wrapper.profiler.finish(
+                                started, COMMAND, owner, command, payload)
+                else:
+                    player.message(
+                        {"translate": "commands.generic.permission",
                          "color": "red"})
-                    return
+            except Exception as e:
+                self.log.exception(
+                    "Plugin '%s' errored out when executing command:"
+                    " '<%s> /%s':\n%s", owner, player, command, e)
+                player.message(
+                    {"text": "An internal error occurred in wrapper"
+                     "while trying to execute this command. Apologies.",
+                     "color": "red"})
+            return
 
         # command was not executed by werapper, so try server.
         player.execute(commandtext)
@@ -454,6 +516,12 @@ class Commands(object):
                         "&cError: Couldn't retrieve memory usage for an "
                         "unknown reason"
                     )
+            elif subcommand == "stats":
+                self._wrapper_stats(player, payload)
+            elif subcommand == "profile":
+                self._wrapper_profile(player, payload)
+            elif subcommand == "tps":
+                self._wrapper_tps(player, payload)
         else:
             player.message(
                 {"text": "Wrapper.py Version %s" % buildstring,
@@ -461,6 +529,95 @@ class Commands(object):
             )
         return
 
+    def _wrapper_stats(self, player, payload):
+        """ /wrapper stats [on|off|reset|<top>] - proxy packet statistics """
+        if not self.wrapper.proxymode:
+            player.message("&cThe proxy is not running.")
+            return
+        traffic = self.wrapper.proxy.traffic
+        option = getargs(payload["args"], 1).lower()
+        if option in ("on", "off"):
+            # only connections made from now on are counted (or not)
+            traffic.enabled = option == "on"
+            player.message("&aPacket statistics are %s for new "
+                           "connections." % option)
+            return
+        if option == "reset":
+            traffic.reset()
+            player.message("&aPacket statistics reset.")
+            return
+        top = get_int(option) or 10
+        rows = traffic.rows(
+            version=self.wrapper.servervitals.protocolVersion, top=top)
+        player.message("&6Packet statistics (%s) since %s:" % (
+            "on" if traffic.enabled else "off",
+            time.strftime("%H:%M:%S", time.localtime(traffic.since))))
+        if not rows:
+            player.message("&7Nothing counted yet.")
+        for row in rows:
+            amount, units = format_bytes(row["wire_bytes"] + row["sent_bytes"])
+            player.message(
+                "&e%s&r: %d in, %d out, %s %s, parse %.1f ms, "
+                "queued %.1f ms avg / %.1f ms max" % (
+                    row["packet"], row["received"], row["sent"], amount,
+                    units, row["parse_time"] * 1000,
+                    row["latency_avg"] * 1000, row["latency_max"] * 1000))
+
+    def _wrapper_profile(self, player, payload):
+        """ /wrapper profile [on|off|reset|<plugin>|<top>] - plugin timing """
+        profiler = self.wrapper.profiler
+        option = getargs(payload["args"], 1)
+        if option.lower() in ("on", "off"):
+            profiler.enabled = option.lower() == "on"
+            player.message("&aPlugin profiling is %s." % option.lower())
+            return
+        if option.lower() == "reset":
+            profiler.reset()
+            player.message("&aPlugin profile reset.")
+            return
+        plugin = None
+        top = get_int(option)
+        if option and not top:
+            plugin = option
+        rows = profiler.report(top=top or 10, plugin=plugin)
+        player.message("&6Plugin profile (%s) since %s, %d slow calls:" % (
+            "on" if profiler.enabled else "off",
+            time.strftime("%H:%M:%S", time.localtime(profiler.since)),
+            profiler.slow_calls))
+        if not rows:
+            player.message("&7Nothing timed yet.")
+        for row in rows:
+            player.message(
+                "&e%s&r %s '%s': %d calls, %.1f ms (%.1f ms CPU), "
+                "p50 %.2f / p95 %.2f / p99 %.2f / max %.2f ms" % (
+                    row["plugin"], row["kind"], row["name"], row["calls"],
+                    row["wall"], row["cpu"], row["p50"], row["p95"],
+                    row["p99"], row["max"]))
+
+    def _wrapper_tps(self, player, payload):
+        """ /wrapper tps [<seconds>] - server tick rate and latency """
+        seconds = get_int(getargs(payload["args"], 1)) or 60
+        report = self.wrapper.servervitals.ticks.report(seconds)
+        player.message("&6Server vitals of the last %d seconds:" % seconds)
+        ticks = report["tick_ms"]
+        if report["tps"] is None:
+            player.message("&7TPS: not known (no time updates through the "
+                           "proxy).")
+        else:
+            player.message(
+                "&eTPS&r: %.1f (lowest %.1f); ms per tick p50 %.1f / p95 "
+                "%.1f / p99 %.1f / max %.1f" % (
+                    report["tps"], report["tps_min"], ticks["p50"],
+                    ticks["p95"], ticks["p99"], ticks["max"]))
+        ping = report["ping_ms"]
+        if ping["samples"]:
+            player.message(
+                "&ePing&r: p50 %.0f / p95 %.0f / max %.0f ms (%d keep "
+                "alives)" % (ping["p50"], ping["p95"], ping["max"],
+                             ping["samples"]))
+        player.message("&eLag&r: %d \"Can't keep up!\" (%.0f ms behind)" % (
+            report["lag"]["count"], report["lag"]["behind"]))
+
     def command_reload(self, player, payload):
         if not player.isOp() > 3:
             player.message("&cPermission Denied")
@@ -1180,7 +1337,7 @@ class Commands(object):
             player.message("&cAlias commands: /perms, /perm, /super")
         return False
 
-    def command_plugins(self, player):
+    def command_plugins(self, player, payload=None):
         # CONSOLE should use the pretty version designed for console.
         if not player.isOp() > 3:
             player.message("&cPermission Denied")
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Sorting out the lines the server prints, for `MCServer.readconsole()`.
+
+Every text readconsole() looks for anywhere in a line (MARKERS and the
+console spam filters) is compiled into one regular expression, so a
+line is searched once, not once per text.  Most lines (chunk
+generation, mod loading) contain none of them, and are ruled out by
+that one search; only the others are checked for each text.  The kind
+of a line (KINDS) then comes from the markers found and the first words
+of the line, each looked at once.
+"""
+
+import re
+
+# line kinds, in the order they are tried
+DONE = "done"
+LEVEL = "level"
+CHAT = "chat"
+LOGIN = "login"
+LOGOUT = "logout"
+ACTION = "action"
+ACHIEVEMENT = "achievement"
+SAY = "say"
+DEATH = "death"
+LAG = "lag"
+TELEPORT = "teleport"
+TELEPORTED = "teleported"
+KINDS = (DONE, LEVEL, CHAT, LOGIN, LOGOUT, ACTION, ACHIEVEMENT, SAY, DEATH,
+         LAG, TELEPORT, TELEPORTED)
+
+# markers that change or note something, whatever the kind of line
+VERSION = "version"
+OP_USAGE = "op_usage"
+WHITELIST_USAGE = "whitelist_usage"
+AUTH_WARNING = "auth_warning"
+SERVER_PORT = "server_port"
+# found for a line with a spammy_stuff text in it
+SPAM = "spam"
+
+# (marker, text looked for anywhere in a line)
+MARKERS = (
+    (VERSION, "Starting minecraft server version"),
+    (OP_USAGE, "/op <player>"),
+    (WHITELIST_USAGE, "/whitelist <on|off"),
+    (AUTH_WARNING, "While this makes the game possible to play"),
+    (SERVER_PORT, "Starting Minecraft server on"),
+    (DONE, "Done ("),
+    (LEVEL, "Preparing level"),
+    (LOGOUT, "lost connection"),
+    (ACHIEVEMENT, "has just earned the achievement"),
+    (LAG, "Can't keep up!"),
+)
+
+_NOTHING = frozenset()
+
+
+class ConsoleMatcher(object):
+    """
+    :param deathprefixes: the second words of death messages.
+    """
+    def __init__(self, deathprefixes):
+        self.deathprefixes = frozenset(deathprefixes)
+        # the spam filters compiled in
+        self._spam = None
+        # finds whether a line has any marker in it.  (No groups: they
+        #  would make the search several times slower.)
+        self._any = None
+        # (marker, text), spam filters included
+        self._markers = ()
+
+    def markers(self, line, spam):
+        """
+        :param line: the console line.
+        :param spam: the spam filters (ServerVitals.spammy_stuff).
+        :returns: the markers in `line`; SPAM if a spam filter is.
+        """
+        if spam != self._spam:
+            self._compile(spam)
+        if not self._any.search(line):
+            return _NOTHING
+        return set(marker for marker, text in self._markers if text in line)
+
+    def kind(self, words, found):
+        """
+        :param words: the words of the line (less the prepends).
+        :param found: the line's markers().
+        :returns: the kind of line (one of KINDS), or None.
+        """
+        first = words[0]
+        second = words[1] if len(words) > 1 else ""
+        if found:
+            if DONE in found:
+                return DONE
+            if LEVEL in found:
+                return LEVEL
+        if first[0] == "<":
+            return CHAT
+        if second == "logged":
+            return LOGIN
+        if LOGOUT in found:
+            return LOGOUT
+        if first == "*":
+            return ACTION
+        if ACHIEVEMENT in found:
+            return ACHIEVEMENT
+        if first[0] == "[" and first[-1] == "]":
+            return SAY
+        if second in self.deathprefixes:
+            return DEATH
+        if LAG in found:
+            return LAG
+        if second == "Teleported" and len(words) > 3 and words[3] == "to":
+            return TELEPORT
+        if first == "Teleported" and len(words) > 2 and words[2] == "to":
+            return TELEPORTED
+        return None
+
+    def _compile(self, spam):
+        self._spam = list(spam)
+        self._markers = tuple(MARKERS) + tuple((SPAM, text)
+                                               for text in self._spam)
+        self._any = re.compile("|".join(re.escape(text)
+                                        for _, text in self._markers))
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Reading the server's console output (stdout and stderr).
+
+One thread reads both pipes of the server process, READ_SIZE bytes at a
+time, as soon as the selector says there is something to read.  Each
+read is split into lines in one go and queued as a batch; wrapper takes
+all the queued lines at once (`get()`) to parse and print them.
+
+The reader never waits for wrapper: if more than `max_lines` lines are
+queued (a log storm wrapper cannot keep up with), lines are dropped by
+the overflow policy and counted, so the server is never held up
+writing its output.
+
+Without `selectors` (Python 2) or on Windows (where pipes cannot be
+selected), each pipe gets a thread of its own that makes the same large
+reads.
+"""
+
+import errno
+import locale
+import os
+import threading
+from collections import deque
+
+from utils.py23 import PY3
+
+try:
+    import selectors
+except ImportError:
+    selectors = False
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = False
+
+# bytes asked for by each read
+READ_SIZE = 65536
+# a "line" this long (bytes) with no end is queued anyway
+MAX_LINE = 1024 * 1024
+
+# overflow policies
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+
+
+class _Pipe(object):
+    """ A pipe being read, and the end of its last line so far. """
+    def __init__(self, pipe):
+        self.fd = pipe.fileno()
+        self.rest = b""
+
+
+class ConsoleReader(object):
+    """
+    :param log: logger.
+    :param max_lines: most lines queued; beyond that, lines are dropped.
+    :param overflow: DROP_OLDEST or DROP_NEWEST.
+    :param encoding: of the server's output; by default, that of the
+     system (as when the pipes were read as text).
+    """
+    def __init__(self, log, max_lines=50000, overflow=DROP_OLDEST,
+                 encoding=None):
+        self.log = log
+        self.max_lines = max_lines
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            self.log.warning("Unknown console-overflow '%s'; using '%s'",
+                             overflow, DROP_OLDEST)
+            overflow = DROP_OLDEST
+        self.overflow = overflow
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        # batches (lists) of lines, oldest first
+        self.batches = deque()
+        self.queued = 0
+        self._ready = threading.Condition()
+        # readers of the current server process still running
+        self.readers = 0
+
+        # counters
+        self.reads = 0
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.lines_dropped = 0
+        self.most_queued = 0
+        # lines dropped since the last warning about it
+        self._dropping = 0
+
+    def attach(self, *pipes):
+        """ Start reading `pipes` (those of a new server process). """
+        pipes = [_Pipe(pipe) for pipe in pipes]
+        if selectors and fcntl:
+            threads = [(self._select, pipes)]
+        else:
+            threads = [(self._read, [pipe]) for pipe in pipes]
+        with self._ready:
+            self.readers += len(threads)
+        for target, args in threads:
+            t = threading.Thread(target=target, name="console_reader",
+                                 args=(args,))
+            t.daemon = True
+            t.start()
+
+    def get(self, timeout):
+        """
+        :param timeout: seconds to wait for lines, if none are queued.
+        :returns: a list of all the lines queued (maybe empty).
+        """
+        with self._ready:
+            if not self.batches:
+                self._ready.wait(timeout)
+            batches = self.batches
+            self.batches = deque()
+            self.queued = 0
+            dropped = self._dropping
+            self._dropping = 0
+        if dropped:
+            self.log.warning("Wrapper fell behind the server console and"
+                             " dropped %d lines (%d in all)", dropped,
+                             self.lines_dropped)
+        if len(batches) == 1:
+            return batches[0]
+        lines = []
+        for batch in batches:
+            lines.extend(batch)
+        return lines
+
+    def stats(self):
+        """ :returns: the counters, as a dict. """
+        with self._ready:
+            return {"reads": self.reads,
+                    "bytes": self.bytes_read,
+                    "lines": self.lines_read,
+                    "dropped": self.lines_dropped,
+                    "queued": self.queued,
+                    "most-queued": self.most_queued}
+
+    def _select(self, pipes):
+        selector = selectors.DefaultSelector()
+        for pipe in pipes:
+            flags = fcntl.fcntl(pipe.fd, fcntl.F_GETFL)
+            fcntl.fcntl(pipe.fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+            selector.register(pipe.fd, selectors.EVENT_READ, pipe)
+        try:
+            while selector.get_map():
+                for key, _ in selector.select():
+                    pipe = key.data
+                    try:
+                        data = os.read(pipe.fd, READ_SIZE)
+                    except (IOError, OSError) as e:
+                        if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                            # nothing to read after all
+                            continue
+                        data = b""
+                    if data:
+                        self._feed(pipe, data)
+                    else:
+                        selector.unregister(pipe.fd)
+                        self._feed(pipe, b"", end=True)
+        finally:
+            selector.close()
+            self._done()
+
+    def _read(self, pipes):
+        pipe = pipes[0]
+        try:
+            while True:
+                try:
+                    data = os.read(pipe.fd, READ_SIZE)
+                except (IOError, OSError):
+                    data = b""
+                if not data:
+                    self._feed(pipe, b"", end=True)
+                    return
+                self._feed(pipe, data)
+        finally:
+            self._done()
+
+    def _done(self):
+        with self._ready:
+            self.readers -= 1
+            self._ready.notify_all()
+
+    def _feed(self, pipe, data, end=False):
+        """ Queue the lines `data` (read from `pipe`) completes. """
+        size = len(data)
+        data = pipe.rest + data
+        cut = len(data) if end else data.rfind(b"\n")
+        if cut < 0:
+            if len(data) < MAX_LINE:
+                pipe.rest = data
+                self._queue([], size)
+                return
+            cut = len(data)
+        pipe.rest = data[cut + 1:]
+        text = data[:cut]
+        if PY3:
+            text = text.decode(self.encoding, "replace")
+        lines = [line for line in text.replace("\r", "").split("\n") if line]
+        self._queue(lines, size)
+
+    def _queue(self, lines, size):
+        with self._ready:
+            self.reads += 1
+            self.bytes_read += size
+            self.lines_read += len(lines)
+            if not lines:
+                return
+            self.batches.append(lines)
+            self.queued += len(lines)
+            if self.queued > self.max_lines:
+                self._drop(self.queued - self.max_lines)
+            self.most_queued = max(self.most_queued, self.queued)
+            self._ready.notify()
+
+    def _drop(self, excess):
+        """ Drop `excess` queued lines, by the overflow policy. """
+        self.queued -= excess
+        self.lines_dropped += excess
+        self._dropping += excess
+        while excess:
+            if self.overflow == DROP_OLDEST:
+                batch = self.batches[0]
+                if len(batch) <= excess:
+                    self.batches.popleft()
+                    excess -= len(batch)
+                else:
+                    del batch[:excess]
+                    excess = 0
+            else:
+                batch = self.batches[-1]
+                if len(batch) <= excess:
+                    self.batches.pop()
+                    excess -= len(batch)
+                else:
+                    del batch[len(batch) - excess:]
+                    excess = 0
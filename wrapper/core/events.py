@@ -7,24 +7,62 @@
 
 from collections import deque
 import threading
-import time
 
 from api.player import Player
+from core.profiler import EVENT
+from core.scheduler import Scheduler
+
+# calls of one key (event) a worker takes at a time
+BATCH = 16
 
 
 class Events(object):
+    """
+    Calls plugin events.
+
+    `self.events` holds each plugin's events ({plugin_id: {event:
+    callback}}) and `self.index` the same callbacks by event ({event:
+    ((plugin_id, callback), ...)}, in plugin load order), so calling an
+    event only visits the plugins that registered it.  The index is
+    rebuilt whenever a plugin registers an event, is loaded or unloaded.
+
+    Events that are not abortable are queued and called by a pool of
+    `workers` threads.  Each event type is called by one worker at a
+    time, in the order they were queued; a plugin that is slow to handle
+    one event type only holds up that type.  The workers also call the
+    tasks of `self.scheduler` (see core/scheduler.py).
+    """
 
     def __init__(self, wrapper):
         self.wrapper = wrapper
         self.log = wrapper.log
         self.listeners = []
         self.events = {}
-
-        self.event_queue = deque([])
-        t = threading.Thread(target=self._event_processor,
-                             name="event_processor", args=())
-        t.daemon = True
-        t.start()
+        self.index = {}
+        self.profiler = wrapper.profiler
+        self._index_lock = threading.Lock()
+
+        # key (event name): deque of (function, args) calls waiting (or
+        #  being called)
+        self.pending = {}
+        # keys with calls waiting and no worker calling them yet
+        self.ready = deque()
+        self._queued = threading.Condition()
+        self.abort = False
+
+        try:
+            self.workers = int(
+                wrapper.config["General"].get("event-workers", 4)) or 1
+        except (AttributeError, KeyError, TypeError, ValueError):
+            self.workers = 4
+        for number in range(self.workers):
+            t = threading.Thread(target=self._event_processor,
+                                 name="event_processor-%d" % number, args=())
+            t.daemon = True
+            t.start()
+
+        self.scheduler = Scheduler(self.log, self.run_queued, self.profiler)
+        self.scheduler.start()
 
     def __getitem__(self, index):
         if not type(index) == str:
@@ -35,17 +73,56 @@ class Events(object):
         if not type(index) == str:
             raise Exception("A string must be passed - got %s" % type(index))
         self.events[index] = value
+        self._reindex()
         return self.events[index]
 
     def __delitem__(self, index):
         if not type(index) == str:
             raise Exception("A string must be passed - got %s" % type(index))
         del self.events[index]
+        self._reindex()
 
     def __iter__(self):
         for i in self.events:
             yield i
 
+    def register(self, plugin_id, event, callback):
+        """ Call `callback` (of plugin `plugin_id`) for `event`. """
+        if plugin_id not in self.events:
+            self.events[plugin_id] = {}
+        self.events[plugin_id][event] = callback
+        self._reindex(event)
+
+    def _reindex(self, event=None):
+        """ Rebuild the index of `event` (or of every event). """
+        with self._index_lock:
+            if event is None:
+                events = set()
+                for plugin_events in list(self.events.values()):
+                    events.update(plugin_events)
+                index = {}
+            else:
+                events = (event,)
+                index = dict(self.index)
+            for name in events:
+                callbacks = tuple(
+                    (plugin_id, self.events[plugin_id][name])
+                    for plugin_id in list(self.events)
+                    if name in self.events[plugin_id])
+                if callbacks:
+                    index[name] = callbacks
+                else:
+                    index.pop(name, None)
+            # replaced, never changed, so _callevent() needs no lock.
+            self.index = index
+
+    def stop(self):
+        """ Stop the workers, once they have called what is queued. """
+        self.scheduler.stop()
+        with self._queued:
+            self.abort = True
+            self._queued.notify_all()
+
     def callevent(self, event, payload, abortable=True):
         """
         This needs some standardization
@@ -69,15 +146,48 @@ class Events(object):
         if abortable:
             return self._callevent(event, payload)
         else:
-            self.event_queue.append((event, payload, False))
+            self.run_queued(event, self._callevent, (event, payload, False))
             return
 
+    def run_queued(self, key, function, args=()):
+        """
+        Have a worker call `function(*args)`, after every call queued
+        before it with the same `key`.
+        """
+        with self._queued:
+            calls = self.pending.get(key)
+            if calls is None:
+                self.pending[key] = deque([(function, args)])
+                self.ready.append(key)
+                self._queued.notify()
+            else:
+                # a worker has (or will) pick it up, in order.
+                calls.append((function, args))
+
     def _event_processor(self):
-        while not self.wrapper.haltsig.halt:
-            while len(self.event_queue) > 0:
-                _event, _payload, _abortable = self.event_queue.popleft()
-                self._callevent(_event, _payload, _abortable)
-            time.sleep(0.01)
+        while True:
+            with self._queued:
+                while not self.ready:
+                    if self.abort:
+                        return
+                    self._queued.wait()
+                key = self.ready.popleft()
+                calls = self.pending[key]
+                batch = [calls.popleft()
+                         for _ in range(min(len(calls), BATCH))]
+            for function, args in batch:
+                try:
+                    function(*args)
+                except Exception as e:
+                    self.log.exception("Error calling '%s':\n%s", key, e)
+            with self._queued:
+                if calls:
+                    # next in line for this key, after the other keys
+                    #  that are waiting.
+                    self.ready.append(key)
+                    self._queued.notify()
+                else:
+                    del self.pending[key]
 
     def _callevent(self, event, payload, abortable=True):
         if event == "player.runCommand":
@@ -104,68 +214,69 @@ class Events(object):
         payload_status = None
         # old_payload = payload  # retaining the original payload might be helpful for the future features.  # noqa
 
+        profiler = self.profiler
         # in all plugins with this event listed..
-        for plugin_id in self.events:
-
-            # for each plugin...
-            if event in self.events[plugin_id]:
-
-                # run the plugin code and get the plugin's return value
-                result = None
-                try:
-                    # 'self.events[plugin_id][event]' is the
-                    # <bound method Main.plugin_event_function>
-                    # pass 'payload' as the argument for the plugin-defined
-                    # event code function
-                    result = self.events[plugin_id][event](payload)
-                except Exception as e:
-                    self.log.exception(
-                        "Plugin '%s' \n"
-                        "experienced an exception calling '%s': \n%s",
-                        plugin_id, event, e
-                    )
-
-                # If the plugin is not abortable, no need exists to deal with
-                # the payload in any special manner
-                if not abortable:
-                    payload_status = True
-                    continue
-
-                # Evaluate this plugin's result
-                # Every plugin will be given equal time to run it's event code.
-                # However, if one plugin returns a False, no payload changes
-                #  will be possible.
-                #
-                if result is False or payload_status is False:
-                    # mark this event permanently as False
-                    payload_status = False
-
+        for plugin_id, callback in self.index.get(event, ()):
+
+            # run the plugin code and get the plugin's return value
+            result = None
+            started = profiler.start()
+            try:
+                # 'callback' is the
+                # <bound method Main.plugin_event_function>
+                # pass 'payload' as the argument for the plugin-defined
+                # event code function
+                result = callback(payload)
+            except Exception as e:
+                self.log.exception(
+                    "Plugin '%s' \n"
+                    "experienced an exception calling '%s': \n%s",
+                    plugin_id, event, e
+                )
+            if started:
+                profiler.finish(started, EVENT, plugin_id, event, payload)
+
+            # If the plugin is not abortable, no need exists to deal with
+            # the payload in any special manner
+            if not abortable:
+                payload_status = True
+                continue
+
+            # Evaluate this plugin's result
+            # Every plugin will be given equal time to run it's event code.
+            # However, if one plugin returns a False, no payload changes
+            #  will be possible.
+            #
+            if result is False or payload_status is False:
+                # mark this event permanently as False
+                payload_status = False
+
+            else:
+                # A payload is being returned
+                # If any plugin rejects the event, no payload changes
+                #  will be authorized.
+
+                # once the payload is modded, payload status must stay True
+                if result in (None, True) and payload_status is not True:
+                    payload_status = None
+                # the next plugin looking at this event sees the
+                #  new payload.
                 else:
-                    # A payload is being returned
-                    # If any plugin rejects the event, no payload changes
-                    #  will be authorized.
-
-                    # once the payload is modded, payload status must stay True
-                    if result in (None, True) and payload_status is not True:
-                        payload_status = None
-                    # the next plugin looking at this event sees the
-                    #  new payload.
+                    if type(result) == dict:
+                        payload = result
+                        payload_status = True
                     else:
-                        if type(result) == dict:
-                            payload = result
-                            payload_status = True
-                        else:
-                            # non dictionary payloads are deprecated and will
-                            # be overridden by dict payloads
-                            # Dict payloads are those that return the
-                            # payload in the same format as it was passed.
-                            self.log.warning("Non-Dict payload %s %s %s",
-                                             payload_status,
-                                             result,
-                                             type(result)
-                                             )
-                            payload = result
-                            payload_status = True
+                        # non dictionary payloads are deprecated and will
+                        # be overridden by dict payloads
+                        # Dict payloads are those that return the
+                        # payload in the same format as it was passed.
+                        self.log.warning("Non-Dict payload %s %s %s",
+                                         payload_status,
+                                         result,
+                                         type(result)
+                                         )
+                        payload = result
+                        payload_status = True
 
         # payload changed
         if payload_status is True:
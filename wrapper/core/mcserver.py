@@ -14,6 +14,12 @@ from api.helpers import getjsonfile, getfileaslines, config_to_dict_read
 from api.base import API
 from api.world import World
 from api.player import Player
+from core import consolelines
+from core.consolereader import ConsoleReader
+from core.procsampler import ProcessSampler
+from core.worldsize import WorldSize, REFRESH_INTERVAL
+from core.consolelines import ConsoleMatcher, VERSION, OP_USAGE
+from core.consolelines import WHITELIST_USAGE, AUTH_WARNING, SERVER_PORT, SPAM
 
 import time
 import threading
@@ -24,7 +30,6 @@ import ctypes
 import platform
 import base64
 import copy
-import psutil
 
 try:
     import resource
@@ -79,8 +84,16 @@ class MCServer(object):
         # whether a stopped server tries rebooting
         self.server_autorestart = self.config["General"]["auto-restart"]
         self.proc = None
-        self.lastsizepoll = 0
-        self.console_output_data = []
+        # sizes of the world folder (a WorldSize, once there is a world)
+        self.worldsize = None
+        # the thread of its first scan, while it runs
+        self._worldsize_scan = None
+        # reads the server's console output (started by init())
+        self.console_reader = None
+        # the server process's resource use (sampled once init() ran)
+        self.sampler = ProcessSampler(
+            self.log, self.config["General"]["resource-sample-seconds"] or 1,
+            self.config["General"]["resource-history-days"])
 
         self.server_muted = False
         self.queued_lines = []
@@ -89,6 +102,22 @@ class MCServer(object):
                               "went", "burned", "hit", "tried", "died", "got",
                               "starved", "suffocated", "withered", "shot",
                               "slain"]
+        self.console_matcher = ConsoleMatcher(self.deathprefixes)
+        # what readconsole() does with each kind of line
+        self.console_handlers = {
+            consolelines.DONE: self._console_done,
+            consolelines.LEVEL: self._console_level,
+            consolelines.CHAT: self._console_chat,
+            consolelines.LOGIN: self._console_login,
+            consolelines.LOGOUT: self._console_logout,
+            consolelines.ACTION: self._console_action,
+            consolelines.ACHIEVEMENT: self._console_achievement,
+            consolelines.SAY: self._console_say,
+            consolelines.DEATH: self._console_death,
+            consolelines.LAG: self._console_lag,
+            consolelines.TELEPORT: self._console_teleport,
+            consolelines.TELEPORTED: self._console_teleported,
+        }
 
         if not self.wrapper.storage["ServerStarted"]:
             self.log.warning(
@@ -115,27 +144,26 @@ class MCServer(object):
             rb.daemon = True
             rb.start()
 
-        if self.config["Web"]["web-enabled"]:
-            wb = threading.Thread(target=self.eachsecond_web, args=())
-            wb.daemon = True
-            wb.start()
-
         # This event is used to allow proxy to make console commands via
         # callevent() without referencing mcserver.py code (the eventhandler
         # is passed as an argument to the proxy).
         self.api.registerEvent("proxy.console", self._console_event)
 
     def init(self):
-        """ Start up the listen threads for reading server console
-        output.
+        """ Set up the reading of server console output (each server
+        process's pipes are read by threads of their own).
         """
-        capturethread = threading.Thread(target=self.__stdout__, args=())
-        capturethread.daemon = True
-        capturethread.start()
-
-        capturethread = threading.Thread(target=self.__stderr__, args=())
-        capturethread.daemon = True
-        capturethread.start()
+        self.console_reader = ConsoleReader(
+            self.log, max_lines=self.config["General"]["console-queue-lines"],
+            overflow=self.config["General"]["console-overflow"])
+        interval = self.config["General"]["resource-sample-seconds"]
+        if interval:
+            self.wrapper.events.scheduler.schedule(
+                interval, self._sample_resources, interval=interval,
+                owner="Wrapper.py")
+        self.wrapper.events.scheduler.schedule(
+            REFRESH_INTERVAL, self.track_worldsize, interval=REFRESH_INTERVAL,
+            owner="Wrapper.py")
 
     def __del__(self):
         self.vitals.state = 0
@@ -179,12 +207,14 @@ class MCServer(object):
             self.changestate(STARTING)
             self.log.info("Starting server...")
             self.reloadproperties()
+            self.vitals.ticks.reset()
 
             command = self.args
             self.proc = subprocess.Popen(
                 command, cwd=self.vitals.serverpath, stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE, stdin=subprocess.PIPE,
                 universal_newlines=True)
+            self.console_reader.attach(self.proc.stdout, self.proc.stderr)
             self.wrapper.players = {}
             self.accepteula()  # Auto accept eula
 
@@ -202,8 +232,10 @@ class MCServer(object):
             # The server loop
             while True:
                 # Loop runs continously as long as server console is running
-                time.sleep(0.1)
-                if self.proc.poll() is not None:
+                lines = self.console_reader.get(0.1)
+                if not lines and self.proc.poll() is not None and (
+                        not self.console_reader.readers):
+                    # (its last lines are read by now)
                     self.changestate(OFF)
                     trystart = 0
                     self.boot_server = self.server_autorestart
@@ -212,12 +244,11 @@ class MCServer(object):
                     break
 
                 # is is only reading server console output
-                for line in self.console_output_data:
+                for line in lines:
                     try:
-                        self.readconsole(line.replace("\r", ""))
+                        self.readconsole(line)
                     except Exception as e:
                         self.log.exception(e)
-                self.console_output_data = []
 
         # code ends here on wrapper.haltsig.halt and execution returns to
         # the end of wrapper.start()
@@ -397,6 +428,7 @@ class MCServer(object):
 
         if username not in self.vitals.players:
             self.vitals.players[username] = Player(username, self.wrapper)
+            self.vitals.status_generation += 1
         # store EID if proxy is not fully connected yet (or is not enabled).
         self.vitals.players[username].playereid = servereid
         self.vitals.players[username].loginposition = position
@@ -470,11 +502,12 @@ class MCServer(object):
             """  # noqa
 
             if player.client is None:
-                player.abort = True
+                player._logout()
                 del self.vitals.players[players_name]
             elif player.client.state != LOBBY and player.client.local:
-                player.abort = True
+                player._logout()
                 del self.vitals.players[players_name]
+            self.vitals.status_generation += 1
 
             if self.wrapper.proxy:
                 self.wrapper.proxy.removestaleclients()
@@ -509,6 +542,7 @@ class MCServer(object):
                 theicon = f.read()
                 iconencoded = base64.standard_b64encode(theicon)
                 self.vitals.serverIcon = b"data:image/png;base64," + iconencoded
+                self.vitals.status_generation += 1
 
         self.vitals.properties = config_to_dict_read(
             "server.properties", self.vitals.serverpath)
@@ -524,6 +558,7 @@ class MCServer(object):
                              " found in the server.properties.")
             return False
         self.vitals.motd = self.vitals.properties["motd"]
+        self.vitals.status_generation += 1
         if "max-players" in self.vitals.properties:
             self.vitals.maxPlayers = self.vitals.properties["max-players"]
         else:
@@ -623,37 +658,6 @@ class MCServer(object):
 
         self.stop_server_command()
 
-    def __stdout__(self):
-        """handles server output, not lines typed in console."""
-        while not self.wrapper.haltsig.halt:
-            # noinspection PyBroadException,PyUnusedLocal
-
-            # this reads the line and puts the line in the
-            # 'self.data' buffer for processing by
-            # readconsole() (inside handle_server)
-            try:
-                data = self.proc.stdout.readline()
-                for line in data.split("\n"):
-                    if len(line) < 1:
-                        continue
-                    self.console_output_data.append(line)
-            except Exception as e:
-                time.sleep(0.1)
-                continue
-
-    def __stderr__(self):
-        """like __stdout__, handles server output (not lines
-        typed in console)."""
-        while not self.wrapper.haltsig.halt:
-            try:
-                data = self.proc.stderr.readline()
-                if len(data) > 0:
-                    for line in data.split("\n"):
-                        self.console_output_data.append(line.replace("\r", ""))
-            except Exception as e:
-                time.sleep(0.1)
-                continue
-
     def read_ops_file(self, read_super_ops=True):
         """Keep a list of ops in the server instance to stop
         reading the disk for it.
@@ -698,33 +702,20 @@ class MCServer(object):
         self.vitals.operator_list = self.read_ops_file(read_super_ops)
 
     def getmemoryusage(self):
-        """Returns allocated memory in bytes. This command
-        currently only works for *NIX based systems.
+        """Returns allocated memory in bytes (the last sample's, if it
+        is recent).
         """
-        # if not resource or not os.name == "posix":
-        #     raise OSError(
-        #         "Your current OS (%s) does not support"
-        #         " this command at this time." % os.name)
-        # if self.proc is None:
-        #     self.log.debug("There is no running server to getmemoryusage().")
-        #     return 0
-        # try:
-        #     with open("/proc/%d/statm" % self.proc.pid) as f:
-        #         getbytes = int(f.read().split(" ")[1]) * resource.getpagesize()
-        #     return getbytes
-        # except Exception as e:
-        #     raise e
-
         if self.proc is None:
             self.log.debug("There is no running server to get memeory usage from.")
             return 0
-        try:
-            process = psutil.Process(self.proc.pid)
-            memory = process.memory_info()[0]
-            return memory
-        except Exception as e:
-            raise e
+        return self.sampler.rss(self.proc.pid)
 
+    def _sample_resources(self):
+        proc = self.proc
+        if proc is None or proc.poll() is not None:
+            self.sampler.sample(None)
+        else:
+            self.sampler.sample(proc.pid)
 
     @staticmethod
     def getstorageavailable(folder):
@@ -767,15 +758,19 @@ class MCServer(object):
 
         if len(buff) < 1:
             return
+        # everything looked for anywhere in the line, in one search
+        found = self.console_matcher.markers(buff, self.vitals.spammy_stuff)
         # Standardize the line to only include the text (removing
-        # time and log pre-pends)
-        line_words = buff.split(' ')[self.prepends_offset:]
+        # time and log pre-pends).  The first words are enough to sort
+        # the line out; it is only split whole for a handler.
+        line_words = buff.split(
+            ' ', self.prepends_offset + 4)[self.prepends_offset:]
 
         # find the actual offset is where server output line
         # starts (minus date/time and info stamps).
         # .. and load the proper ops file
-        if "Starting minecraft server version" in buff and \
-                self.prepends_offset == 0:
+        if VERSION in found and self.prepends_offset == 0:
+            line_words = buff.split(' ')
             for place in range(len(line_words)-1):
                 self.prepends_offset = place
                 if line_words[place] == "Starting":
@@ -820,16 +815,16 @@ class MCServer(object):
         #
 
         # Over-ride OP help console display
-        if "/op <player>" in buff:
+        if OP_USAGE in found:
             new_usage = "player> [-s SUPER-OP] [-o OFFLINE] [-l <level>]"
             message = buff.replace("player>", new_usage)
             buff = message
-        if "/whitelist <on|off" in buff:
+        if WHITELIST_USAGE in found:
             new_usage = "/whitelist <on|off|list|add|remvove|reload|offline|online>"  # noqa
             message = new_usage
             buff = message
 
-        if "While this makes the game possible to play" in buff:
+        if AUTH_WARNING in found:
             prefix = " ".join(buff.split(' ')[:self.prepends_offset])
 
             if not self.wrapper.wrapper_onlinemode:
@@ -854,212 +849,221 @@ class MCServer(object):
                 buff = message
 
         # read port of server and display proxy port, if applicable
-        if "Starting Minecraft server on" in buff:
+        if SERVER_PORT in found:
             self.vitals.server_port = get_int(buff.split(':')[-1:][0])
 
-        # check for server console spam before printing to wrapper console
-        server_spaming = False
-        for things in self.vitals.spammy_stuff:
-            if things in buff:
-                server_spaming = True
-
-        # server_spaming setting does not stop it from being parsed below.
-        if not server_spaming:
+        # server console spam is not printed to the wrapper console, but
+        #  is still parsed below.
+        if SPAM not in found:
             if not self.server_muted:
                 self.wrapper.write_stdout(buff, "server")
             else:
                 self.queued_lines.append(buff)
 
-        first_word = getargs(line_words, 0)
-        second_word = getargs(line_words, 1)
-        # be careful about how these elif's are handled!
-        # confirm server start
-        if "Done (" in buff:
-            self._toggle_server_started()
-            self.changestate(STARTED)
-            self.log.info("Server started")
-            if self.wrapper.proxymode:
-                self.log.info("Proxy listening on *:%s", self.wrapper.proxy.proxy_port)  # noqa
-
-        # Getting world name
-        elif "Preparing level" in buff:
-            self.vitals.worldname = getargs(line_words, 2).replace('"', "")
-            self.world = World(self.vitals.worldname, self)
-
-        # Player Message
-        elif first_word[0] == "<":
-            # get a name out of <name>
-            name = self.stripspecial(first_word[1:-1])
-            message = self.stripspecial(getargsafter(line_words, 1))
-            original = getargsafter(line_words, 0)
-            playerobj = self.getplayer(name)
-            if playerobj:
-                self.wrapper.events.callevent("player.message", {
-                    "player": self.getplayer(name),
-                    "message": message,
-                    "original": original
-                }, abortable=False)
-                """ eventdoc
-                    <group> core/mcserver.py <group>
-    
-                    <description> Player chat scrubbed from the console.
-                    <description>
-    
-                    <abortable> No
-                    <abortable>
-    
-                    <comments>
-                    This event is triggered by console chat which has already been sent. 
-                    This event returns the player object. if used in a string context, 
-                    ("%s") it's repr (self.__str__) is self.username (no need to do 
-                    str(player) or player.username in plugin code).
-                    <comments>
-    
-                    <payload>
-                    "player": playerobject (self.__str__ represents as player.username)
-                    "message": <str> type - what the player said in chat. ('hello everyone')
-                    "original": The original line of text from the console ('<mcplayer> hello everyone`)
-                    <payload>
-    
-                """  # noqa
-            else:
-                self.log.debug("Console has chat from '%s', but wrapper has no "
-                               "known logged-in player object by that name.", name)  # noqa
-        # Player Login
-        elif second_word == "logged":
-            user_desc = first_word.split("[/")
-            name = user_desc[0]
-            ip_addr = user_desc[1].split(":")[0]
-            eid = get_int(getargs(line_words, 6))
-            locationtext = getargs(buff.split(" ("), 1)[:-1].split(", ")
-            # spigot versus vanilla
-            # SPIGOT - [12:13:19 INFO]: *******[/] logged in with entity id 123 at ([world]316.86789318152546, 67.12426603789697, -191.9069627257038)  # noqa
-            # VANILLA - [23:24:34] [Server thread/INFO]: *******[/127.0.0.1:47434] logged in with entity id 149 at (46.29907483845001, 63.0, -270.1293488726086)  # noqa
-            if len(locationtext[0].split("]")) > 1:
-                x_c = get_int(float(locationtext[0].split("]")[1]))
-            else:
-                x_c = get_int(float(locationtext[0]))
-            y_c = get_int(float(locationtext[1]))
-            z_c = get_int(float(locationtext[2]))
-            location = x_c, y_c, z_c
-
-            self.login(name, eid, location, ip_addr)
-
-        # Player Logout
-        elif "lost connection" in buff:
-            name = first_word
-            self.logout(name)
-
-        # player action
-        elif first_word == "*":
-            name = self.stripspecial(second_word)
-            message = self.stripspecial(getargsafter(line_words, 2))
-            self.wrapper.events.callevent("player.action", {
-                "player": self.getplayer(name),
-                "action": message
-            }, abortable=False)
+        # be careful about the order of consolelines.KINDS!
+        kind = self.console_matcher.kind(line_words, found)
+        if kind is not None:
+            self.console_handlers[kind](
+                buff, buff.split(' ')[self.prepends_offset:])
 
-        # Player Achievement
-        elif "has just earned the achievement" in buff:
-            name = self.stripspecial(first_word)
-            achievement = getargsafter(line_words, 6)
-            self.wrapper.events.callevent("player.achievement", {
-                "player": name,
-                "achievement": achievement
-            }, abortable=False)
+    def _console_done(self, buff, line_words):
+        """Confirms the server start."""
+        self._toggle_server_started()
+        self.changestate(STARTED)
+        self.log.info("Server started")
+        if self.wrapper.proxymode:
+            self.log.info("Proxy listening on *:%s", self.wrapper.proxy.proxy_port)  # noqa
 
-        # /say command
-        elif getargs(
-                line_words, 0)[0] == "[" and first_word[-1] == "]":
-            if self.getservertype != "vanilla":
-                # Unfortunately, Spigot and Bukkit output things
-                # that conflict with this.
-                return
-            name = self.stripspecial(first_word[1:-1])
-            message = self.stripspecial(getargsafter(line_words, 1))
-            original = getargsafter(line_words, 0)
-            self.wrapper.events.callevent("server.say", {
-                "player": name,
+    def _console_level(self, buff, line_words):
+        """Gets the world name."""
+        self.vitals.worldname = getargs(line_words, 2).replace('"', "")
+        self.world = World(self.vitals.worldname, self)
+
+    def _console_chat(self, buff, line_words):
+        """Player message."""
+        first_word = getargs(line_words, 0)
+        # get a name out of <name>
+        name = self.stripspecial(first_word[1:-1])
+        message = self.stripspecial(getargsafter(line_words, 1))
+        original = getargsafter(line_words, 0)
+        playerobj = self.getplayer(name)
+        if playerobj:
+            self.wrapper.events.callevent("player.message", {
+                "player": self.getplayer(name),
                 "message": message,
                 "original": original
             }, abortable=False)
+            """ eventdoc
+                <group> core/mcserver.py <group>
 
-        # Player Death
-        elif second_word in self.deathprefixes:
-            name = self.stripspecial(first_word)
-            self.wrapper.events.callevent("player.death", {
-                "player": self.getplayer(name),
-                "death": getargsafter(line_words, 1)
-            }, abortable=False)
+                <description> Player chat scrubbed from the console.
+                <description>
 
-        # server lagged
-        elif "Can't keep up!" in buff:
-            skipping_ticks = getargs(line_words, 17)
-            self.wrapper.events.callevent("server.lagged", {
-                "ticks": get_int(skipping_ticks)
-            }, abortable=False)
+                <abortable> No
+                <abortable>
+
+                <comments>
+                This event is triggered by console chat which has already been sent. 
+                This event returns the player object. if used in a string context, 
+                ("%s") it's repr (self.__str__) is self.username (no need to do 
+                str(player) or player.username in plugin code).
+                <comments>
+
+                <payload>
+                "player": playerobject (self.__str__ represents as player.username)
+                "message": <str> type - what the player said in chat. ('hello everyone')
+                "original": The original line of text from the console ('<mcplayer> hello everyone`)
+                <payload>
+
+            """  # noqa
+        else:
+            self.log.debug("Console has chat from '%s', but wrapper has no "
+                           "known logged-in player object by that name.", name)  # noqa
+
+    def _console_login(self, buff, line_words):
+        """Player login."""
+        first_word = getargs(line_words, 0)
+        user_desc = first_word.split("[/")
+        name = user_desc[0]
+        ip_addr = user_desc[1].split(":")[0]
+        eid = get_int(getargs(line_words, 6))
+        locationtext = getargs(buff.split(" ("), 1)[:-1].split(", ")
+        # spigot versus vanilla
+        # SPIGOT - [12:13:19 INFO]: *******[/] logged in with entity id 123 at ([world]316.86789318152546, 67.12426603789697, -191.9069627257038)  # noqa
+        # VANILLA - [23:24:34] [Server thread/INFO]: *******[/127.0.0.1:47434] logged in with entity id 149 at (46.29907483845001, 63.0, -270.1293488726086)  # noqa
+        if len(locationtext[0].split("]")) > 1:
+            x_c = get_int(float(locationtext[0].split("]")[1]))
+        else:
+            x_c = get_int(float(locationtext[0]))
+        y_c = get_int(float(locationtext[1]))
+        z_c = get_int(float(locationtext[2]))
+        location = x_c, y_c, z_c
+
+        self.login(name, eid, location, ip_addr)
+
+    def _console_logout(self, buff, line_words):
+        """Player logout."""
+        name = getargs(line_words, 0)
+        self.logout(name)
+
+    def _console_action(self, buff, line_words):
+        """Player action."""
+        second_word = getargs(line_words, 1)
+        name = self.stripspecial(second_word)
+        message = self.stripspecial(getargsafter(line_words, 2))
+        self.wrapper.events.callevent("player.action", {
+            "player": self.getplayer(name),
+            "action": message
+        }, abortable=False)
+
+    def _console_achievement(self, buff, line_words):
+        """Player achievement."""
+        first_word = getargs(line_words, 0)
+        name = self.stripspecial(first_word)
+        achievement = getargsafter(line_words, 6)
+        self.wrapper.events.callevent("player.achievement", {
+            "player": name,
+            "achievement": achievement
+        }, abortable=False)
+
+    def _console_say(self, buff, line_words):
+        """/say command."""
+        first_word = getargs(line_words, 0)
+        if self.getservertype != "vanilla":
+            # Unfortunately, Spigot and Bukkit output things
+            # that conflict with this.
+            return
+        name = self.stripspecial(first_word[1:-1])
+        message = self.stripspecial(getargsafter(line_words, 1))
+        original = getargsafter(line_words, 0)
+        self.wrapper.events.callevent("server.say", {
+            "player": name,
+            "message": message,
+            "original": original
+        }, abortable=False)
+
+    def _console_death(self, buff, line_words):
+        """Player death."""
+        first_word = getargs(line_words, 0)
+        name = self.stripspecial(first_word)
+        self.wrapper.events.callevent("player.death", {
+            "player": self.getplayer(name),
+            "death": getargsafter(line_words, 1)
+        }, abortable=False)
+
+    def _console_lag(self, buff, line_words):
+        """Server lagged."""
+        self.vitals.ticks.console_lag(buff)
+        skipping_ticks = getargs(line_words, 17)
+        self.wrapper.events.callevent("server.lagged", {
+            "ticks": get_int(skipping_ticks)
+        }, abortable=False)
+
+    def _console_teleport(self, buff, line_words):
+        """Player teleport (by someone else)."""
+        playername = getargs(line_words, 2)
+        # [SurestTexas00: Teleported SapperLeader to 48.49417131908783, 77.67081086259394, -279.88880690937475]  # noqa
+        if playername in self.wrapper.servervitals.players:
+            playerobj = self.getplayer(playername)
+            playerobj._position = [
+                get_int(float(getargs(line_words, 4).split(",")[0])),
+                get_int(float(getargs(line_words, 5).split(",")[0])),
+                get_int(float(getargs(line_words, 6).split("]")[0])), 0, 0
+            ]
+            self.wrapper.events.callevent(
+                "player.teleport",
+                {"player": playerobj}, abortable=False)
+
+            """ eventdoc
+                <group> core/mcserver.py <group>
+
+                <description> When player teleports.
+                <description>
+
+                <abortable> No <abortable>
+
+                <comments> driven from console message "Teleported ___ to ....".
+                <comments>
+
+                <payload>
+                "player": player object
+                <payload>
+
+            """  # noqa
+
+    def _console_teleported(self, buff, line_words):
+        """Player teleport."""
+        second_word = getargs(line_words, 1)
+        playername = second_word
+        # Teleported SurestTexas00 to 48.49417131908783, 77.67081086259394, -279.88880690937475  # noqa
+        if playername in self.wrapper.servervitals.players:
+            playerobj = self.getplayer(playername)
+            playerobj._position = [
+                get_int(float(getargs(line_words, 3).split(",")[0])),
+                get_int(float(getargs(line_words, 4).split(",")[0])),
+                get_int(float(getargs(line_words, 5))), 0, 0
+            ]
+            self.wrapper.events.callevent(
+                "player.teleport",
+                {"player": playerobj}, abortable=False)
+
+            """ eventdoc
+                <group> core/mcserver.py <group>
+    
+                <description> When player teleports.
+                <description>
+    
+                <abortable> No <abortable>
+    
+                <comments> driven from console message "Teleported ___ to ....".
+                <comments>
+    
+                <payload>
+                "player": player object
+                <payload>
+    
+            """  # noqa
 
-        # player teleport
-        elif second_word == "Teleported" and getargs(line_words, 3) == "to":
-            playername = getargs(line_words, 2)
-            # [SurestTexas00: Teleported SapperLeader to 48.49417131908783, 77.67081086259394, -279.88880690937475]  # noqa
-            if playername in self.wrapper.servervitals.players:
-                playerobj = self.getplayer(playername)
-                playerobj._position = [
-                    get_int(float(getargs(line_words, 4).split(",")[0])),
-                    get_int(float(getargs(line_words, 5).split(",")[0])),
-                    get_int(float(getargs(line_words, 6).split("]")[0])), 0, 0
-                ]
-                self.wrapper.events.callevent(
-                    "player.teleport",
-                    {"player": playerobj}, abortable=False)
-
-                """ eventdoc
-                    <group> core/mcserver.py <group>
-
-                    <description> When player teleports.
-                    <description>
-
-                    <abortable> No <abortable>
-
-                    <comments> driven from console message "Teleported ___ to ....".
-                    <comments>
-
-                    <payload>
-                    "player": player object
-                    <payload>
-
-                """  # noqa
-        elif first_word == "Teleported" and getargs(line_words, 2) == "to":
-            playername = second_word
-            # Teleported SurestTexas00 to 48.49417131908783, 77.67081086259394, -279.88880690937475  # noqa
-            if playername in self.wrapper.servervitals.players:
-                playerobj = self.getplayer(playername)
-                playerobj._position = [
-                    get_int(float(getargs(line_words, 3).split(",")[0])),
-                    get_int(float(getargs(line_words, 4).split(",")[0])),
-                    get_int(float(getargs(line_words, 5))), 0, 0
-                ]
-                self.wrapper.events.callevent(
-                    "player.teleport",
-                    {"player": playerobj}, abortable=False)
-
-                """ eventdoc
-                    <group> core/mcserver.py <group>
-        
-                    <description> When player teleports.
-                    <description>
-        
-                    <abortable> No <abortable>
-        
-                    <comments> driven from console message "Teleported ___ to ....".
-                    <comments>
-        
-                    <payload>
-                    "player": player object
-                    <payload>
-        
-                """  # noqa
     # mcserver.py onsecond Event Handlers
     def reboot_timer(self):
         rb_mins = self.reboot_minutes
@@ -1107,19 +1111,35 @@ class MCServer(object):
                         "delayed..")
                     timer = rb_mins + rb_mins_warn + 1
 
-    def eachsecond_web(self):
-        if time.time() - self.lastsizepoll > 120:
-            if self.vitals.worldname is None:
-                return True
-            self.lastsizepoll = time.time()
-            size = 0
-            # os.scandir not in standard library on early py2.7.x systems
-            for i in os.walk(
-                    "%s/%s" % (self.vitals.serverpath, self.vitals.worldname)
-            ):
-                for f in os.listdir(i[0]):
-                    size += os.path.getsize(os.path.join(i[0], f))
-            self.vitals.worldsize = size
+    def track_worldsize(self):
+        """ Keep vitals.worldsize up to date (every REFRESH_INTERVAL).
+
+        The first scan of a world reads the whole folder, so it runs on
+        a thread of its own instead of holding up an event worker.
+        """
+        if self.vitals.worldname is None:
+            return
+        scan = self._worldsize_scan
+        if scan is not None and scan.is_alive():
+            return
+        root = "%s/%s" % (self.vitals.serverpath, self.vitals.worldname)
+        if self.worldsize is None or self.worldsize.root != root:
+            self.worldsize = WorldSize(self.log, root)
+        if self.worldsize.scanned:
+            self._refresh_worldsize(self.worldsize)
+            return
+        self._worldsize_scan = threading.Thread(
+            target=self._refresh_worldsize, name="worldsize_scan",
+            args=(self.worldsize,))
+        self._worldsize_scan.daemon = True
+        self._worldsize_scan.start()
+
+    def _refresh_worldsize(self, worldsize):
+        try:
+            worldsize.refresh()
+        except Exception as e:
+            self.log.exception("Could not size up the world:\n%s", e)
+        self.vitals.worldsize = worldsize.total
 
     def _console_event(self, payload):
         """This function is used in conjunction with event handlers to
@@ -10,6 +10,69 @@ import ast
 import fnmatch
 import copy
 import json
+import re
+
+# a node with any of these is a fnmatch pattern
+_WILDCARDS = re.compile(r"[*?\[]")
+# patterns per regex (Python 2 regexes can have at most 100 groups)
+_PATTERNS_PER_REGEX = 50
+_MISSING = object()
+
+
+class PermissionMatcher(object):
+    """
+    An ordered list of (node, value) permissions compiled for lookups: a
+    dict of the exact nodes and a regex of the fnmatch pattern nodes.
+    lookup() gives the value of the first node that matches, as
+    checking each node in turn with fnmatch would.
+    """
+    __slots__ = ("exact", "regexes", "values")
+
+    def __init__(self, items):
+        # node: (position, value)
+        self.exact = {}
+        # regex group name: (position, value)
+        self.values = {}
+        patterns = []
+        for position, (node, value) in enumerate(items):
+            if _WILDCARDS.search(node) is None:
+                if node not in self.exact:
+                    self.exact[node] = (position, value)
+                continue
+            name = "p%d" % position
+            patterns.append("(?P<%s>%s)" % (name, fnmatch.translate(node)))
+            self.values[name] = (position, value)
+        self.regexes = [
+            re.compile("|".join(patterns[start:start + _PATTERNS_PER_REGEX]))
+            for start in range(0, len(patterns), _PATTERNS_PER_REGEX)]
+
+    def lookup(self, node):
+        """ :returns: the value for `node`, or _MISSING. """
+        found = self.exact.get(node)
+        for regex in self.regexes:
+            match = regex.match(node)
+            if match is not None:
+                # the first pattern of this regex that matches, and the
+                #  regexes are in order, so the first of them all.
+                hit = self.values[match.lastgroup]
+                if found is None or hit[0] < found[0]:
+                    found = hit
+                break
+        if found is None:
+            return _MISSING
+        return found[1]
+
+
+class CompiledUser(object):
+    """ What has_permission() needs of one user. """
+    __slots__ = ("stamp", "permissions", "groups")
+
+    def __init__(self, stamp, permissions):
+        # (generation, user generation) when compiled
+        self.stamp = stamp
+        self.permissions = permissions
+        # find_child_groups: PermissionMatcher of the group permissions
+        self.groups = {}
 
 
 class Permissions(object):
@@ -24,12 +87,27 @@ class Permissions(object):
 
     players are only indentified by UUID.
 
+    has_permission() compiles each user's permissions (PermissionMatcher)
+    and keeps them until they change.  Every function here that changes
+    the permissions data bumps `self.generation` (groups, plugin
+    defaults or everything) or the user's `self.user_generations` entry.
+
     """
 
     def __init__(self, wrapper):
         self.wrapper = wrapper
         self.log = self.wrapper.log
 
+        self.generation = 0
+        # uuid: generation of the user's own permissions and groups
+        self.user_generations = {}
+        # uuid: CompiledUser
+        self._compiled = {}
+        # (generation, {node: value}) of the registered permissions
+        self._defaults = (None, {})
+        # the permissions data compiled from
+        self._data = None
+
         # populate dictionary items to prevent errors due to missing items
         if "groups" not in self.wrapper.wrapper_permissions.Data:
             self.wrapper.wrapper_permissions.Data["groups"] = {}
@@ -54,8 +132,29 @@ class Permissions(object):
         self.empty_user = {"groups": [], "permissions": {}}
         self.clean_perms_data()
 
+    def _changed(self, uuid=None):
+        """ Call after changing the data of `uuid` (or anything else). """
+        if uuid is None:
+            self.generation += 1
+        else:
+            self.user_generations[uuid] = self.user_generations.get(
+                uuid, 0) + 1
+
     def fill_user(self, uuid):
         self.wrapper.wrapper_permissions.Data["users"][uuid] = copy.deepcopy(self.empty_user)
+        self._changed(uuid)
+
+    def register_default(self, plugin_id, node, value):
+        """ Set the default (registered) value of `node`. """
+        if plugin_id not in self.wrapper.registered_permissions:
+            self.wrapper.registered_permissions[plugin_id] = {}
+        self.wrapper.registered_permissions[plugin_id][node] = value
+        self._changed()
+
+    def clear_defaults(self, plugin_id):
+        """ Forget the default permissions of plugin `plugin_id`. """
+        self.wrapper.registered_permissions[plugin_id] = {}
+        self._changed()
 
     def clean_perms_data(self):
 
@@ -81,6 +180,7 @@ class Permissions(object):
             return "Group '%s' already exists!" % groupname
 
         self.wrapper.wrapper_permissions.Data["groups"][groupname] = {"permissions": {}}
+        self._changed()
         return "Created a new permissions group '%s'." % groupname
 
     def group_delete(self, groupname):
@@ -88,9 +188,11 @@ class Permissions(object):
         deletename = groupname.lower()
         if deletename in self.wrapper.wrapper_permissions.Data["groups"]:
             self.wrapper.wrapper_permissions.Data["groups"].pop(deletename)
+            self._changed()
             return "Deleted permissions group '%s'." % deletename
         if groupname in self.wrapper.wrapper_permissions.Data["groups"]:
             self.wrapper.wrapper_permissions.Data["groups"].pop(groupname)
+            self._changed()
             return "Deleted permissions group '%s'." % groupname
         return "Group '%s' does not exist!" % deletename
 
@@ -121,6 +223,7 @@ class Permissions(object):
 
         # set the node
         self.wrapper.wrapper_permissions.Data["groups"][setname]["permissions"][setnode] = value
+        self._changed()
         return "Added node/group '%s' to Group '%s'!" % (setnode, setname)
 
     def group_delete_permission(self, group, node):
@@ -132,6 +235,7 @@ class Permissions(object):
 
         if setnode in self.wrapper.wrapper_permissions.Data["groups"][setgroup]["permissions"]:
             del self.wrapper.wrapper_permissions.Data["groups"][setgroup]["permissions"][setnode]
+            self._changed()
             return "Removed permission node '%s' from group '%s'." % (
                 setnode, setgroup)
 
@@ -189,44 +293,82 @@ class Permissions(object):
 
         # ensure lower case
         node = node.lower()
+        compiled = self._compile_user(uuid)
 
         # user has permission directly
-        for perm in self.wrapper.wrapper_permissions.Data["users"][uuid]["permissions"]:
-            if node in fnmatch.filter([node], perm):
-                return self.wrapper.wrapper_permissions.Data[
-                    "users"][uuid]["permissions"][perm]
+        value = compiled.permissions.lookup(node)
+        if value is not _MISSING:
+            return value
 
         # return a registered permission;
-        for pid in self.wrapper.registered_permissions:
-            if node in self.wrapper.registered_permissions[pid]:
-                return self.wrapper.registered_permissions[pid][node]
+        defaults = self._defaults
+        if defaults[0] != self.generation:
+            defaults = self._compile_defaults()
+        if node in defaults[1]:
+            return defaults[1][node]
 
         # an optional way out because group processing can be expensive
         if not group_match:
             return False
 
-        # summary of groups, which will include child groups
-        allgroups = []
+        # return if group matches
+        groups = compiled.groups.get(find_child_groups)
+        if groups is None:
+            groups = compiled.groups[find_child_groups] = self._compile_groups(
+                uuid, find_child_groups)
+        value = groups.lookup(node)
+        if value is not _MISSING:
+            return value
+
+        # no permission;
+        return False
 
-        # get the user's groups
-        for group in self.wrapper.wrapper_permissions.Data["users"][uuid]["groups"]:
-            allgroups.append(group)
+    def _compile_user(self, uuid):
+        """ :returns: the (up to date) CompiledUser of `uuid`. """
+        data = self.wrapper.wrapper_permissions.Data
+        if data is not self._data:
+            # replaced as a whole, not by a function here
+            self._data = data
+            self._changed()
+        # taken before reading the data, so a change made while
+        #  compiling leaves this stale.
+        stamp = (self.generation, self.user_generations.get(uuid, 0))
+        compiled = self._compiled.get(uuid)
+        if compiled is None or compiled.stamp != stamp:
+            permissions = data["users"][uuid]["permissions"]
+            compiled = self._compiled[uuid] = CompiledUser(
+                stamp, PermissionMatcher(list(permissions.items())))
+        return compiled
+
+    def _compile_defaults(self):
+        """ Merge the registered permissions, first plugin first. """
+        generation = self.generation
+        merged = {}
+        for pid in list(self.wrapper.registered_permissions):
+            for node, value in list(
+                    self.wrapper.registered_permissions[pid].items()):
+                if node not in merged:
+                    merged[node] = value
+        self._defaults = (generation, merged)
+        return self._defaults
+
+    def _compile_groups(self, uuid, find_child_groups):
+        """ :returns: a PermissionMatcher of the user's groups. """
+        groups = self.wrapper.wrapper_permissions.Data["groups"]
+        # summary of groups, which will include child groups
+        allgroups = list(
+            self.wrapper.wrapper_permissions.Data["users"][uuid]["groups"])
 
         if find_child_groups:
             allgroups = self._group_find_children(allgroups)
 
-        # return if group matches
+        items = []
         for group in allgroups:
             # this must be checked because a race condition can
             # render the groupname non-existent.
-            if group in self.wrapper.wrapper_permissions.Data["groups"]:
-                for perm in self.wrapper.wrapper_permissions.Data["groups"][group]["permissions"]:
-                    if node in fnmatch.filter([node], perm):
-                        return self.wrapper.wrapper_permissions.Data["groups"][group][
-                            "permissions"][perm]
-
-        # no permission;
-        return False
+            if group in groups:
+                items.extend(list(groups[group]["permissions"].items()))
+        return PermissionMatcher(items)
 
     def set_permission(self, uuid, node, value=True):
         """Adds the specified permission node and optionally a
@@ -247,6 +389,7 @@ class Permissions(object):
             self.fill_user(uuid)
 
         self.wrapper.wrapper_permissions.Data["users"][uuid]["permissions"][node.lower()] = value
+        self._changed(uuid)
 
     def remove_permission(self, uuid, node):
         """Completely removes a permission node from the player. They
@@ -261,6 +404,7 @@ class Permissions(object):
 
         if node in self.wrapper.wrapper_permissions.Data["users"][uuid]["permissions"]:
             del self.wrapper.wrapper_permissions.Data["users"][uuid]["permissions"][node]
+            self._changed(uuid)
             return True
 
         self.log.debug("Uuid:%s does not have permission node '%s'" % (
@@ -327,6 +471,7 @@ class Permissions(object):
                 "users"][uuid]["groups"]:
             self.wrapper.wrapper_permissions.Data[
                 "users"][uuid]["groups"].append(group)
+            self._changed(uuid)
 
         # return the resulting change (as verification)
         return self.has_group(uuid, group)
@@ -341,6 +486,7 @@ class Permissions(object):
 
         if group in self.wrapper.wrapper_permissions.Data["users"][uuid]["groups"]:
             self.wrapper.wrapper_permissions.Data["users"][uuid]["groups"].remove(group)
+            self._changed(uuid)
             return True
 
         self.log.debug("UUID:%s was not part of the group '%s'" % (
@@ -350,6 +496,7 @@ class Permissions(object):
     def clear_group_data(self):
         """Resets group data."""
         self.wrapper.wrapper_permissions.Data["groups"] = {}
+        self._changed()
 
     def clear_user_data(self):
         for user in self.wrapper.wrapper_permissions.Data["users"]:
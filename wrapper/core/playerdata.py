@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+The login records of online players (`player.data`), kept in
+`wrapper-data/players/<uuid>.pkl`.
+
+One PlayerData holds the records of everyone online.  A record is read
+when its player logs in and dropped when the last of their sessions
+ends.  Play time (the "logins" item: {login time: last time seen}) is
+brought up to date when a session starts or ends and every
+PLAYTIME_INTERVAL seconds by one scheduled task, which then writes
+every changed record in one go.  So a login costs one file read and no
+thread, however many players are online.
+"""
+
+import os
+import threading
+import time
+
+from api.helpers import mkdir_p, getjsonfile, pickle_load, pickle_protocol
+from api.helpers import write_atomic, Pickle
+
+# seconds between play time updates (and writes)
+PLAYTIME_INTERVAL = 60
+
+
+class PlayerRecord(object):
+    """ A player's record.  `Data` is the dict that is saved. """
+
+    def __init__(self, playerdata, uuid, data):
+        self.playerdata = playerdata
+        self.uuid = uuid
+        self.Data = data
+
+    def save(self):
+        """ Write the record now. """
+        self.playerdata.save(self.uuid)
+
+    def close(self):
+        """ Records are written by the PlayerData; this just saves. """
+        self.save()
+
+
+class PlayerData(object):
+    """
+    :param log: logger.
+    :param root: the directory of the records.
+    :param encoding: 'Machine' or 'Human' pickles (pickle_protocol()).
+    """
+    def __init__(self, log, root="wrapper-data/players", encoding="machine"):
+        self.log = log
+        self.root = root
+        self._protocol = pickle_protocol(encoding)
+        # uuid: PlayerRecord, of the players online
+        self.records = {}
+        # uuid: [login time keys], of their open sessions
+        self.sessions = {}
+        # uuids of the records changed since they were written
+        self.dirty = set()
+        self._lock = threading.RLock()
+
+    def login(self, uuid, logged_in):
+        """
+        Start a session of `uuid`, who logged in at `logged_in`.
+
+        :returns: the player's PlayerRecord.
+        """
+        with self._lock:
+            record = self.records.get(uuid)
+            if record is None:
+                record = PlayerRecord(self, uuid, self._read(uuid))
+                self.records[uuid] = record
+                self.sessions[uuid] = []
+            data = record.Data
+            if "firstLoggedIn" not in data:
+                data["firstLoggedIn"] = (time.time(), time.tzname)
+            if "logins" not in data:
+                data["logins"] = {}
+            data["lastLoggedIn"] = (logged_in, time.tzname)
+            data["logins"][int(logged_in)] = int(time.time())
+            self.sessions[uuid].append(int(logged_in))
+            self.dirty.add(uuid)
+            return record
+
+    def logout(self, uuid, logged_in):
+        """
+        End the session `login()` started, noting its play time.  The
+         record is written (and dropped) if it was the last one.
+        """
+        with self._lock:
+            sessions = self.sessions.get(uuid)
+            if not sessions or int(logged_in) not in sessions:
+                return
+            sessions.remove(int(logged_in))
+            record = self.records[uuid]
+            record.Data["logins"][int(logged_in)] = int(time.time())
+            self.dirty.add(uuid)
+            if not sessions:
+                self.save(uuid)
+                del self.records[uuid]
+                del self.sessions[uuid]
+
+    def update(self):
+        """ Note the play time of every session and write the records. """
+        now = int(time.time())
+        with self._lock:
+            for uuid, sessions in self.sessions.items():
+                logins = self.records[uuid].Data["logins"]
+                for logged_in in sessions:
+                    logins[logged_in] = now
+                self.dirty.add(uuid)
+        self.flush()
+
+    def flush(self):
+        """ Write the records that changed. """
+        with self._lock:
+            dirty = list(self.dirty)
+            for uuid in dirty:
+                self.save(uuid)
+
+    def save(self, uuid):
+        with self._lock:
+            record = self.records.get(uuid)
+            self.dirty.discard(uuid)
+            if record is None:
+                return
+            try:
+                mkdir_p(self.root)
+                write_atomic("%s/%s.pkl" % (self.root, uuid),
+                             Pickle.dumps(record.Data, self._protocol))
+            except Exception as e:
+                self.log.exception("Could not save the data of player %s:"
+                                   "\n%s", uuid, e)
+
+    def close(self):
+        """ End every session (wrapper is stopping). """
+        with self._lock:
+            for uuid, sessions in list(self.sessions.items()):
+                for logged_in in list(sessions):
+                    self.logout(uuid, logged_in)
+
+    def _read(self, uuid):
+        if os.path.exists("%s/%s.pkl" % (self.root, uuid)):
+            try:
+                return pickle_load(self.root, "%s.pkl" % uuid)
+            except Exception as e:
+                self.log.exception("Could not read the data of player %s:"
+                                   "\n%s", uuid, e)
+                return {}
+        # the older json records
+        data = getjsonfile(uuid, self.root)
+        return data or {}
@@ -125,7 +125,7 @@ class Plugins(object):
         self.plugins[pid]["filename"] = "%s.py" % name
         self.wrapper.commands[pid] = {}
         self.wrapper.events[pid] = {}
-        self.wrapper.registered_permissions[pid] = {}
+        self.wrapper.perms.clear_defaults(pid)
         self.wrapper.help[pid] = {}
         can_enable = main.onEnable()
         if can_enable is False:
@@ -147,6 +147,7 @@ class Plugins(object):
         finally:
             del self.wrapper.commands[plugin]
             del self.wrapper.events[plugin]
+            self.wrapper.events.scheduler.cancel_owner(plugin)
             del self.wrapper.help[plugin]
             self.plugins_loaded = []
 
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+The server process's resource use over time.
+
+sample() is called every `interval` seconds (by the scheduler).  It
+reads the process's resident memory, CPU time, threads, open files and
+disk I/O from /proc/<pid> (or through psutil, where there is no /proc)
+and keeps them in two History rings of arrays:
+
+- recent: every sample, for the last RECENT samples.
+- long term: the average of each LONG_INTERVAL seconds, for the last
+  `history_days` days.
+
+CPU is kept as percent of one core (like top), I/O as bytes per second.
+latest() is the last sample, kept as is; history() copies only the
+samples asked for.
+"""
+
+import os
+import threading
+import time
+from array import array
+
+try:
+    import psutil
+except ImportError:
+    psutil = False
+
+# what is kept of each sample
+RSS = "rss"
+CPU = "cpu"
+THREADS = "threads"
+FDS = "fds"
+READ = "read"
+WRITE = "write"
+FIELDS = (RSS, CPU, THREADS, FDS, READ, WRITE)
+
+# samples kept at full resolution
+RECENT = 3600
+# seconds averaged into each long term sample
+LONG_INTERVAL = 60
+
+try:
+    _CLOCK_TICKS = float(os.sysconf("SC_CLK_TCK"))
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _CLOCK_TICKS = _PAGE_SIZE = None
+
+
+class History(object):
+    """ The last `size` samples of `fields`, an array per field. """
+
+    def __init__(self, size, fields=FIELDS):
+        self.size = size
+        self.fields = fields
+        self.times = array("d", [0.0]) * size
+        self.values = [array("d", [0.0]) * size for _ in fields]
+        # samples ever added
+        self.count = 0
+
+    def add(self, when, values):
+        index = self.count % self.size
+        self.times[index] = when
+        for column, value in zip(self.values, values):
+            column[index] = value
+        self.count += 1
+
+    def since(self, when):
+        """
+        :returns: a dict of lists, "time" and one per field, of the
+         samples taken at `when` or later, oldest first.
+        """
+        first = self.count
+        oldest = max(0, self.count - self.size)
+        while first > oldest and self.times[(first - 1) % self.size] >= when:
+            first -= 1
+        result = {"time": self._slice(self.times, first)}
+        for field, column in zip(self.fields, self.values):
+            result[field] = self._slice(column, first)
+        return result
+
+    def _slice(self, column, first):
+        start = first % self.size
+        end = self.count % self.size
+        if self.count - first == self.size or (start > end):
+            return column[start:].tolist() + column[:end].tolist()
+        return column[start:start + self.count - first].tolist()
+
+
+class ProcessSampler(object):
+    """
+    :param log: logger.
+    :param interval: seconds between samples.
+    :param history_days: days of long term samples kept.
+    """
+    def __init__(self, log, interval=1, history_days=7):
+        self.log = log
+        self.interval = interval
+        self.recent = History(RECENT)
+        self.long = History(max(1, int(history_days * 86400 /
+                                       LONG_INTERVAL)))
+        # the last sample, a dict
+        self.last = None
+        # (pid, time, raw counters) of the previous reading
+        self._previous = None
+        # psutil.Process of the pid, where there is no /proc
+        self._process = None
+        # sums of the samples going into the next long term sample
+        self._sums = [0.0] * len(FIELDS)
+        self._summed = 0
+        self._summing_since = 0
+        self._failed = None
+        self._lock = threading.Lock()
+
+    def sample(self, pid):
+        """ Take a sample of process `pid` (None if there is none). """
+        if pid is None:
+            self._previous = None
+            return
+        now = time.time()
+        try:
+            raw = self.read(pid)
+        except Exception as e:
+            if self._failed != pid:
+                self._failed = pid
+                self.log.warning("Could not read the resource use of the "
+                                 "server (pid %s): %s", pid, e)
+            self._previous = None
+            return
+        previous, self._previous = self._previous, (pid, now, raw)
+        if previous is None or previous[0] != pid:
+            # CPU and I/O are rates; they need two readings
+            return
+        elapsed = now - previous[1] or self.interval
+        cpu, rss, threads, fds, read, write = raw
+        values = (rss,
+                  (cpu - previous[2][0]) * 100.0 / elapsed,
+                  threads,
+                  fds,
+                  max(0, read - previous[2][4]) / elapsed,
+                  max(0, write - previous[2][5]) / elapsed)
+        last = dict(zip(FIELDS, values))
+        last["time"] = now
+        last["pid"] = pid
+        with self._lock:
+            self.recent.add(now, values)
+            self.last = last
+            if not self._summed:
+                self._summing_since = now
+            for index, value in enumerate(values):
+                self._sums[index] += value
+            self._summed += 1
+            if now - self._summing_since >= LONG_INTERVAL:
+                self.long.add(now, [total / self._summed
+                                    for total in self._sums])
+                self._sums = [0.0] * len(FIELDS)
+                self._summed = 0
+
+    def latest(self):
+        """ :returns: the last sample (a dict), or None. """
+        return self.last
+
+    def history(self, seconds=3600):
+        """
+        :param seconds: of history wanted.  Beyond the span of the
+         recent samples, the long term ones are given.
+        :returns: a dict: "interval" (seconds between the samples),
+         "time" and one list per field (FIELDS).
+        """
+        since = time.time() - seconds
+        with self._lock:
+            recent = self.recent
+            oldest = recent.times[max(0, recent.count - recent.size) %
+                                  recent.size]
+            if recent.count < recent.size or since >= oldest:
+                result = recent.since(since)
+                result["interval"] = self.interval
+            else:
+                result = self.long.since(since)
+                result["interval"] = LONG_INTERVAL
+        return result
+
+    def rss(self, pid):
+        """ :returns: the resident memory of `pid`, in bytes. """
+        last = self.last
+        if last is not None and last["pid"] == pid and (
+                time.time() - last["time"] < self.interval * 2 + 1):
+            return last[RSS]
+        return self.read(pid)[1]
+
+    def read(self, pid):
+        """
+        :returns: the counters of `pid`: (CPU seconds, resident bytes,
+         threads, open files, bytes read, bytes written).
+        """
+        if _CLOCK_TICKS and os.path.isdir("/proc/%d" % pid):
+            return self._read_proc(pid)
+        if not psutil:
+            raise OSError("There is no /proc and psutil is not installed")
+        process = self._process
+        if process is None or process.pid != pid:
+            process = self._process = psutil.Process(pid)
+        with process.oneshot():
+            times = process.cpu_times()
+            rss = process.memory_info().rss
+            threads = process.num_threads()
+            if hasattr(process, "num_fds"):
+                fds = process.num_fds()
+            else:
+                fds = process.num_handles()
+            try:
+                io = process.io_counters()
+                read, write = io.read_bytes, io.write_bytes
+            except (AttributeError, psutil.AccessDenied):
+                read = write = 0
+        return times.user + times.system, rss, threads, fds, read, write
+
+    @staticmethod
+    def _read_proc(pid):
+        with open("/proc/%d/stat" % pid, "rb") as f:
+            stat = f.read()
+        # fields 3 and on, after the (command name)
+        stat = stat[stat.rindex(b")") + 2:].split()
+        cpu = (int(stat[11]) + int(stat[12])) / _CLOCK_TICKS
+        threads = int(stat[17])
+        rss = int(stat[21]) * _PAGE_SIZE
+        try:
+            fds = len(os.listdir("/proc/%d/fd" % pid))
+        except OSError:
+            fds = 0
+        read = write = 0
+        try:
+            with open("/proc/%d/io" % pid, "rb") as f:
+                for line in f:
+                    if line.startswith(b"read_bytes:"):
+                        read = int(line.split()[1])
+                    elif line.startswith(b"write_bytes:"):
+                        write = int(line.split()[1])
+        except (IOError, OSError):
+            pass
+        return cpu, rss, threads, fds, read, write
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Plugin profiling ("plugin-profiling").
+
+Every plugin event handler, command and scheduled task call is timed
+(wall clock and CPU time of the calling thread) and counted per (kind,
+plugin, name), where kind is EVENT, COMMAND or TASK.  The last WINDOW
+calls of each are kept for percentiles.  A call slower than
+"slow-plugin-ms" is logged, with a summary of its payload, as it
+happens.
+
+It is off unless "plugin-profiling" is set (or '/wrapper profile on').
+"""
+
+from collections import deque
+import threading
+import time
+
+# CPU time of the calling thread, where Python has it (3.7+).  Otherwise
+#  it is the CPU time of the whole process, which counts other threads
+#  too.
+try:
+    _cpu_clock = time.thread_time
+except AttributeError:
+    try:
+        _cpu_clock = time.process_time
+    except AttributeError:
+        _cpu_clock = time.clock
+
+EVENT = "event"
+COMMAND = "command"
+TASK = "task"
+
+# calls kept for percentiles, per (kind, plugin, name)
+WINDOW = 256
+
+# entry fields
+CALLS, WALL, CPU, WALL_MAX, RECENT = range(5)
+
+
+def summarize(payload, limit=160):
+    """ :returns: a short, one line description of `payload`. """
+    if isinstance(payload, dict):
+        items = []
+        for key in sorted(payload, key=str):
+            value = payload[key]
+            username = getattr(value, "username", None)
+            if username is not None:
+                value = username
+            else:
+                value = repr(value)
+                if len(value) > 40:
+                    value = value[:37] + "..."
+            items.append("%s=%s" % (key, value))
+        text = ", ".join(items)
+    else:
+        text = repr(payload)
+    if len(text) > limit:
+        text = text[:limit - 3] + "..."
+    return text
+
+
+def percentile(ordered, fraction):
+    """ :returns: the `fraction` percentile of an ordered list. """
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class PluginProfiler(object):
+    """
+    :param log: logger, for the slow call warnings.
+    :param enabled: time plugin calls.
+    :param slow_ms: warn about calls that take this many milliseconds or
+     more (0 for no warnings).
+    """
+    def __init__(self, log, enabled=True, slow_ms=50):
+        self.log = log
+        self.enabled = enabled
+        self.slow = slow_ms / 1000.0
+        self.since = time.time()
+        # (kind, plugin, name): [calls, wall, cpu, wall max, recent walls]
+        self.table = {}
+        self.slow_calls = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """ :returns: what finish() needs, or None if not profiling. """
+        if not self.enabled:
+            return None
+        return time.time(), _cpu_clock()
+
+    def finish(self, started, kind, plugin, name, payload=None):
+        """ Count a call start()ed with `started`. """
+        wall = time.time() - started[0]
+        cpu = _cpu_clock() - started[1]
+        key = (kind, plugin, name)
+        with self._lock:
+            entry = self.table.get(key)
+            if entry is None:
+                entry = self.table[key] = [0, 0.0, 0.0, 0.0,
+                                           deque(maxlen=WINDOW)]
+            entry[CALLS] += 1
+            entry[WALL] += wall
+            entry[CPU] += cpu
+            if wall > entry[WALL_MAX]:
+                entry[WALL_MAX] = wall
+            entry[RECENT].append(wall)
+        if self.slow and wall >= self.slow:
+            self.slow_calls += 1
+            self.log.warning(
+                "Plugin '%s' took %.1f ms (%.1f ms CPU) in %s '%s': %s",
+                plugin, wall * 1000, cpu * 1000, kind, name,
+                summarize(payload))
+
+    def reset(self):
+        with self._lock:
+            self.table = {}
+            self.slow_calls = 0
+            self.since = time.time()
+
+    def report(self, top=None, plugin=None):
+        """
+        :param top: only this many rows.
+        :param plugin: only the calls of this plugin.
+        :returns: a list of dicts, one per (kind, plugin, name), most
+         total wall time first.  Times are in milliseconds; percentiles
+         are of the last WINDOW calls.
+        """
+        with self._lock:
+            entries = [(key, list(entry[:RECENT]), sorted(entry[RECENT]))
+                       for key, entry in self.table.items()
+                       if plugin is None or key[1] == plugin]
+        entries.sort(key=lambda item: -item[1][WALL])
+        rows = []
+        for (kind, plugin_id, name), entry, recent in entries[:top]:
+            rows.append({
+                "kind": kind,
+                "plugin": plugin_id,
+                "name": name,
+                "calls": entry[CALLS],
+                "wall": entry[WALL] * 1000,
+                "cpu": entry[CPU] * 1000,
+                "avg": entry[WALL] / entry[CALLS] * 1000,
+                "max": entry[WALL_MAX] * 1000,
+                "p50": percentile(recent, 0.50) * 1000,
+                "p95": percentile(recent, 0.95) * 1000,
+                "p99": percentile(recent, 0.99) * 1000,
+            })
+        return rows
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Scheduled calls (`API.scheduleDelayed()` and `API.scheduleRepeating()`).
+
+One thread keeps every task in a heap ordered by deadline and sleeps
+until the earliest one is due.  A due task is not called on that
+thread; it is handed to the event workers (`Events.run_queued()`) under
+a key of its own, so a slow task holds up neither the scheduler nor the
+other tasks.
+
+Repeating tasks do not drift: each deadline is the last deadline plus
+the interval, not the time the task last ran plus the interval.  A task
+that falls behind (or is still running when it is next due) skips the
+runs it missed instead of running them back to back.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from core.profiler import TASK
+
+
+class ScheduledTask(object):
+    __slots__ = ("id", "owner", "callback", "args", "interval", "deadline",
+                 "cancelled", "queued", "skipped")
+
+    def __init__(self, taskid, owner, callback, args, interval, deadline):
+        self.id = taskid
+        self.owner = owner
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.deadline = deadline
+        self.cancelled = False
+        # handed to the workers and not done running yet
+        self.queued = False
+        self.skipped = 0
+
+
+class Scheduler(object):
+    """
+    :param log: logger.
+    :param dispatch: dispatch(key, function, args), to call a due task.
+    :param profiler: a PluginProfiler, to time the calls.
+    """
+    def __init__(self, log, dispatch, profiler=None):
+        self.log = log
+        self.dispatch = dispatch
+        self.profiler = profiler
+        # (deadline, task id, task)
+        self.heap = []
+        # task id: task
+        self.tasks = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Condition()
+        self.abort = False
+
+    def start(self):
+        t = threading.Thread(target=self._run, name="scheduler", args=())
+        t.daemon = True
+        t.start()
+
+    def stop(self):
+        with self._lock:
+            self.abort = True
+            self._lock.notify()
+
+    def schedule(self, delay, callback, args=(), interval=None, owner=None):
+        """
+        Call `callback(*args)` in `delay` seconds and, if `interval` is
+        given, every `interval` seconds after that.
+
+        :param owner: the ID of the plugin the task belongs to.
+        :returns: the task ID, for cancel().
+        """
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be more than 0 (got %s)"
+                             % interval)
+        with self._lock:
+            task = ScheduledTask(next(self._ids), owner, callback,
+                                 tuple(args), interval,
+                                 time.time() + max(delay, 0))
+            self.tasks[task.id] = task
+            heapq.heappush(self.heap, (task.deadline, task.id, task))
+            if self.heap[0][2] is task:
+                # due before whatever the scheduler is waiting for
+                self._lock.notify()
+        return task.id
+
+    def cancel(self, taskid):
+        """ :returns: True if the task was scheduled (and is no more). """
+        with self._lock:
+            task = self.tasks.pop(taskid, None)
+        if task is None:
+            return False
+        task.cancelled = True
+        return True
+
+    def cancel_owner(self, owner):
+        """ Cancel every task of plugin `owner`. """
+        with self._lock:
+            tasks = [task for task in self.tasks.values()
+                     if task.owner == owner]
+            for task in tasks:
+                del self.tasks[task.id]
+                task.cancelled = True
+        return len(tasks)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while True:
+                    if self.abort:
+                        return
+                    if not self.heap:
+                        self._lock.wait()
+                        continue
+                    wait = self.heap[0][0] - time.time()
+                    if wait <= 0:
+                        break
+                    self._lock.wait(wait)
+                deadline, taskid, task = heapq.heappop(self.heap)
+                if task.cancelled:
+                    continue
+                if task.interval:
+                    task.deadline = deadline + task.interval
+                    now = time.time()
+                    if task.deadline <= now:
+                        # fell behind; skip to the next deadline to come
+                        missed = int((now - task.deadline) // task.interval)
+                        task.skipped += missed + 1
+                        task.deadline += (missed + 1) * task.interval
+                    heapq.heappush(self.heap, (task.deadline, taskid, task))
+                else:
+                    self.tasks.pop(taskid, None)
+                if task.queued:
+                    # the last run has not finished yet
+                    task.skipped += 1
+                    continue
+                task.queued = True
+            self.dispatch("task.%d" % taskid, self._call, (task,))
+
+    def _call(self, task):
+        try:
+            if task.cancelled:
+                return
+            started = self.profiler.start() if self.profiler else None
+            try:
+                task.callback(*task.args)
+            except Exception as e:
+                self.log.exception(
+                    "Scheduled task %d (%s of %s) failed:\n%s", task.id,
+                    getattr(task.callback, "__name__", task.callback),
+                    task.owner, e)
+            if started:
+                self.profiler.finish(
+                    started, TASK, task.owner,
+                    getattr(task.callback, "__name__", "task"), task.args)
+        finally:
+            # due again from now on (deadlines that came while it ran
+            #  were skipped)
+            task.queued = False
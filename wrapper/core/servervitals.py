@@ -5,6 +5,8 @@
 # This program is distributed under the terms of the GNU
 # General Public License, version 3 or later.
 
+from core.tickmonitor import TickMonitor
+
 
 class ServerVitals(object):
     """ Centralized location for server information.  This class also
@@ -20,11 +22,17 @@ class ServerVitals(object):
 
         # Shared data structures and run-time
         self.players = playerobjects
+        # bump this whenever something shown in the server list changes
+        # (players joining/leaving, motd, icon).  The proxy caches its
+        # status response until it changes.
+        self.status_generation = 0
 
         # TODO - I don't think this is used or needed (same name as proxy.entity_control!)
         self.entity_control = None
         # -1 until a player logs on and server sends a time update
         self.timeofday = -1
+        # tick rate and latency
+        self.ticks = TickMonitor()
         self.spammy_stuff = ["found nothing", "vehicle of", "Wrong location!",
                              "Tried to add entity", ]
 
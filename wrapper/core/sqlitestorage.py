@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+A Storage kept in an SQLite database (`API.getStorage(..., sqlite=True)`)
+for data sets too big to load whole.
+
+`Data` is still a dict-like object, but an item is only read from the
+database when it is first used.  Items that were used stay in memory
+until a flush finds that nothing else refers to them.  As with Storage,
+changes made in place (like `Data[key]["name"] = "x"`) are found by the
+periodic flush, which writes all changes in one transaction.
+
+On top of that, SQLiteStorage has key range queries (query()), and
+transaction() to write a batch of changes at once.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import logging
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    # Python 2
+    from collections import MutableMapping
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = False
+
+from api.helpers import mkdir_p, getjsonfile
+from api.helpers import pickle_load, pickle_protocol, Pickle
+from core.storage import _FLUSHER, _configured_encoding
+
+try:
+    # noinspection PyUnresolvedReferences
+    KEY_TYPES = (str, unicode, int, long, float)
+except NameError:
+    KEY_TYPES = (str, int, float)
+
+# the largest text key, for prefix queries
+_LAST_CHARACTER = u"\U0010ffff" if sys.maxunicode > 0xffff else u"\uffff"
+
+
+class SQLiteData(MutableMapping):
+    """ The `Data` of an SQLiteStorage. """
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def __getitem__(self, key):
+        return self._storage._get(key)
+
+    def __setitem__(self, key, value):
+        self._storage._set(key, value)
+
+    def __delitem__(self, key):
+        self._storage._delete(key)
+
+    def __contains__(self, key):
+        return self._storage._contains(key)
+
+    def __iter__(self):
+        return iter(self._storage._keys())
+
+    def __len__(self):
+        return self._storage._count()
+
+    def items(self):
+        return self._storage.query()
+
+    def values(self):
+        return [value for key, value in self._storage.query()]
+
+    def clear(self):
+        self._storage._clear()
+
+    def __repr__(self):
+        return "<SQLiteData '%s' of %d items>" % (self._storage.path,
+                                                  len(self))
+
+
+class SQLiteStorage(object):
+    """
+    A Storage in an SQLite database (in WAL mode), `<root>/<name>.sqlite3`.
+
+    :init() arguments:
+        :name: Storage name on disk.
+        :root="wrapper-data/json": File path of the storage.
+        :pickle=True: True to pickle the items, False to use json.
+
+    :Methods:
+        :load(): forget the changes not saved yet.
+        :save():
+        :flush():
+        :close():
+        :query(): items by key range or prefix.
+        :transaction(): change several items at once.
+
+    :Properties/variables:
+        :periodic_save_timer:  Default is 60 seconds
+        :paused_saving:  Set to True to pause the periodic save.
+
+    Keys must be strings or numbers.  A storage file (`<name>.pkl` or
+    `<name>.json`) of the same name is imported the first time.
+    """
+
+    def __init__(self, name, root="wrapper-data/json", pickle=True,
+                 encoding=None):
+        if not sqlite3:
+            raise ImportError("SQLite storages need the `sqlite3` module.")
+        self.name = name
+        self.root = root
+        self.pickle = pickle
+        self.log = logging.getLogger('Storage.py')
+        if encoding is None:
+            encoding = _configured_encoding()
+        self.encoding = encoding
+        self._protocol = pickle_protocol(encoding)
+        self.paused_saving = False
+        self.periodic_save_timer = 60
+        self.path = "%s/%s.sqlite3" % (self.root, self.name)
+
+        # key: value, of the items read or written
+        self._cache = {}
+        # key: hash of the value last written (of the items in _cache)
+        self._hashes = {}
+        # written and not committed
+        self._uncommitted = False
+        self._lock = threading.RLock()
+
+        mkdir_p(self.root)
+        new = not os.path.exists(self.path)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS data ("
+                         "key PRIMARY KEY, value) WITHOUT ROWID")
+        self._db.commit()
+        self._data = SQLiteData(self)
+        self.Data = self._data
+        if new:
+            self._import()
+
+        self.timer = time.time()
+        self.abort = False
+        _FLUSHER.add(self)
+
+    def load(self):
+        """
+        Forget the changes that were not saved yet; items are read from
+         the database again.
+
+        :return: Nothing
+        """
+        with self._lock:
+            self._db.rollback()
+            self._uncommitted = False
+            self._cache = {}
+            self._hashes = {}
+            self.Data = self._data
+
+    def flush(self):
+        """
+        Write what changed since the last write, if anything.
+
+        :returns: True if something was written.
+        """
+        with self._lock:
+            if self.Data is not self._data:
+                # replaced, not changed
+                replacement = dict(self.Data)
+                self.Data = self._data
+                self._clear()
+                for key, value in replacement.items():
+                    self._set(key, value)
+            self._write_changed()
+            written = self._uncommitted
+            if written:
+                self._db.commit()
+                self._uncommitted = False
+            self._trim()
+            return written
+
+    def save(self):
+        """
+        Force a save of the Storage to disk.  Saves are also done
+         periodically and when the storage is closed.
+
+        :return: Nothing
+        """
+        self.flush()
+
+    def close(self):
+        """
+        Close the Storage and save it's Data to disk.
+
+        :return: Nothing
+        """
+        self.abort = True
+        _FLUSHER.remove(self)
+        with self._lock:
+            self.flush()
+            self._db.close()
+
+    def query(self, start=None, stop=None, prefix=None, limit=None,
+              reverse=False):
+        """
+        Items in key order, using the key index.
+
+        :Args:
+            :start: the first key (if it exists).
+            :stop: the key after the last (not included).
+            :prefix: only (text) keys starting with this.
+            :limit: at most this many items.
+            :reverse: last key first.
+
+        :returns: a list of (key, value).
+        """
+        if prefix is not None:
+            start = prefix
+            stop = prefix + _LAST_CHARACTER
+        where = []
+        args = []
+        if start is not None:
+            where.append("key >= ?")
+            args.append(start)
+        if stop is not None:
+            where.append("key < ?")
+            args.append(stop)
+        sql = "SELECT key, value FROM data"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY key DESC" if reverse else " ORDER BY key"
+        if limit is not None:
+            sql += " LIMIT %d" % int(limit)
+        with self._lock:
+            items = []
+            for key, dump in self._db.execute(sql, args).fetchall():
+                if key not in self._cache:
+                    self._remember(key, *self._load(dump))
+                items.append((key, self._cache[key]))
+            return items
+
+    def transaction(self):
+        """
+        Change several items at once.  No other thread uses the storage
+         until the changes are written; if the block fails, none of them
+         are.
+
+        .. code:: python
+
+            with self.homes.transaction():
+                self.homes.Data[uuid] = home
+                del self.homes.Data[olduuid]
+        ..
+        """
+        return _Transaction(self)
+
+    def _import(self):
+        """ Import the storage file of the same name, if there is one. """
+        data = False
+        if os.path.exists("%s/%s.pkl" % (self.root, self.name)):
+            data = pickle_load(self.root, "%s.pkl" % self.name)
+        elif os.path.exists("%s/%s.json" % (self.root, self.name)):
+            data = getjsonfile(self.name, self.root,
+                               encodedas=self.encoding)
+        if not data:
+            return
+        with self._lock:
+            for key, value in data.items():
+                self._set(key, value)
+            self.flush()
+        self.log.info("Imported %d items into storage '%s'", len(data),
+                      self.path)
+
+    def _dump(self, value):
+        if self.pickle:
+            return Pickle.dumps(value, self._protocol)
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+    def _load(self, dump):
+        """ :returns: the value and its dump, from a database value. """
+        if self.pickle:
+            dump = bytes(dump)
+            return Pickle.loads(dump), dump
+        return json.loads(dump), dump
+
+    def _remember(self, key, value, dump):
+        self._cache[key] = value
+        self._hashes[key] = hash(dump)
+
+    def _write(self, key, dump):
+        self._db.execute("INSERT OR REPLACE INTO data (key, value)"
+                         " VALUES (?, ?)", (key, sqlite3.Binary(dump)
+                                            if self.pickle else dump))
+        self._hashes[key] = hash(dump)
+        self._uncommitted = True
+
+    def _write_changed(self):
+        """ Write the items changed in place. """
+        for key, value in list(self._cache.items()):
+            try:
+                dump = self._dump(value)
+            except TypeError:
+                self.log.exception("Error encoutered while saving item"
+                                   " '%s' of '%s'", key, self.path)
+                continue
+            if self._hashes.get(key) != hash(dump):
+                self._write(key, dump)
+
+    def _trim(self):
+        """ Drop the items nothing but the cache refers to. """
+        if not hasattr(sys, "getrefcount"):
+            return
+        for key in list(self._cache):
+            # the cache and getrefcount()'s argument
+            if sys.getrefcount(self._cache[key]) <= 2:
+                del self._cache[key]
+                self._hashes.pop(key, None)
+
+    def _get(self, key):
+        with self._lock:
+            try:
+                return self._cache[key]
+            except KeyError:
+                pass
+            row = self._db.execute("SELECT value FROM data WHERE key = ?",
+                                   (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            self._remember(key, *self._load(row[0]))
+            return self._cache[key]
+
+    def _set(self, key, value):
+        if not isinstance(key, KEY_TYPES):
+            raise TypeError("SQLite storage keys must be strings or numbers"
+                            " - got %s" % type(key))
+        with self._lock:
+            self._write(key, self._dump(value))
+            self._cache[key] = value
+
+    def _delete(self, key):
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM data WHERE key = ?",
+                                      (key,))
+            self._cache.pop(key, None)
+            self._hashes.pop(key, None)
+            self._uncommitted = True
+            if not cursor.rowcount:
+                raise KeyError(key)
+
+    def _contains(self, key):
+        with self._lock:
+            if key in self._cache:
+                return True
+            return self._db.execute("SELECT 1 FROM data WHERE key = ?",
+                                    (key,)).fetchone() is not None
+
+    def _keys(self):
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT key FROM data ORDER BY key").fetchall()]
+
+    def _count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM data").fetchone()[0]
+
+    def _clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM data")
+            self._cache = {}
+            self._hashes = {}
+            self._uncommitted = True
+
+
+class _Transaction(object):
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __enter__(self):
+        self.storage._lock.acquire()
+        try:
+            # so a failure only undoes what the block did
+            self.storage.flush()
+        except Exception:
+            self.storage._lock.release()
+            raise
+        return self.storage
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.storage.flush()
+            else:
+                # what is in memory may be half changed too
+                self.storage.load()
+        finally:
+            self.storage._lock.release()
+        return False
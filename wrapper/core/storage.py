@@ -7,14 +7,87 @@
 
 # from __future__ import unicode_literals
 
+import json
+import locale
 import os
 import time
 import logging
-from api.helpers import mkdir_p, putjsonfile, getjsonfile
-from api.helpers import pickle_save, pickle_load
+from api.helpers import mkdir_p
+from api.helpers import pickle_load, pickle_protocol, Pickle
+from api.helpers import write_atomic
 from core.config import Config
 import threading
 
+# a store whose file is at least this big (bytes) writes its changes to a
+#  journal between full saves.
+JOURNAL_MIN_SIZE = 64 * 1024
+# ... until the journal is bigger than the file (or than this).
+COMPACT_MIN_SIZE = 256 * 1024
+
+# the General "encoding" of wrapper.properties.json, read once
+_ENCODING = []
+
+
+def _configured_encoding():
+    if not _ENCODING:
+        config_manager = Config()
+        config_manager.loadconfig()
+        _ENCODING.append(config_manager.config["General"]["encoding"])
+    return _ENCODING[0]
+
+
+def _to_bytes(text):
+    if isinstance(text, bytes):
+        return text
+    return text.encode("utf-8")
+
+
+class _Flusher(object):
+    """
+    The thread that writes the changes of every open Storage, each
+    `periodic_save_timer` seconds.
+    """
+    def __init__(self):
+        self.log = logging.getLogger('Storage.py')
+        self.storages = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, storage):
+        with self._lock:
+            self.storages.add(storage)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="storage_flusher", args=())
+                self._thread.daemon = True
+                self._thread.start()
+
+    def remove(self, storage):
+        with self._lock:
+            self.storages.discard(storage)
+
+    def _run(self):
+        # doing it this way (versus just sleep() for certain number of
+        # seconds), allows faster shutdown response
+        while True:
+            time.sleep(1)
+            with self._lock:
+                storages = list(self.storages)
+            for storage in storages:
+                if storage.paused_saving or storage.abort:
+                    continue
+                if time.time() - storage.timer > storage.periodic_save_timer:
+                    try:
+                        storage.flush()
+                    except Exception as e:
+                        self.log.exception("Error saving storage '%s/%s':"
+                                           "\n%s", storage.root,
+                                           storage.name, e)
+                    storage.timer = time.time()
+
+
+_FLUSHER = _Flusher()
+
 
 class Storage(object):
     """
@@ -29,30 +102,44 @@ class Storage(object):
     :Methods:
         :load():
         :save():
+        :flush():
         :close():
 
     :Properties/variables:
         :periodic_save_timer:  Default is 60 seconds
         :paused_saving:  Set to True to pause the periodic save.
 
+    Files are written whole to a temporary file that is then renamed
+    over the storage file, so a crash never leaves half a file.  The
+    periodic save (flush()) only writes if `Data` changed.  Big stores
+    (JOURNAL_MIN_SIZE) write only the top level items that changed, to
+    an append-only journal file next to the storage file; load()
+    applies the journal and save() (which close() calls) writes the
+    whole file again and removes the journal.
+
+    One thread does the periodic saves of every open Storage.
     """
 
-    def __init__(self, name, root="wrapper-data/json", pickle=True):
-        # type: (str, str, bool) -> None
+    def __init__(self, name, root="wrapper-data/json", pickle=True,
+                 encoding=None):
+        # type: (str, str, bool, str) -> None
         """
         :param name: Name of Storage
         :param root: Path on disk to storage data
         :param pickle: Boolean; Pickle (True) or not (False, use Json)
+        :param encoding: The text encoding.  By default, the General
+         "encoding" of wrapper.properties.json.
 
         """
         self.Data = {}
         self.name = name
         self.root = root
         self.pickle = pickle
-        self.configManager = Config()
-        self.configManager.loadconfig()
         self.log = logging.getLogger('Storage.py')
-        self.encoding = self.configManager.config["General"]["encoding"]
+        if encoding is None:
+            encoding = _configured_encoding()
+        self.encoding = encoding
+        self._protocol = pickle_protocol(encoding)
         self.paused_saving = False
         self.periodic_save_timer = 60
 
@@ -60,26 +147,23 @@ class Storage(object):
             self.file_ext = "pkl"
         else:
             self.file_ext = "json"
+        self.path = "%s/%s.%s" % (self.root, self.name, self.file_ext)
+        self.journal_path = "%s.journal" % self.path
+
+        # what was last written: the Data object, a hash of the whole
+        #  file (small stores) or of each item (journaled stores).  A
+        #  change missed because two hashes collide is still saved by
+        #  save() and close().
+        self._written = None
+        self._digest = None
+        self._digests = None
+        self._journal_size = 0
+        self._lock = threading.RLock()
 
         self.load()
         self.timer = time.time()
         self.abort = False
-
-        t = threading.Thread(target=self._periodicsave, args=())
-        t.daemon = True
-        t.start()
-
-    def _periodicsave(self):
-        # doing it this way (versus just sleep() for certain number of seconds),
-        # allows faster shutdown response
-        while not self.abort:
-            if self.paused_saving:
-                time.sleep(1)
-                continue
-            if time.time() - self.timer > self.periodic_save_timer:
-                self.save()
-                self.timer = time.time()
-            time.sleep(1)
+        _FLUSHER.add(self)
 
     def load(self):
         """
@@ -92,21 +176,39 @@ class Storage(object):
         :return: Nothing
 
         """
-
-        mkdir_p(self.root)
-        if not os.path.exists(
-                        "%s/%s.%s" % (self.root, self.name, self.file_ext)):
-            # load old json storages if there is no pickled
-            # file (and if storage is using pickle)
+        with self._lock:
+            mkdir_p(self.root)
+            if not os.path.exists(self.path):
+                # load old json storages if there is no pickled
+                # file (and if storage is using pickle)
+                if self.pickle:
+                    self.Data = self._json_load()
+                # save to the selected file mode (json or pkl)
+                self.save()
             if self.pickle:
+                self.Data = pickle_load(self.root, "%s.pkl" % self.name)
+            else:
                 self.Data = self._json_load()
-            # save to the selected file mode (json or pkl)
-            self.save()
-        if self.pickle:
-            filenameis = "%s.pkl" % self.name
-            self.Data = pickle_load(self.root, filenameis)
-        else:
-            self.Data = self._json_load()
+            if self._replay_journal():
+                # the file on disk is whole again
+                self.save()
+            else:
+                self._remember(os.path.getsize(self.path))
+
+    def flush(self):
+        """
+        Write what changed since the last write, if anything.
+
+        :returns: True if something was written.
+        """
+        with self._lock:
+            if self.Data is not self._written:
+                # replaced, not changed
+                self.save()
+                return True
+            if self._digests is None:
+                return self._flush_whole()
+            return self._flush_journal()
 
     def save(self):
         """
@@ -115,33 +217,26 @@ class Storage(object):
 
         :return: Nothing
         """
-        if not os.path.exists(self.root):
-            mkdir_p(self.root)
-        if self.pickle:
-            filenameis = "%s.pkl" % self.name
-            pickle_save(self.root, filenameis, self.Data, self.encoding)
-        else:
-            self._json_save()
-
-    def _json_save(self):
-        putcode = putjsonfile(self.Data, self.name, self.root)
-        if not putcode:
-            self.log.exception(
-                "Error encoutered while saving json data:\n'%s/%s.%s'"
-                "\nData Dump:\n%s" % (
-                    self.root, self.name, self.file_ext, self.Data))
-
-    def _json_load(self):
-        try_load = getjsonfile(self.name, self.root, encodedas=self.encoding)
-        if try_load is None:
-            self.log.exception("bad file or data '%s/%s.json'" %
-                               (self.root, self.name))
-            return {}
-        if try_load is False:
-            # file just does not exist (yet); return without comments/errors.
-            return {}
-        else:
-            return try_load
+        with self._lock:
+            if not os.path.exists(self.root):
+                mkdir_p(self.root)
+            if self._digests is not None and self.Data is self._written:
+                # if the rename below does not happen, the journal is
+                #  still as up to date as the file will be.
+                self._flush_journal(compact=False)
+            data = self.Data
+            try:
+                dump = self._dump_whole(data)
+            except TypeError:
+                self.log.exception(
+                    "Error encoutered while saving json data:\n'%s'"
+                    "\nData Dump:\n%s" % (self.path, data))
+                return
+            write_atomic(self.path, dump)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._written = data
+            self._remember(len(dump), dump)
 
     def close(self):
         """
@@ -150,4 +245,156 @@ class Storage(object):
         :return: Nothing
         """
         self.abort = True
+        _FLUSHER.remove(self)
         self.save()
+
+    def _dump_whole(self, data):
+        if self.pickle:
+            return Pickle.dumps(data, self._protocol)
+        return _to_bytes(json.dumps(data, ensure_ascii=False, indent=2,
+                                    sort_keys=True))
+
+    def _dump_item(self, value):
+        if self.pickle:
+            return Pickle.dumps(value, self._protocol)
+        return _to_bytes(json.dumps(value, ensure_ascii=False,
+                                    sort_keys=True))
+
+    def _remember(self, size, dump=None):
+        """
+        Note what is on disk now, `size` bytes (`dump`, if known), to
+         find changes later.
+        """
+        self._written = self.Data
+        self._journal_size = 0
+        if size < JOURNAL_MIN_SIZE:
+            self._digests = None
+            if dump is None:
+                try:
+                    dump = self._dump_whole(self.Data)
+                except TypeError:
+                    dump = b""
+            self._digest = hash(dump)
+            return
+        self._digest = None
+        self._digests = {}
+        for key, value in list(self.Data.items()):
+            try:
+                self._digests[key] = hash(self._dump_item(value))
+            except TypeError:
+                # never matches, so it is written next time
+                self._digests[key] = None
+
+    def _flush_whole(self):
+        try:
+            dump = self._dump_whole(self.Data)
+        except TypeError:
+            self.log.exception(
+                "Error encoutered while saving json data:\n'%s'"
+                "\nData Dump:\n%s" % (self.path, self.Data))
+            return False
+        digest = hash(dump)
+        if digest == self._digest:
+            return False
+        write_atomic(self.path, dump)
+        self._remember(len(dump), dump)
+        return True
+
+    def _flush_journal(self, compact=True):
+        data = self.Data
+        digests = self._digests
+        records = []
+        # remembered once the records are written
+        changed = {}
+        for key, value in list(data.items()):
+            try:
+                digest = hash(self._dump_item(value))
+            except TypeError:
+                self.log.exception("Error encoutered while saving item"
+                                   " '%s' of '%s'", key, self.path)
+                continue
+            if digests.get(key) != digest:
+                records.append(self._record(key, value))
+                changed[key] = digest
+        deleted = [key for key in digests if key not in data]
+        for key in deleted:
+            records.append(self._record(key))
+        if not records:
+            return False
+        with open(self.journal_path, "ab") as f:
+            for record in records:
+                f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+            self._journal_size = f.tell()
+        digests.update(changed)
+        for key in deleted:
+            del digests[key]
+        if compact and self._journal_size > max(
+                COMPACT_MIN_SIZE, os.path.getsize(self.path)):
+            self.save()
+        return True
+
+    def _record(self, key, *value):
+        """ A journal record: set `key` to `value`, or delete `key`. """
+        if self.pickle:
+            return Pickle.dumps((key,) + value,
+                                self._protocol)
+        return _to_bytes(json.dumps([key] + list(value), ensure_ascii=False,
+                                    sort_keys=True)) + b"\n"
+
+    def _replay_journal(self):
+        """
+        Apply the journal to `Data`.  A record cut short (by a crash
+         while writing it) ends the journal.
+
+        :returns: True if there was a journal.
+        """
+        if not os.path.exists(self.journal_path):
+            return False
+        count = 0
+        with open(self.journal_path, "rb") as f:
+            while True:
+                try:
+                    if self.pickle:
+                        record = Pickle.load(f)
+                    else:
+                        line = f.readline()
+                        if not line:
+                            break
+                        record = json.loads(line.decode("utf-8"))
+                except EOFError:
+                    break
+                except Exception as e:
+                    self.log.warning("Storage journal '%s' ends in a bad"
+                                     " record after %d records: %s",
+                                     self.journal_path, count, e)
+                    break
+                if len(record) > 1:
+                    self.Data[record[0]] = record[1]
+                else:
+                    self.Data.pop(record[0], None)
+                count += 1
+        self.log.debug("Applied %d records of storage journal '%s'",
+                       count, self.journal_path)
+        return True
+
+    def _json_load(self):
+        path = "%s/%s.json" % (self.root, self.name)
+        if not os.path.exists(path):
+            # file just does not exist (yet); return without comments/errors.
+            mkdir_p(self.root)
+            return {}
+        with open(path, "rb") as f:
+            data = f.read()
+        # written as UTF-8, like the journal; older wrappers wrote it in
+        #  the system's encoding.
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            text = data.decode(locale.getpreferredencoding(False), "replace")
+        try:
+            return json.loads(text)
+        except ValueError:
+            self.log.exception("bad file or data '%s'" % path)
+            return {}
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+The server's tick rate (TPS) and latency, as wrapper sees them.
+
+Three signals are kept, each in a fixed size TimeSeries:
+
+- ticks: the server sends every player a time update (with the age of
+  the world in ticks) every 20 ticks.  The ticks the world aged between
+  two updates, over the (wall clock) time between them, is the tick
+  rate; it is kept as milliseconds per tick.
+- ping: the round trip time of the proxy's keep alives to the clients.
+- lag: the "Can't keep up!" lines of the server console, as the
+  milliseconds the server says it is behind.
+
+report() sums these up over the last so many seconds.
+"""
+
+import re
+import threading
+import time
+from array import array
+
+from core.profiler import percentile
+
+# samples kept per signal (an hour of time updates)
+WINDOW = 3600
+# a tick sample spans at least this many ticks (some servers send the
+#  players' time updates on different ticks)
+MIN_TICKS = 20
+# seconds between time updates past which the ticks are not counted
+#  (no one was online, or the server restarted)
+MAX_GAP = 30.0
+# normal ticks per second
+TPS = 20
+
+_LAG_LINE = re.compile(r"Running (\d+)ms or (\d+) ticks behind")
+
+
+class TimeSeries(object):
+    """ The last `size` (time, value) samples, in two arrays. """
+
+    def __init__(self, size=WINDOW):
+        self.size = size
+        self.times = array("d", [0.0]) * size
+        self.values = array("d", [0.0]) * size
+        # samples ever added
+        self.count = 0
+
+    def add(self, when, value):
+        index = self.count % self.size
+        self.times[index] = when
+        self.values[index] = value
+        self.count += 1
+
+    def since(self, when):
+        """ :returns: a list of the values added at `when` or later. """
+        values = []
+        index = self.count
+        oldest = max(0, self.count - self.size)
+        while index > oldest:
+            index -= 1
+            if self.times[index % self.size] < when:
+                break
+            values.append(self.values[index % self.size])
+        return values
+
+    def last(self):
+        """ :returns: the last (time, value) added, or None. """
+        if not self.count:
+            return None
+        index = (self.count - 1) % self.size
+        return self.times[index], self.values[index]
+
+    def clear(self):
+        self.count = 0
+
+
+class TickMonitor(object):
+    """
+    :param size: samples kept per signal.
+    """
+    def __init__(self, size=WINDOW):
+        self.ticks = TimeSeries(size)
+        self.ping = TimeSeries(size)
+        self.lag = TimeSeries(size)
+        # (world age, time) of the time update the next sample starts at
+        self._start = None
+        self._lock = threading.Lock()
+
+    def time_update(self, worldage, now=None):
+        """ Note a time update of the server (of any player). """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            start = self._start
+            if start is None or worldage < start[0] or (
+                    now - start[1] > MAX_GAP):
+                self._start = (worldage, now)
+                return
+            ticks = worldage - start[0]
+            if ticks < MIN_TICKS:
+                # (the same update sent to another player, too)
+                return
+            self.ticks.add(now, (now - start[1]) * 1000.0 / ticks)
+            self._start = (worldage, now)
+
+    def keep_alive(self, seconds, now=None):
+        """ Note a keep alive round trip of `seconds`. """
+        with self._lock:
+            self.ping.add(now or time.time(), seconds * 1000.0)
+
+    def console_lag(self, line, now=None):
+        """ Note a "Can't keep up!" console line. """
+        found = _LAG_LINE.search(line)
+        behind = float(found.group(1)) if found else 0.0
+        with self._lock:
+            self.lag.add(now or time.time(), behind)
+
+    def reset(self):
+        """ Forget the samples (a new server is starting). """
+        with self._lock:
+            self._start = None
+            self.ticks.clear()
+            self.ping.clear()
+            self.lag.clear()
+
+    def report(self, seconds=60):
+        """
+        :param seconds: sum up the samples of this many seconds.
+        :returns: a dict of the tick rate ("tps", "tps_min"; None until
+         there are samples), the milliseconds per tick ("tick_ms"), the
+         keep alive round trips ("ping_ms"), each a dict of percentiles
+         ("p50", "p95", "p99", "max"), and "lag", the "Can't keep up!"
+         lines ("count" and milliseconds "behind" in all).
+        """
+        now = time.time()
+        since = now - seconds
+        with self._lock:
+            ticks = sorted(self.ticks.since(since))
+            ping = sorted(self.ping.since(since))
+            lag = self.lag.since(since)
+            updated = self.ticks.last()
+        tps = tps_min = None
+        if ticks:
+            tps = min(TPS, 1000.0 / (sum(ticks) / len(ticks)))
+            tps_min = min(TPS, 1000.0 / ticks[-1])
+        return {"seconds": seconds,
+                "tps": tps,
+                "tps_min": tps_min,
+                "tick_ms": _summary(ticks),
+                "ping_ms": _summary(ping),
+                "lag": {"count": len(lag), "behind": sum(lag)},
+                "updated": updated[0] if updated else None}
+
+
+def _summary(ordered):
+    return {"samples": len(ordered),
+            "p50": percentile(ordered, 0.50),
+            "p95": percentile(ordered, 0.95),
+            "p99": percentile(ordered, 0.99),
+            "max": ordered[-1] if ordered else 0}
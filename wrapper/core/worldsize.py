@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+The size of the world folder, kept up to date without walking it all.
+
+The folder is scanned once.  After that, refresh() looks at:
+
+- every directory's modification time; only a directory that changed
+  (files were added, removed or renamed in it) is listed again.
+- the files written to in the last HOT_SECONDS (the region files of
+  the areas being played), which are stat()ed each time.
+- a 1/COLD_PASSES slice of the other files, in turn, so a file changed
+  in place long after it was last written is caught within COLD_PASSES
+  refreshes.
+
+Totals are kept per dimension as files change, so the total and the
+per dimension sizes cost nothing to read; regions() lists the region
+(.mca) files' sizes from what is already known.
+"""
+
+import os
+import stat
+import threading
+import time
+
+# os.scandir is not in the standard library of Python 2
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = False
+
+# seconds between refreshes
+REFRESH_INTERVAL = 60
+# files written to in this many seconds are stat()ed at every refresh
+HOT_SECONDS = 3600
+# refreshes it takes to stat() all the other files (an hour of them)
+COLD_PASSES = 60
+
+OVERWORLD = "overworld"
+
+# file record fields
+SIZE, MTIME, DIMENSION = range(3)
+
+
+def dimension_of(path):
+    """
+    :param path: a path in the world folder ("/" separated).
+    :returns: the dimension the path belongs to: "overworld", the
+     "DIM<n>" folder of the older (and Bukkit) worlds, or the
+     "<namespace>:<name>" of a 1.16+ "dimensions/" folder.
+    """
+    parts = path.split("/")
+    if parts[0].startswith("DIM") and len(parts) > 1:
+        return parts[0]
+    if parts[0] == "dimensions" and len(parts) > 3:
+        return "%s:%s" % (parts[1], parts[2])
+    return OVERWORLD
+
+
+class WorldSize(object):
+    """
+    :param log: logger.
+    :param root: the world folder.
+    """
+    def __init__(self, log, root):
+        self.log = log
+        self.root = root
+        self.scanned = False
+        self.total = 0
+        # dimension: bytes
+        self.dimensions = {}
+        # path: [size, mtime, dimension]
+        self.files = {}
+        # directory path: (mtime, set of file names, set of dir names)
+        self.dirs = {}
+        # the files not stat()ed at every refresh, and where the next
+        #  slice of them starts
+        self._cold = []
+        self._cold_at = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """ Bring the sizes up to date (scan the world the first time). """
+        if not self.scanned:
+            started = time.time()
+            self._scan_dir("")
+            self.scanned = True
+            self.log.debug("Scanned '%s' (%d files, %d bytes) in %.1fs",
+                           self.root, len(self.files), self.total,
+                           time.time() - started)
+            return
+        for path in list(self.dirs):
+            if path not in self.dirs:
+                # removed along with its parent
+                continue
+            try:
+                mtime = os.stat(self._full(path)).st_mtime
+            except OSError:
+                if path:
+                    self._drop_dir(path)
+                continue
+            if mtime != self.dirs[path][0]:
+                self._scan_dir(path)
+        now = time.time()
+        if self._cold_at >= len(self._cold):
+            self._cold = [path for path, record in self.files.items()
+                          if now - record[MTIME] >= HOT_SECONDS]
+            self._cold_at = 0
+        step = len(self._cold) // COLD_PASSES + 1
+        cold = self._cold[self._cold_at:self._cold_at + step]
+        self._cold_at += step
+        hot = [path for path, record in self.files.items()
+               if now - record[MTIME] < HOT_SECONDS]
+        for path in hot + cold:
+            if path not in self.files:
+                continue
+            try:
+                info = os.stat(self._full(path))
+            except OSError:
+                # removed; its directory's listing drops it
+                continue
+            self._set_file(path, info.st_size, info.st_mtime)
+
+    def regions(self, dimension=None):
+        """
+        :param dimension: only the region files of this dimension.
+        :returns: a dict of the region files' {path: size}.
+        """
+        with self._lock:
+            return dict((path, record[SIZE])
+                        for path, record in self.files.items()
+                        if path.endswith(".mca") and (
+                            dimension is None or
+                            record[DIMENSION] == dimension))
+
+    def report(self):
+        """ :returns: {"total": bytes, "dimensions": {name: bytes}}. """
+        with self._lock:
+            return {"total": self.total, "dimensions": dict(self.dimensions)}
+
+    def _full(self, path):
+        if not path:
+            return self.root
+        return "%s/%s" % (self.root, path)
+
+    def _scan_dir(self, path):
+        """ List directory `path` (again), scanning new subdirectories. """
+        full = self._full(path)
+        try:
+            mtime = os.stat(full).st_mtime
+            entries = self._list(full)
+        except OSError as e:
+            self.log.debug("Could not list '%s' (%s)", full, e)
+            return
+        old = self.dirs.get(path)
+        old_files, old_dirs = (old[1], old[2]) if old else (set(), set())
+        files = set()
+        dirs = set()
+        for name, is_dir, size, file_mtime in entries:
+            child = "%s/%s" % (path, name) if path else name
+            if is_dir:
+                dirs.add(name)
+                if name not in old_dirs:
+                    self._scan_dir(child)
+            else:
+                files.add(name)
+                self._set_file(child, size, file_mtime)
+        for name in old_files - files:
+            self._drop_file("%s/%s" % (path, name) if path else name)
+        for name in old_dirs - dirs:
+            self._drop_dir("%s/%s" % (path, name) if path else name)
+        self.dirs[path] = (mtime, files, dirs)
+
+    @staticmethod
+    def _list(full):
+        """ :returns: a list of (name, is a dir, size, mtime). """
+        entries = []
+        if scandir:
+            for entry in scandir(full):
+                if entry.is_dir(follow_symlinks=False):
+                    entries.append((entry.name, True, 0, 0))
+                    continue
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.name, False, info.st_size,
+                                info.st_mtime))
+            return entries
+        for name in os.listdir(full):
+            try:
+                info = os.lstat(os.path.join(full, name))
+                if stat.S_ISDIR(info.st_mode):
+                    entries.append((name, True, 0, 0))
+                    continue
+                if stat.S_ISLNK(info.st_mode):
+                    info = os.stat(os.path.join(full, name))
+            except OSError:
+                continue
+            entries.append((name, False, info.st_size, info.st_mtime))
+        return entries
+
+    def _set_file(self, path, size, mtime):
+        with self._lock:
+            record = self.files.get(path)
+            if record is None:
+                record = self.files[path] = [0, mtime, dimension_of(path)]
+            change = size - record[SIZE]
+            record[SIZE] = size
+            record[MTIME] = mtime
+            if change:
+                self.total += change
+                self.dimensions[record[DIMENSION]] = self.dimensions.get(
+                    record[DIMENSION], 0) + change
+
+    def _drop_file(self, path):
+        with self._lock:
+            record = self.files.pop(path, None)
+            if record is None:
+                return
+            self.total -= record[SIZE]
+            dimension = record[DIMENSION]
+            # (no total yet if all its files were empty)
+            left = self.dimensions.get(dimension, 0) - record[SIZE]
+            if left:
+                self.dimensions[dimension] = left
+            else:
+                self.dimensions.pop(dimension, None)
+
+    def _drop_dir(self, path):
+        old = self.dirs.pop(path, None)
+        if old is None:
+            return
+        for name in old[1]:
+            self._drop_file("%s/%s" % (path, name))
+        for name in old[2]:
+            self._drop_dir("%s/%s" % (path, name))
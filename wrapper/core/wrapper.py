@@ -47,7 +47,9 @@ from core.mcserver import MCServer
 from core.plugins import Plugins
 from core.commands import Commands
 from core.events import Events
+from core.profiler import PluginProfiler
 from core.storage import Storage
+from core.playerdata import PlayerData, PLAYTIME_INTERVAL
 from core.irc import IRC
 from core.scripts import Scripts
 import core.buildinfo as buildinfo
@@ -199,6 +201,9 @@ class Wrapper(object):
         self.wrapper_permissions = Storage("permissions", pickle=False)
         self.wrapper_usercache = Storage("usercache", pickle=False)
 
+        # login records and play time of the players online
+        self.playerdata = PlayerData(self.log, encoding=self.encoding)
+
         # storage Data objects
         self.storage = self.wrapper_storage.Data
         self.usercache = self.wrapper_usercache.Data
@@ -206,6 +211,10 @@ class Wrapper(object):
 
         # core functions and datasets
         self.perms = Permissions(self)
+        # times plugin events and commands
+        self.profiler = PluginProfiler(
+            self.log, self.config["General"]["plugin-profiling"],
+            self.config["General"]["slow-plugin-ms"])
         self.uuids = UUIDS(self.log, self.usercache)
         self.plugins = Plugins(self)
         self.commands = Commands(self)
@@ -312,16 +321,18 @@ class Wrapper(object):
         consoledaemon.daemon = True
         consoledaemon.start()
 
-        # Timer runs while not wrapper.halt.halt
-        ts = threading.Thread(target=self.event_timer_second, args=())
-        ts.daemon = True
-        ts.start()
+        # Timers run until wrapper halts (and stops the scheduler)
+        self.events.scheduler.schedule(1, self.event_timer_second,
+                                       interval=1, owner="Wrapper.py")
 
         if self.use_timer_tick_event:
-            # Timer runs while not wrapper.halt.halt
-            tt = threading.Thread(target=self.event_timer_tick, args=())
-            tt.daemon = True
-            tt.start()
+            self.events.scheduler.schedule(0.05, self.event_timer_tick,
+                                           interval=0.05, owner="Wrapper.py")
+
+        self.events.scheduler.schedule(PLAYTIME_INTERVAL,
+                                       self.playerdata.update,
+                                       interval=PLAYTIME_INTERVAL,
+                                       owner="Wrapper.py")
 
         if self.config["General"]["shell-scripts"]:
             if os.name in ("posix", "mac"):
@@ -353,6 +364,7 @@ class Wrapper(object):
 
         self.plugins.disableplugins()
         self.log.info("Plugins disabled")
+        self.playerdata.close()
         self.wrapper_storage.close()
         self.wrapper_permissions.close()
         self.wrapper_usercache.close()
@@ -406,6 +418,7 @@ class Wrapper(object):
         if self.servervitals.state in (1, 2):
             self.javaserver.stop(self.halt_message, restart_the_server=False)
         self.haltsig.halt = True
+        self.events.stop()
 
     def shutdown(self):
         self._halt()
@@ -852,6 +865,7 @@ class Wrapper(object):
                            "dependencies for encryption!")
             self.disable_proxymode()
             return
+        self.proxy.commands = self.commands
 
         # wait for server to start
         timer = 0
@@ -1051,46 +1065,43 @@ class Wrapper(object):
             return False
 
     def event_timer_second(self):
-        while not self.haltsig.halt:
-            time.sleep(1)
-            self.events.callevent("timer.second", None, abortable=False)
-            """ eventdoc
-                <group> wrapper <group>
+        self.events.callevent("timer.second", None, abortable=False)
+        """ eventdoc
+            <group> wrapper <group>
 
-                <description> a timer that is called each second.  Do
-                <sp> not rely on these events to happen 'on-time'!  They
-                <sp> can be delayed based on their position the queue, as 
-                <sp> well as the total number of timer.second events being 
-                <sp> called.                
-                <description>
+            <description> a timer that is called each second.  Do
+            <sp> not rely on these events to happen 'on-time'!  They
+            <sp> can be delayed based on their position the queue, as 
+            <sp> well as the total number of timer.second events being 
+            <sp> called.  To run something on a schedule, use
+            <sp> `api.scheduleRepeating()` instead.
+            <description>
 
-                <abortable> No <abortable>
+            <abortable> No <abortable>
 
-            """
+        """
 
     def event_timer_tick(self):
-        while not self.haltsig.halt:
-            self.events.callevent("timer.tick", None, abortable=False)
-            time.sleep(0.05)
-            """ eventdoc
-                <group> wrapper <group>
+        self.events.callevent("timer.tick", None, abortable=False)
+        """ eventdoc
+            <group> wrapper <group>
 
-                <description> a timer that is called each 1/20th
-                <sp> of a second, like a minecraft tick.
-                <description>
+            <description> a timer that is called each 1/20th
+            <sp> of a second, like a minecraft tick.
+            <description>
 
-                <abortable> No <abortable>
+            <abortable> No <abortable>
 
-                <comments>
-                Use of this timer is deprecated and is turned off
-                <sp> by default in the wrapper.config.json file.  the final 
-                <sp> wrapper version 1.0 final will not support this timer. Its
-                <sp> use in wrapper has always been a bad idea. Starting with
-                <sp> wrapper 1.0.9 RC 12, this timer will be somewhat buggy,
-                <sp> running two or more ticks behind.
-                <comments>
+            <comments>
+            Use of this timer is deprecated and is turned off
+            <sp> by default in the wrapper.config.json file.  the final 
+            <sp> wrapper version 1.0 final will not support this timer. Its
+            <sp> use in wrapper has always been a bad idea. Starting with
+            <sp> wrapper 1.0.9 RC 12, this timer will be somewhat buggy,
+            <sp> running two or more ticks behind.
+            <comments>
 
-            """
+        """
 
     def backups_running(self):
         return self._backup_progress()
@@ -1206,6 +1217,15 @@ class Wrapper(object):
             self.log.info(
                 "Server Memory Usage: %s %s (%s bytes)" % (
                     amount, units, get_bytes))
+            last = self.javaserver.sampler.latest()
+            if last:
+                read, read_units = format_bytes(last["read"])
+                write, write_units = format_bytes(last["write"])
+                self.log.info(
+                    "Server CPU: %.0f%%, %d threads, %d open files, disk "
+                    "read %s %s/s, write %s %s/s", last["cpu"],
+                    last["threads"], last["fds"], read, read_units, write,
+                    write_units)
 
     def _raw(self, console_input):
         try:
@@ -89,28 +89,15 @@ class Web(object):
 
         self.consoleScrollback = []
         self.chatScrollback = []
-        self.memoryGraph = []
         self.loginAttempts = 0
         self.lastAttempt = 0
         self.disableLogins = 0
         self.props = ""
         self.propsCount = 0
-        # t = threading.Thread(target=self.update_graph, args=())
-        # t.daemon = True
-        # t.start()
 
     # ================ Start  and Run code section ================
     # ordered by the time they are referenced in the code.
 
-    # def update_graph(self):
-    #     while not self.wrapper.haltsig.halt:
-    #         while len(self.memoryGraph) > 200:
-    #             del self.memoryGraph[0]
-    #         if self.wrapper.javaserver.getmemoryusage():
-    #             self.memoryGraph.append(
-    #                 [time.time(), self.wrapper.javaserver.getmemoryusage()])
-    #        time.sleep(1)
-
     def wrap(self):
         """ Wrapper starts excution here (via a thread). """
         if not pkg_resources:
@@ -735,10 +722,9 @@ class Client(object):
             for line in self.web.chatScrollback:
                 if line[0] > last_refresh:
                     chat_scrollback.append(line[1])
-            memory_graph = []
-            for line in self.web.memoryGraph:
-                if line[0] > last_refresh:
-                    memory_graph.append(line[1])
+            # (the samples since the last refresh, an hour at most)
+            memory_graph = self.wrapper.javaserver.sampler.history(
+                min(3600, max(0, refresh_time - last_refresh)))["rss"]
 
             mem_use = self.wrapper.memory_usage()
             wrapper_peak_mem = mem_use["peak"] * 1000
@@ -765,6 +751,55 @@ class Client(object):
                      }
             return stats
 
+        if action == "proxy_stats":
+            if not self.web.validate_key(argdict["key"]):
+                return EOFError
+            if not self.wrapper.proxymode:
+                return False
+            try:
+                top = int(argdict["top"])
+            except (KeyError, ValueError):
+                top = 50
+            return self.wrapper.proxy.traffic.snapshot(
+                self.wrapper.servervitals.protocolVersion, top)
+
+        if action == "plugin_profile":
+            if not self.web.validate_key(argdict["key"]):
+                return EOFError
+            profiler = self.wrapper.profiler
+            try:
+                top = int(argdict["top"])
+            except (KeyError, ValueError):
+                top = None
+            return {"enabled": profiler.enabled,
+                    "since": profiler.since,
+                    "slow_calls": profiler.slow_calls,
+                    "calls": profiler.report(top, argdict.get("plugin"))}
+
+        if action == "server_resources":
+            if not self.web.validate_key(argdict["key"]):
+                return EOFError
+            if not self.wrapper.javaserver:
+                return
+            sampler = self.wrapper.javaserver.sampler
+            try:
+                seconds = float(argdict["seconds"])
+            except (KeyError, ValueError):
+                seconds = 0
+            if not seconds:
+                return {"latest": sampler.latest()}
+            return {"latest": sampler.latest(),
+                    "history": sampler.history(seconds)}
+
+        if action == "server_ticks":
+            if not self.web.validate_key(argdict["key"]):
+                return EOFError
+            try:
+                seconds = int(argdict["seconds"])
+            except (KeyError, ValueError):
+                seconds = 60
+            return self.wrapper.servervitals.ticks.report(seconds)
+
         if action == "console":
             if not self.web.validate_key(argdict["key"]):
                 return EOFError
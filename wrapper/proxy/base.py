@@ -6,21 +6,27 @@
 # General Public License, version 3 or later.
 from __future__ import absolute_import
 
-import base64
+import os
 import socket
 import threading
 import time
 import json
-import requests
 
 # imports that are still dependent upon wrapper:
-from api.helpers import getjsonfile, putjsonfile, find_in_json
-from api.helpers import epoch_to_timestr, read_timestr
-from api.helpers import isipv4address
+from api.helpers import epoch_to_timestr
+from api.helpers import isipv4address, processcolorcodes
 from utils.py23 import py_str
 from proxy.utils.constants import *
 
 from proxy.utils import mcuuid
+from proxy.utils import eventloop
+from proxy.utils.authenticator import SessionVerifier, SESSION_SERVER
+from proxy.utils.banlists import ServerList
+from proxy.utils.skins import SkinCache
+from proxy.utils.trafficstats import TrafficStats
+from proxy.utils.statusresponder import PingThrottle, StatusResponder, \
+    pack_varint
+from proxy.utils import statusresponder
 from proxy.entity.entitycontrol import EntityControl
 
 # encryption requires 'cryptography' package.
@@ -87,14 +93,28 @@ class HaltSig(object):
 class ProxyConfig(object):
     def __init__(self):
         self.proxy = {
+            "auth-queue-size": 100,
+            "auth-timeout": 5,
+            "auth-workers": 4,
             "auto-name-changes": True,
+            "connection-rate-limit": 30,
+            "flush-coalesce-ms": 2,
+            "flush-max-batch": 65536,
             "hidden-ops": [],
             "max-players": 1024,
             "online-mode": True,
+            "packet-capture": False,
+            "packet-capture-dir": "wrapper-data/captures",
+            "packet-stats": False,
             "proxy-bind": "0.0.0.0",
             "proxy-enabled": True,
+            "proxy-engine": "threaded",
+            "proxy-event-loops": 1,
             "proxy-port": 25570,
+            "session-server": SESSION_SERVER,
             "silent-ipban": True,
+            "skin-cache-memory": 64,
+            "skin-cache-size": 2000,
         }
         self.entity = {
             "enable-entity-controls": False,
@@ -116,8 +136,10 @@ class ServerVitals(object):
         self.server_port = "25564"
         self.command_prefix = "/"
         self.players = playerobjects
+        self.status_generation = 0
         self.entity_control = None
         self.timeofday = -1
+        self.ticks = TickMonitor()  # core.tickmonitor
         self.spammy_stuff = ["found nothing", "vehicle of", "Wrong location!",
                              "Tried to add entity", ]
         self.clients = []
@@ -160,6 +182,8 @@ class Proxy(object):
         self.usercache = usercache_object.Data
         self.usercache_obj = usercache_object
         self.eventhandler = eventhandler
+        # wrapper's Commands (set by the wrapper), for tab completion
+        self.commands = None
         self.uuids = mcuuid.UUIDS(self.log, self.usercache)
 
         # termsignal is an object with a `halt` property set to True/False
@@ -181,9 +205,57 @@ class Proxy(object):
         self.proxy_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.usingSocket = False
 
+        # "eventloop" proxy-engine - clients are served by a fixed pool
+        # of EventLoops instead of their own threads.
+        self.loops = []
+        self._loop_index = 0
+        self.engine = self.config.get("proxy-engine", "threaded")
+        if self.engine == "eventloop" and not eventloop.selectors:
+            self.log.warning("The 'eventloop' proxy-engine requires the "
+                             "`selectors` module (Python 3.4+).  Using "
+                             "the 'threaded' proxy-engine.")
+            self.engine = "threaded"
+
+        # online mode logins are verified with the session server by a
+        # pool of workers.
+        self.authenticator = SessionVerifier(
+            self.log,
+            url=self.config.get("session-server", SESSION_SERVER),
+            workers=int(self.config.get("auth-workers", 4)),
+            timeout=self.config.get("auth-timeout", 5),
+            max_queue=int(self.config.get("auth-queue-size", 100)))
+
+        # server list pings are answered by a StatusResponder (if the
+        # `selectors` module is available) from a cached status response.
+        self.status_responder = None
+        self._status_cache = (None, {})
+        self.ping_throttle = PingThrottle(
+            self.config.get("connection-rate-limit", 30))
+
+        # uuid: base64 "textures" property of the player's profile
         self.skins = {}
-        self.skinTextures = {}
+        # skin textures (for the web panel), by texture hash
+        defaultskin = None
+        if pkg_resources:
+            defaultskin = pkg_resources.resource_stream(
+                __name__, "./utils/skin.png").read()
+        self.skin_cache = SkinCache(
+            self.log, max_disk=int(self.config.get("skin-cache-size", 2000)),
+            max_memory=int(self.config.get("skin-cache-memory", 64)),
+            default=defaultskin)
         self.uuidTranslate = {}
+        # the server's ban lists, indexed in memory
+        scheduler = getattr(self.eventhandler, "scheduler", None)
+        self.banned_players = ServerList(
+            self.log, os.path.join(self.srv_data.serverpath,
+                                   "banned-players.json"),
+            ("uuid", "name"), scheduler)
+        self.banned_ips = ServerList(
+            self.log, os.path.join(self.srv_data.serverpath,
+                                   "banned-ips.json"),
+            ("ip",), scheduler)
+        # per packet type traffic statistics ("packet-stats")
+        self.traffic = TrafficStats(self.config.get("packet-stats", False))
         # define the slot once here and not at each clients Instantiation:
         self.inv_slots = list(range(46))
         self.entity_control = None
@@ -246,6 +318,14 @@ class Proxy(object):
         # proxy now up and running, bound to server port.
         self.entity_control = EntityControl(self)
 
+        if self.engine == "eventloop":
+            self._start_loops()
+        self.authenticator.start()
+        self.skin_cache.start()
+        if statusresponder.selectors:
+            self.status_responder = StatusResponder(self, self._start_client)
+            self.status_responder.start()
+
         # accept clients and start their threads
         while not (self.abort or self.caller.halt):
             try:
@@ -263,19 +343,133 @@ class Proxy(object):
                               " %s  (connection refused)", addr)
                 continue
 
-            # spur off client thread
-            # self.server_temp = ServerConnection(self, ip, port)
-            client = Client(self, sock, addr, banned=banned_ip)
-            t = threading.Thread(target=client.handle, args=())
-            t.daemon = True
-            t.start()
+            if self.status_responder and not banned_ip:
+                # answers server list pings; passes anything else on to
+                # _start_client().
+                self.status_responder.add(sock, addr)
+                continue
+            self._start_client(sock, addr, banned=banned_ip)
+
+        for loop in self.loops:
+            loop.stop()
+        if self.status_responder:
+            self.status_responder.stop()
+        self.authenticator.stop()
+        self.skin_cache.stop()
+        self.banned_players.flush()
+        self.banned_ips.flush()
+
+    def _start_client(self, sock, addr, data=b"", banned=False):
+        """
+        Start a Client for a new connection.
+
+        :param data: anything already read from `sock`.
+        """
+        # spur off client thread
+        # self.server_temp = ServerConnection(self, ip, port)
+        client = Client(self, sock, addr, banned=banned)
+        if data:
+            client.packet.recvbuf.feed(data)
+        if self.loops:
+            client.handle_on_loop(self._next_loop())
+            return
+        t = threading.Thread(target=client.handle, args=())
+        t.daemon = True
+        t.start()
+
+    def status_response(self, protocol):
+        """
+        The server list status response (MOTD, players, icon...) for a
+        client using `protocol`.  Built once and cached until something
+        it shows changes (see `srv_data.status_generation`).
+
+        :returns: (payload, frame) - the status response packet, and the
+         same packet framed for an uncompressed and unencrypted socket.
+        """
+        srv_data = self.srv_data
+        signature = (srv_data.status_generation, len(srv_data.players),
+                     srv_data.motd, srv_data.serverIcon,
+                     srv_data.protocolVersion, srv_data.version,
+                     self.config["max-players"], self.forge)
+        cached_signature, responses = self._status_cache
+        if cached_signature != signature:
+            responses = {}
+            self._status_cache = (signature, responses)
+
+        colorcodes = protocol >= PROTOCOL_1_8START
+        response = responses.get(colorcodes)
+        if response is None:
+            motd = json.dumps(self._build_status(colorcodes)).encode("utf-8")
+            payload = (pack_varint(0x00) +  # PING_JSON_RESPONSE
+                       pack_varint(len(motd)) + motd)
+            response = (payload, pack_varint(len(payload)) + payload)
+            responses[colorcodes] = response
+        return response
+
+    def _build_status(self, colorcodes):
+        sample = []
+        for player in self.srv_data.players:
+            playerobj = self.srv_data.players[player]
+            if playerobj.username not in self.config["hidden-ops"]:
+                sample.append({"name": playerobj.username,
+                               "id": str(playerobj.mojangUuid)})
+            if len(sample) > 5:
+                break
+        reported_version = self.srv_data.protocolVersion
+        reported_name = self.srv_data.version
+        motdtext = self.srv_data.motd
+        if colorcodes:
+            motdtext = processcolorcodes(motdtext.replace(
+                "\\", ""))
+        motd = {
+            "description": motdtext,
+            "players": {
+                "max": int(self.config["max-players"]),
+                "online": len(self.srv_data.players),
+                "sample": sample
+            },
+            "version": {
+                "name": reported_name,
+                "protocol": reported_version
+            }
+        }
+
+        # add Favicon, if it exists
+        if self.srv_data.serverIcon:
+            motd["favicon"] = py_str(self.srv_data.serverIcon,
+                                     self.encoding)
+
+        # add Forge information, if applicable.
+        if self.forge:
+            motd["modinfo"] = self.mod_info["modinfo"]
+        return motd
+
+    def _start_loops(self):
+        """ Start the "eventloop" proxy-engine's EventLoops. """
+        count = max(1, int(self.config.get("proxy-event-loops", 1)))
+        flush_rate = self.config.get("flush-rate-ms", 50) / 1000.0
+        for number in range(count):
+            loop = eventloop.EventLoop(
+                self, name="ProxyLoop-%d" % number, flush_rate=flush_rate)
+            loop.start()
+            self.loops.append(loop)
+        self.log.info("Proxy is using the 'eventloop' proxy-engine (%d "
+                      "loop(s)).", count)
+
+    def _next_loop(self):
+        """ Pick the EventLoop for a new client (round robin). """
+        loop = self.loops[self._loop_index % len(self.loops)]
+        self._loop_index += 1
+        return loop
 
     def removestaleclients(self):
         """removes aborted client and player objects"""
         for i, client in enumerate(self.srv_data.clients):
             if self.srv_data.clients[i].abort:
                 if self.srv_data.clients[i].username in self.srv_data.players:
-                    del self.srv_data.players[self.srv_data.clients[i].username]
+                    self.srv_data.players.pop(
+                        self.srv_data.clients[i].username)._logout()
+                    self.srv_data.status_generation += 1
                 self.srv_data.clients.pop(i)
 
     def pollserver(self, host="localhost", port=None):
@@ -355,6 +549,7 @@ class Proxy(object):
             self.srv_data.serverpath, self.srv_data.worldname)
         self.uuids.convert_files(old_local_uuid, new_local_uuid, cwd)
         self.usercache[realuuid]["localname"] = newname
+        self.uuids.index.add(realuuid)
         client.info["username"] = newname
         client.username = newname
         self.usercache_obj.save()
@@ -398,9 +593,8 @@ class Proxy(object):
         :param uuid: uuid of player as string
         :return: string representing ban reason
         """
-        banlist = getjsonfile("banned-players", self.srv_data.serverpath)
-        if banlist:
-            banrecord = find_in_json(banlist, "uuid", uuid)
+        banrecord = self.banned_players.get("uuid", str(uuid))
+        if banrecord:
             return "%s by %s" % (banrecord["reason"], banrecord["source"])
         return "Banned by server"
 
@@ -418,39 +612,15 @@ class Proxy(object):
 
         This probably only works on 1.7.10 servers or later
         """
-        banlist = getjsonfile("banned-players", self.srv_data.serverpath)
-        if banlist is not False:  # file and directory exist.
-            if banlist is None:  # file was empty or not valid
-                banlist = dict()  # ensure valid dict before operating on it
-            if find_in_json(banlist, "uuid", str(uuid)):
-                return "player already banned"  # error text
-            else:
-                if expires:
-                    try:
-                        expiration = epoch_to_timestr(expires)
-                    except Exception as e:
-                        print('Exception: %s' % e)
-                        return "expiration date invalid"  # error text
-                else:
-                    expiration = "forever"
-                name = self.uuids.getusernamebyuuid(uuid.string)
-                banlist.append({"uuid": uuid.string,
-                                "name": name,
-                                "created": epoch_to_timestr(time.time()),
-                                "source": source,
-                                "expires": expiration,
-                                "reason": reason})
-                if putjsonfile(banlist,
-                               "banned-players",
-                               self.srv_data.serverpath):
-                    # this actually is not needed. Commands now handle the kick.
-                    console_command = "kick %s %s" % (name, reason)
-                    self.run_command(console_command)
-
-                    return "Banned %s: %s" % (name, reason)
-                return "Could not write banlist to disk"
-        else:
-            return "Banlist not found on disk"
+        name = self.uuids.getusernamebyuuid(uuid.string)
+        banned = self._banplayer(uuid, name, reason, source, expires)
+        if banned:
+            return banned  # error text
+        # this actually is not needed. Commands now handle the kick.
+        console_command = "kick %s %s" % (name, reason)
+        self.run_command(console_command)
+
+        return "Banned %s: %s" % (name, reason)
 
     def banuuidraw(self, uuid, username, reason="The Ban Hammer has spoken!",
                    source="Wrapper", expires=False):
@@ -467,39 +637,45 @@ class Proxy(object):
 
         This probably only works on 1.7.10 servers or later
         """
-        banlist = getjsonfile("banned-players", self.srv_data.serverpath)
-        if banlist is not False:  # file and directory exist.
-            if banlist is None:  # file was empty or not valid
-                banlist = dict()  # ensure valid dict before operating on it
-            if find_in_json(banlist, "uuid", str(uuid)):
-                return "player already banned"  # error text
-            else:
-                if expires:
-                    try:
-                        expiration = epoch_to_timestr(expires)
-                    except Exception as e:
-                        print('Exception: %s' % e)
-                        return "expiration date invalid"  # error text
-                else:
-                    expiration = "forever"
-                banlist.append({"uuid": uuid.string,
-                                "name": username,
-                                "created": epoch_to_timestr(time.time()),
-                                "source": source,
-                                "expires": expiration,
-                                "reason": reason})
-                if putjsonfile(banlist,
-                               "banned-players",
-                               self.srv_data.serverpath):
-                    self.log.info("kicking %s... %s", username, reason)
-
-                    console_command = "kick %s Banned: %s" % (username, reason)
-                    self.run_command(console_command)
-
-                    return "Banned %s: %s - %s" % (username, uuid, reason)
-                return "Could not write banlist to disk"
-        else:
+        banned = self._banplayer(uuid, username, reason, source, expires)
+        if banned:
+            return banned  # error text
+        self.log.info("kicking %s... %s", username, reason)
+
+        console_command = "kick %s Banned: %s" % (username, reason)
+        self.run_command(console_command)
+
+        return "Banned %s: %s - %s" % (username, uuid, reason)
+
+    def _banplayer(self, uuid, name, reason, source, expires):
+        """ :returns: error text, or None if `uuid` was banned. """
+        banlist = self.banned_players
+        banlist.refresh()
+        if not banlist.found:
             return "Banlist not found on disk"
+        if banlist.get("uuid", str(uuid)):
+            return "player already banned"
+        expiration = self._expiration(expires)
+        if expiration is None:
+            return "expiration date invalid"
+        banlist.add({"uuid": uuid.string,
+                     "name": name,
+                     "created": epoch_to_timestr(time.time()),
+                     "source": source,
+                     "expires": expiration,
+                     "reason": reason})
+        return None
+
+    @staticmethod
+    def _expiration(expires):
+        """ :returns: `expires` as a ban file time, or None if invalid. """
+        if not expires:
+            return "forever"
+        try:
+            return epoch_to_timestr(expires)
+        except Exception as e:
+            print('Exception: %s' % e)
+            return None
 
     def banip(self, ipaddress, reason="The Ban Hammer has spoken!",
               source="Wrapper", expires=False):
@@ -517,181 +693,87 @@ class Proxy(object):
         """
         if not isipv4address(ipaddress):
             return "Invalid IPV4 address: %s" % ipaddress
-        banlist = getjsonfile("banned-ips", self.srv_data.serverpath)
-        if banlist is not False:  # file and directory exist.
-            if banlist is None:  # file was empty or not valid
-                banlist = dict()  # ensure valid dict before operating on it
-            if find_in_json(banlist, "ip", ipaddress):
-                return "address already banned"  # error text
-            else:
-                if expires:
-                    try:
-                        expiration = epoch_to_timestr(expires)
-                    except Exception as e:
-                        print('Exception: %s' % e)
-                        return "expiration date invalid"  # error text
-                else:
-                    expiration = "forever"
-                banlist.append({"ip": ipaddress,
-                                "created": epoch_to_timestr(time.time()),
-                                "source": source,
-                                "expires": expiration,
-                                "reason": reason})
-                if putjsonfile(banlist, "banned-ips", self.srv_data.serverpath):
-                    banned = ""
-                    for client in self.srv_data.clients:
-                        if client.ip == str(ipaddress):
-
-                            console_command = "kick %s Your IP is Banned!" % client.username  # noqa
-                            self.run_command(console_command)
-
-                            banned += "\n%s" % client.username
-                    return "Banned ip address: %s\nPlayers kicked as " \
-                           "a result:%s" % (ipaddress, banned)
-                return "Could not write banlist to disk"
-        else:
+        banlist = self.banned_ips
+        banlist.refresh()
+        if not banlist.found:
             return "Banlist not found on disk"
+        if banlist.get("ip", ipaddress):
+            return "address already banned"  # error text
+        expiration = self._expiration(expires)
+        if expiration is None:
+            return "expiration date invalid"  # error text
+        banlist.add({"ip": ipaddress,
+                     "created": epoch_to_timestr(time.time()),
+                     "source": source,
+                     "expires": expiration,
+                     "reason": reason})
+        banned = ""
+        for client in self.srv_data.clients:
+            if client.ip == str(ipaddress):
+
+                console_command = "kick %s Your IP is Banned!" % client.username  # noqa
+                self.run_command(console_command)
+
+                banned += "\n%s" % client.username
+        return "Banned ip address: %s\nPlayers kicked as " \
+               "a result:%s" % (ipaddress, banned)
 
     def pardonip(self, ipaddress):
         if not isipv4address(ipaddress):
             return "Invalid IPV4 address: %s" % ipaddress
-        banlist = getjsonfile("banned-ips", self.srv_data.serverpath)
-        if banlist is not False:  # file and directory exist.
-            if banlist is None:  # file was empty or not valid
-                return "No IP bans have ever been recorded."
-            banrecord = find_in_json(banlist, "ip", ipaddress)
-            if banrecord:
-                for x in banlist:
-                    if x == banrecord:
-                        banlist.remove(x)
-                if putjsonfile(banlist, "banned-ips", self.srv_data.serverpath):
-                    return "pardoned %s" % ipaddress
-                return "Could not write banlist to disk"
-            else:
-                return "That address was never banned"  # error text
-
-        else:
+        banlist = self.banned_ips
+        banlist.refresh()
+        if not banlist.found:
             return "Banlist not found on disk"  # error text
+        if banlist.remove("ip", ipaddress):
+            return "pardoned %s" % ipaddress
+        return "That address was never banned"  # error text
 
     def pardonuuid(self, uuid):
-        banlist = getjsonfile("banned-players", self.srv_data.serverpath)
-        if banlist is not False:  # file and directory exist.
-            if banlist is None:  # file was empty or not valid
-                return "No bans have ever been recorded..?"
-            banrecord = find_in_json(banlist, "uuid", str(uuid))
-            if banrecord:
-                for x in banlist:
-                    if x == banrecord:
-                        banlist.remove(x)
-                if putjsonfile(banlist,
-                               "banned-players",
-                               self.srv_data.serverpath):
-                    name = self.uuids.getusernamebyuuid(str(uuid))
-                    return "pardoned %s" % name
-                return "Could not write banlist to disk"
-            else:
-                return "That person was never banned"  # error text
-        else:
+        banlist = self.banned_players
+        banlist.refresh()
+        if not banlist.found:
             return "Banlist not found on disk"  # error text
+        if banlist.remove("uuid", str(uuid)):
+            name = self.uuids.getusernamebyuuid(str(uuid))
+            return "pardoned %s" % name
+        return "That person was never banned"  # error text
 
     def pardonname(self, username):
-        banlist = getjsonfile("banned-players", self.srv_data.serverpath)
-        if banlist is not False:  # file and directory exist.
-            if banlist is None:  # file was empty or not valid
-                return "No bans have ever been recorded..?"
-            banrecord = find_in_json(banlist, "name", str(username))
-            if banrecord:
-                for x in banlist:
-                    if x == banrecord:
-                        banlist.remove(x)
-                if putjsonfile(banlist,
-                               "banned-players",
-                               self.srv_data.serverpath):
-                    return "pardoned %s" % username
-                return "Could not write banlist to disk"
-            else:
-                return "That person was never banned"  # error text
-        else:
+        banlist = self.banned_players
+        banlist.refresh()
+        if not banlist.found:
             return "Banlist not found on disk"  # error text
+        if banlist.remove("name", str(username)):
+            return "pardoned %s" % username
+        return "That person was never banned"  # error text
 
     def isuuidbanned(self, uuid):  # Check if the UUID of the user is banned
-        banlist = getjsonfile("banned-players", self.srv_data.serverpath)
-        if banlist:  # make sure banlist exists
-            banrecord = find_in_json(banlist, "uuid", str(uuid))
-            if banrecord:
-                # if ban has expired
-                if read_timestr(banrecord["expires"]) < int(time.time()):
-                    pardoning = self.pardonuuid(str(uuid))
-                    if pardoning[:8] == "pardoned":
-                        self.log.info("UUID: %s was pardoned "
-                                      "(expired ban)", str(uuid))
-                        return False  # player is "NOT" banned (anymore)
-                    else:
-                        self.log.warning("isuuidbanned attempted a pardon of"
-                                         " uuid: %s (expired ban), "
-                                         "but it failed:\n %s",
-                                         uuid, pardoning)
-                return True  # player is still banned
-        return False  # banlist empty or record not found
+        for banrecord in self.banned_players.expire():
+            self.log.info("UUID: %s was pardoned (expired ban)",
+                          banrecord["uuid"])
+        return self.banned_players.get("uuid", str(uuid)) is not None
 
     def isipbanned(self, ipaddress):  # Check if the IP address is banned
-        banlist = getjsonfile("banned-ips", self.srv_data.serverpath)
-        if banlist:  # make sure banlist exists
-            for record in banlist:
-                _ip = record["ip"]
-                if _ip in ipaddress:
-                    _expires = read_timestr(record["expires"])
-                    if _expires < int(time.time()):  # if ban has expired
-                        pardoning = self.pardonip(ipaddress)
-                        if pardoning[:8] == "pardoned":
-                            self.log.info("IP: %s was pardoned "
-                                          "(expired ban)", ipaddress)
-                            return False  # IP is "NOT" banned (anymore)
-                        else:
-                            self.log.warning("isipbanned attempted a pardon "
-                                             "of IP: %s (expired ban),  but"
-                                             " it failed:\n %s",
-                                             ipaddress, pardoning)
-                    return True  # IP is still banned
-        return False  # banlist empty or record not found
+        if isinstance(ipaddress, tuple):
+            # a socket address
+            ipaddress = ipaddress[0]
+        for banrecord in self.banned_ips.expire():
+            self.log.info("IP: %s was pardoned (expired ban)",
+                          banrecord["ip"])
+        return self.banned_ips.get("ip", ipaddress) is not None
 
     def getskintexture(self, uuid):
-        import pprint
         """
         Args:
             uuid: uuid (accept MCUUID or string)
         Returns:
-            skin texture (False if request fails)
+            base64 skin texture (False if the player is unknown or the
+            texture is still being downloaded)
         """
         if "MCUUID" in str(type(uuid)):
             uuid = uuid.string
 
-        pprint.pprint(self.skins)
-        pprint.pprint(self.skinTextures)
         if uuid not in self.skins:
             return False
-
-        if uuid in self.skinTextures:
-            return py_str(self.skinTextures[uuid], self.encoding)
-
-        textual = base64.b64decode(self.skins[uuid]).decode("utf-8", "ignore")
-        skinblob = json.loads(textual)
-
-        # Player has no skin, so set to Alex [fix from #160]
-        if "SKIN" not in skinblob["textures"]:
-            skin = pkg_resources.resource_stream(
-                __name__, "./utils/skin.png"
-            ).read()
-            pprint.pprint(skin)
-            skinblob["textures"]["SKIN"] = {
-                "url": "http://hydra-media.cursecdn.com/mine"
-                       "craft.gamepedia.com/f/f2/Alex_skin.png"
-            }
-        r = requests.get(skinblob["textures"]["SKIN"]["url"])
-        if r.status_code == 200:
-            self.skinTextures[uuid] = base64.b64encode(r.content)
-            return py_str(self.skinTextures[uuid], self.encoding)
-        else:
-            self.log.warning("Could not fetch skin texture! "
-                             "(status code %d)", r.status_code)
-            return False
+        return self.skin_cache.get(self.skins[uuid])
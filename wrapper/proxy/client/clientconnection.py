@@ -15,7 +15,6 @@ import time
 import json
 import hashlib
 from socket import error as socket_error
-import requests
 
 # Local imports
 import proxy.utils.encryption as encryption
@@ -26,9 +25,10 @@ from proxy.client.parse_sb import ParseSB
 from proxy.packets import mcpackets_sb
 from proxy.packets import mcpackets_cb
 from proxy.utils.constants import *
+from proxy.utils.capture import PacketCapture, SERVERBOUND
 
 from proxy.utils.mcuuid import MCUUID
-from api.helpers import processcolorcodes, getjsonfile, putjsonfile
+from api.helpers import getjsonfile, putjsonfile
 
 
 # noinspection PyMethodMayBeStatic
@@ -65,15 +65,38 @@ class Client(object):
         self.silent_bans = self.proxy.config["silent-ipban"]
         self.names_change = self.proxy.config["auto-name-changes"]
         self.flush_rate = self.proxy.config["flush-rate-ms"] / 1000
+        self.flush_delay = self.proxy.config.get(
+            "flush-coalesce-ms", 2) / 1000
+        self.flush_max_batch = self.proxy.config.get(
+            "flush-max-batch", 65536)
         self.onlinemode = self.proxy.onlinemode
 
         # client setup and operating paramenters
         self.abort = False
+        # The proxy EventLoop serving this client (and its server
+        # connection) when the proxy-engine is "eventloop".  None means
+        # this client runs on its own threads.
+        self.loop = None
         self.username = "PING REQUEST"
         self.packet = Packet(self.client_socket, self)
+        self.packet.max_batch = self.flush_max_batch
+        # "packet-capture" records this client's traffic (both ways) to
+        # a file, for offline replay.  See proxy/utils/capture.py
+        self.capture = None
+        if self.proxy.config.get("packet-capture", False):
+            self.capture = PacketCapture(
+                self.proxy.config.get("packet-capture-dir",
+                                      "wrapper-data/captures"),
+                client_addr, self.log)
+            self.packet.tap = self.capture.tap(SERVERBOUND, self, self.packet)
+        # "packet-stats" counts this client's traffic (both ways) per
+        # packet type.  See proxy/utils/trafficstats.py
+        self.stats = self.proxy.traffic.connection(self)
+        if self.stats:
+            self.packet.stats = self.stats.packet(SERVERBOUND, self)
+            self._parse = self._parse_counted
         self.verifyToken = encryption.generate_challenge_token()
         self.serverID = encryption.generate_server_id().encode('utf-8')
-        self.MOTD = {}
 
         # client will reset this later, if need be..
         self.clientversion = self.srv_data.protocolVersion
@@ -111,8 +134,6 @@ class Client(object):
         self.permit_disconnect_from_server = True
 
         # Hub controls
-        # tells wrapper when the player login is authenticated
-        self.wait_wait_for_auth = False
         # whether or not the player is on this wrapper world
         self.local = True
         # Handle disconnections based on what world player is in
@@ -180,6 +201,8 @@ class Client(object):
         # misc client attributes
         self.properties = {}
         self.clientSettings = False
+        # the text of the last tab completion request
+        self.tab_text = ""
         self.skin_blob = {}
 
         # inventory tracking
@@ -219,12 +242,22 @@ class Client(object):
                     {"text": "Lost server connection: %s" % message,
                      "color": "red"}
                 )
-                time.sleep(.4)
-                self.disc_request = False
-                self.change_servers("127.0.0.1", self.serverport)
+                if self.loop and self.loop.in_loop_thread():
+                    # change_servers() takes seconds; keep it off the loop.
+                    t = threading.Thread(target=self._return_to_hub,
+                                         name="ChangeServers", args=())
+                    t.daemon = True
+                    t.start()
+                else:
+                    self._return_to_hub()
             else:
                 self.disc_request = True
 
+    def _return_to_hub(self):
+        time.sleep(.4)
+        self.disc_request = False
+        self.change_servers("127.0.0.1", self.serverport)
+
     def handle(self):
         # Main client connection loop thread started by proxy.base.py
 
@@ -251,21 +284,64 @@ class Client(object):
                 self.abort = True
                 break
 
-            # Each condition is executed and evaluated in sequence:
-            if self._parse(pkid) and \
-                    self.server_connection and \
-                    self.server_connection.packet and \
-                    self.server_connection.state == PLAY:
+            self._handle_packet(pkid, orig_packet)
 
-                # wrapper handles LOGIN/HANDSHAKE with servers (via
-                # self._parse(pkid), which DOES happen in all modes
-                # as part of the `if` statement evaluation).
+        # upon self.abort
+        self._handle_ended()
 
-                # sending on to the server only happens in PLAY.
-                self.server_connection.packet.send_raw_untouched(orig_packet)
+    def handle_on_loop(self, loop):
+        """
+        The "eventloop" proxy-engine version of handle().  Instead of
+        running handle() and _flush_loop() threads, the client socket is
+        served by `loop`, which frames each packet and passes it
+        to _handle_packet().
 
-        # upon self.abort
+        :param loop: The proxy EventLoop assigned to this client.
+        """
+        self.loop = loop
+        loop.add_connection(
+            self.client_socket, self.packet, self._handle_packet,
+            self._loop_ended, lambda: self.abort,
+            name="client %s" % str(self.client_address)
+        )
+
+    def _handle_packet(self, pkid, orig_packet):
+        """
+        Parse one packet from the client and (in PLAY mode) pass it on
+        to the server.
+        """
+        # Each condition is executed and evaluated in sequence:
+        if self._parse(pkid) and \
+                self.server_connection and \
+                self.server_connection.packet and \
+                self.server_connection.state == PLAY:
+
+            # wrapper handles LOGIN/HANDSHAKE with servers (via
+            # self._parse(pkid), which DOES happen in all modes
+            # as part of the `if` statement evaluation).
+
+            # sending on to the server only happens in PLAY.
+            self.server_connection.packet.send_raw_untouched(orig_packet,
+                                                             pkid)
+        return not self.abort
+
+    def _loop_ended(self):
+        """
+        Called by the event loop when this client's socket is dropped.
+        Does the cleanup of handle(), _flush_loop() and
+        _keep_alive_tracker() threads.
+        """
+        self.abort = True
+        self.state = HANDSHAKE
+        self._handle_ended()
+        self.proxy.removestaleclients()
+
+    def _handle_ended(self):
         self._close_server_instance("Client Handle Ended")
+        if self.capture:
+            self.capture.close()
+        if self.stats:
+            self.stats.close()
         try:
             self.client_socket.shutdown(2)
         except AttributeError:
@@ -281,22 +357,24 @@ class Client(object):
 
     def _flush_loop(self):
         """
-        packets accumulate in the packet.queue.  They are periodically 
-        sent to the client in intervals.  The '.05' interval, which is also
-        a minecraft tick, seems ideal.  Any shorter and packets seem to 
-        get lost (Dropped items are invisible, etc).  Any longer makes the 
-        game kind of jerky. '.1' would be tolerable unless in a combat
-        situation.
+        packets accumulate in the packet.queue.  This thread wakes up as
+        soon as something is queued, gives other packets up to
+        `flush_delay` (flush-coalesce-ms) to join it and then sends them
+        to the client as one batch.  Urgent packets (keep alives and
+        chat) are sent right away.  `flush_rate` is just how often the
+        thread checks for an abort while nothing is queued.
         """
         rate = self.flush_rate
         while not self.abort:
-            time.sleep(rate)
             try:
+                if not self.packet.wait_for_flush(self.flush_delay, rate):
+                    continue
                 self.packet.flush()
             except AttributeError:
                 self.log.debug(
                     "%s client packet instance gone.", self.username
                 )
+                time.sleep(rate)
 
             except socket_error:
                 self.log.debug("%s client socket closed (socket_error).",
@@ -317,6 +395,19 @@ class Client(object):
             return self.parsers[self.state][pkid]()
         return True
 
+    def _parse_counted(self, pkid):
+        """
+        _parse(), timing the parser for "packet-stats".
+        """
+        if pkid in self.parsers[self.state]:
+            stats = self.packet.stats
+            start = time.time()
+            try:
+                return self.parsers[self.state][pkid]()
+            finally:
+                stats.on_parse(time.time() - start)
+        return True
+
     def _set_parsers(self):
         """
         The packets we parse and the methods that parse them.
@@ -371,6 +462,8 @@ class Client(object):
                     self.parse_sb.play_player_update_sign,
                 self.pktSB.SPECTATE[PKT]:
                     self.parse_sb.play_spectate,
+                self.pktSB.TAB_COMPLETE[PKT]:
+                    self.parse_sb.play_tab_complete,
                 self.pktSB.USE_ITEM[PKT]:
                     self.parse_sb.play_use_item,
                 self.pktSB.PLUGIN_MESSAGE[PKT]:
@@ -425,6 +518,9 @@ class Client(object):
         requested_state = data[3]
 
         if requested_state == STATUS:
+            if not self.proxy.ping_throttle.allow(self.client_address[0]):
+                self.abort = True
+                return False
             self.state = STATUS
             # wrapper will wait for REQUEST, so do nothing further.
             return False
@@ -496,48 +592,11 @@ class Client(object):
     def _parse_status_request(self):
         """
         Status Request - client sends server info in response and goes
-        back to HANDSHAKE mode.
-        """
-        sample = []
-        for player in self.srv_data.players:
-            playerobj = self.srv_data.players[player]
-            if playerobj.username not in self.hidden_ops:
-                sample.append({"name": playerobj.username,
-                               "id": str(playerobj.mojangUuid)})
-            if len(sample) > 5:
-                break
-        reported_version = self.srv_data.protocolVersion
-        reported_name = self.srv_data.version
-        motdtext = self.srv_data.motd
-        if self.clientversion >= PROTOCOL_1_8START:
-            motdtext = processcolorcodes(motdtext.replace(
-                "\\", ""))
-        self.MOTD = {
-            "description": motdtext,
-            "players": {
-                "max": int(self.proxy.config["max-players"]),
-                "online": len(self.srv_data.players),
-                "sample": sample
-            },
-            "version": {
-                "name": reported_name,
-                "protocol": reported_version
-            }
-        }
-
-        # add Favicon, if it exists
-        if self.srv_data.serverIcon:
-            self.MOTD["favicon"] = self.srv_data.serverIcon
-
-        # add Forge information, if applicable.
-        if self.proxy.forge:
-            self.MOTD["modinfo"] = self.proxy.mod_info["modinfo"]
-
-        self.packet.sendpkt(
-            self.pktCB.PING_JSON_RESPONSE[PKT],
-            [STRING],
-            [json.dumps(self.MOTD)]
-        )
+        back to HANDSHAKE mode.  (Most pings are answered by the proxy's
+        StatusResponder and never get here.)
+        """
+        payload = self.proxy.status_response(self.clientversion)[0]
+        self.packet.send_raw(payload)
 
         # after this, proxy waits for the expected PING to
         #  go back to Handshake mode
@@ -547,12 +606,6 @@ class Client(object):
         """
         client requests a login NOW.
         """
-        # This blocks waiting for _login_authenticate_client to finish.
-        self.wait_wait_for_auth = True
-        t = threading.Thread(target=self._continue_login_start,
-                             name="Login", args=())
-        t.daemon = True
-        t.start()
         data = self.packet.readpkt([STRING, NULL])
         self.username = data[0]
 
@@ -568,26 +621,43 @@ class Client(object):
             # Server UUID (or other offline wrapper) is always offline
             self.local_uuid = self.proxy.uuids.getuuidfromname(self.username)
 
-            # allow the socket to keep moving while _continue_login_start
-            #  continues to wait for auth..
+            # the login continues once the client answers and the session
+            #  server has verified it (_session_verified).
             return False
 
         else:
             # Wrapper proxy offline and not authenticating
             # maybe it is the destination of a hub? or you use another
             #  way to authenticate (password plugin?)
-            self._login_authenticate_client(None)
-
-            # _login_authenticate_client already blocking since we called it...
-            self.wait_wait_for_auth = False
+            self._start_login(None)
             return False
 
-    def _continue_login_start(self):
+    def _start_login(self, profile, error=None):
+        """ Finish the login on its own thread (it connects to the
+        server, so it must not hold up the client's handle thread or
+        a session verifier worker). """
+        t = threading.Thread(target=self._continue_login_start,
+                             name="Login", args=(profile, error))
+        t.daemon = True
+        t.start()
+
+    def _continue_login_start(self, profile, error):
         """
-        Wait for client authentication to complete before sending login event.
+        Log the authenticated client on and connect it to the server.
+
+        :param profile: the session server's profile of the client
+         (None in offline mode).
+        :param error: why the session server check failed, if it did.
         """
-        while self.wait_wait_for_auth:
-            continue
+        if error:
+            self.state = HANDSHAKE
+            self.disconnect("Proxy Client Session-Server Error (%s)" % error)
+            return
+
+        if self._login_authenticate_client(profile) is False:
+            self.state = HANDSHAKE
+            self.disconnect("Your client authentication failed.")
+            return
 
         # log the client on
         if self._logon_client_into_proxy():
@@ -662,12 +732,25 @@ class Client(object):
 
         # begin Client logon process
         # Wrapper in online mode, taking care of authentication
-        if self._login_authenticate_client(serverid) is False:
+        position = self.proxy.authenticator.submit(
+            self.username, serverid, self._session_verified)
+        if not position:
+            self.log.info("Login queue is full; refused %s", self.username)
             self.state = HANDSHAKE
-            self.disconnect("Your client authentication failed.")
-            return False  # client failed to authenticate
+            self.disconnect("Too many players are logging in right now. "
+                            "Please try again in a moment.")
+        elif position > self.proxy.authenticator.workers:
+            # every worker is busy
+            self.log.info("%s is number %d in the login queue",
+                          self.username,
+                          position - self.proxy.authenticator.workers)
         return False
 
+    def _session_verified(self, profile, error):
+        """ SessionVerifier callback (on one of its worker threads). """
+        if not self.abort:
+            self._start_login(profile, error)
+
     def _logon_client_into_proxy(self):
         """
         When the client first logs in to the wrapper proxy
@@ -744,7 +827,7 @@ class Client(object):
 
             self.state = HANDSHAKE
             self.disconnect("Login denied by a Plugin.")
-            del self.srv_data.players[self.username]
+            self.srv_data.players.pop(self.username)._logout()
             return
 
         self.permit_disconnect_from_server = True
@@ -773,11 +856,14 @@ class Client(object):
 
         # start keep alives
         self.time_client_responded = time.time()
-        t_keepalives = threading.Thread(
-            target=self._keep_alive_tracker,
-            args=())
-        t_keepalives.daemon = True
-        t_keepalives.start()
+        if self.loop:
+            self.loop.call_every(1, self._keep_alive_tick)
+        else:
+            t_keepalives = threading.Thread(
+                target=self._keep_alive_tracker,
+                args=())
+            t_keepalives.daemon = True
+            t_keepalives.start()
         return True
 
     def _connect_to_server(self, ip=None, port=None):
@@ -807,9 +893,13 @@ class Client(object):
             return False, mess
 
         # start server handle() to read the packets
-        t = threading.Thread(target=self.server_connection.handle, args=())
-        t.daemon = True
-        t.start()
+        if self.loop:
+            self.server_connection.handle_on_loop(self.loop)
+        else:
+            t = threading.Thread(target=self.server_connection.handle,
+                                 args=())
+            t.daemon = True
+            t.start()
 
         # switch server_connection to LOGIN to log in to (offline) server.
         # already done at server.connect()
@@ -1107,7 +1197,7 @@ class Client(object):
                     message)
 
                 self.chat_to_client(jsondict)
-                time.sleep(5)
+                self._wait_for_flush(5)
                 self.packet.sendpkt(
                     self.pktCB.LOGIN_DISCONNECT[PKT],
                     [JSON],
@@ -1119,12 +1209,23 @@ class Client(object):
                         [JSON],
                         [message])
 
-        time.sleep(1)
+        self._wait_for_flush(1)
         self.state = HANDSHAKE
         self._close_server_instance(
             "Just ran Disconnect() client.  Aborting client thread")
         self.abort = True
 
+    def _wait_for_flush(self, seconds):
+        """
+        Give the flush loop time to send what is queued.  On an event
+        loop thread, sleeping would stall every client on the loop, so
+        the queue is flushed right away instead.
+        """
+        if self.loop and self.loop.in_loop_thread():
+            self.packet.flush()
+        else:
+            time.sleep(seconds)
+
     # internal init and properties
     # -----------------------------
     @property
@@ -1149,6 +1250,8 @@ class Client(object):
         """
         self.pktSB = mcpackets_sb.Packets(self.clientversion)
         self.pktCB = mcpackets_cb.Packets(self.clientversion)
+        self.packet.urgent_ids = set([self.pktCB.KEEP_ALIVE[PKT],
+                                      self.pktCB.CHAT_MESSAGE[PKT]])
         self._set_parsers()
 
     # client API things
@@ -1228,46 +1331,41 @@ class Client(object):
     # internal client login methods
     # -----------------------------
 
-    def _login_authenticate_client(self, server_id):
+    def _login_authenticate_client(self, requestdata):
+        """
+        :param requestdata: the session server's verified profile (see
+         SessionVerifier) in online mode, None in offline mode.
+        """
         # future TODO have option to be online but bypass session server.
         if self.onlinemode:
-            r = requests.get("https://sessionserver.mojang.com"
-                             "/session/minecraft/hasJoined?username=%s"
-                             "&serverId=%s" % (self.username, server_id))
-            if r.status_code == 200:
-                # {
-                #     "id": "<profile identifier>",
-                #     "name": "<player name>",
-                #     "properties": [
-                #         {
-                #             "name": "textures",
-                #             "value": "<base64 string>",
-                #             "signature": "<base64 string; signed data using Yggdrasil's private key>"  # noqa
-                #         }
-                #     ]
-                # }
-                requestdata = r.json()
-                playerid = requestdata["id"]
-                self.wrapper_uuid = MCUUID(playerid)
-
-                if requestdata["name"] != self.username:
-                    self.disconnect("Client's username did not"
-                                    " match Mojang's record")
-                    self.log.info("Client's username did not"
-                                  " match Mojang's record %s != %s",
-                                  requestdata["name"], self.username)
-                    return False
-
-                for prop in requestdata["properties"]:
-                    if prop["name"] == "textures":
-                        self.skin_blob = prop["value"]
-                        self.proxy.skins[
-                            self.wrapper_uuid.string] = self.skin_blob
-                self.properties = requestdata["properties"]
-            else:
-                self.disconnect("Proxy Client Session-Server Error"
-                                " (HTTP Status Code %d)" % r.status_code)
+            # {
+            #     "id": "<profile identifier>",
+            #     "name": "<player name>",
+            #     "properties": [
+            #         {
+            #             "name": "textures",
+            #             "value": "<base64 string>",
+            #             "signature": "<base64 string; signed data using Yggdrasil's private key>"  # noqa
+            #         }
+            #     ]
+            # }
+            playerid = requestdata["id"]
+            self.wrapper_uuid = MCUUID(playerid)
+
+            if requestdata["name"] != self.username:
+                self.disconnect("Client's username did not"
+                                " match Mojang's record")
+                self.log.info("Client's username did not"
+                              " match Mojang's record %s != %s",
+                              requestdata["name"], self.username)
                 return False
+
+            for prop in requestdata["properties"]:
+                if prop["name"] == "textures":
+                    self.skin_blob = prop["value"]
+                    self.proxy.skins[
+                        self.wrapper_uuid.string] = self.skin_blob
+            self.properties = requestdata["properties"]
             mojang_name = self.proxy.uuids.getusernamebyuuid(
                 self.wrapper_uuid.string, uselocalname=False)
             self.local_uuid = self.proxy.uuids.getuuidfromname(self.username)
@@ -1327,8 +1425,6 @@ class Client(object):
             self.log.debug("Client logon with wrapper offline-"
                            " 'self.wrapper_uuid = OfflinePlayer:<name>'")
 
-        self.wait_wait_for_auth = False
-
     def _add_client(self):
         """
         Put client into server data. (player login will be called
@@ -1343,43 +1439,64 @@ class Client(object):
         """
         while not self.abort:
             time.sleep(1)
-            if self.state in (PLAY, LOBBY):
-                # client expects < 20sec
-                # sending more frequently (5 seconds) seems to help with
-                # some slower connections.
-                if time.time() - self.time_last_ping_to_client > 9:
-                    # vanilla MC 1.12 .2 uses a time() value.
-                    # I use simple incrementing numbers vs randoms... I mean,
-                    # what is the point of a random keepalive?
-                    if self.version < PROTOCOL_1_12_2:
-                        # sending a keepalive every second for more than 68
-                        # years would be required to exceed the VARINT capacity
-                        self.keepalive_val += 1
-                    else:
-                        # running forever would not allow keepalive to exceed
-                        # LONG contraints
-                        self.keepalive_val += 1
-
-                    # challenge the client with it
-                    self.packet.sendpkt(
-                        self.pktCB.KEEP_ALIVE[PKT],
-                        self.pktCB.KEEP_ALIVE[PARSER],
-                        [self.keepalive_val])
-
-                    self.time_last_ping_to_client = time.time()
-
-                # check for active client keep alive status:
-                # server can allow up to 30 seconds for response
-                if time.time() - self.time_client_responded > 30:
-                    self.disconnect("Client closed due to lack of"
-                                    " keepalive response")
-                    self.log.debug("Closed %s's client thread due to "
-                                   "lack of keepalive response", self.username)
-                    return
+            if not self._keep_alive_check():
+                return
         self.log.debug("%s Client keepalive tracker aborted", self.username)
         self.disconnect("Client disconnected.")
         self.state = HANDSHAKE
 
+    def _keep_alive_tick(self):
+        """
+        The event loop's once-a-second keep alive timer.
+
+        :returns: False to stop the timer.
+        """
+        if self.abort:
+            return False
+        return self._keep_alive_check()
+
+    def _keep_alive_check(self):
+        """
+        Challenge the client with a keep alive if due and disconnect it
+        if it stopped answering.
+
+        :returns: False if the client was disconnected.
+        """
+        if self.state in (PLAY, LOBBY):
+            # client expects < 20sec
+            # sending more frequently (5 seconds) seems to help with
+            # some slower connections.
+            if time.time() - self.time_last_ping_to_client > 9:
+                # vanilla MC 1.12 .2 uses a time() value.
+                # I use simple incrementing numbers vs randoms... I mean,
+                # what is the point of a random keepalive?
+                if self.version < PROTOCOL_1_12_2:
+                    # sending a keepalive every second for more than 68
+                    # years would be required to exceed the VARINT capacity
+                    self.keepalive_val += 1
+                else:
+                    # running forever would not allow keepalive to exceed
+                    # LONG contraints
+                    self.keepalive_val += 1
+
+                # challenge the client with it (timed from now, as
+                #  the answer can come before sendpkt() returns)
+                self.time_last_ping_to_client = time.time()
+                self.packet.sendpkt(
+                    self.pktCB.KEEP_ALIVE[PKT],
+                    self.pktCB.KEEP_ALIVE[PARSER],
+                    [self.keepalive_val])
+
+            # check for active client keep alive status:
+            # server can allow up to 30 seconds for response
+            if time.time() - self.time_client_responded > 30:
+                self.disconnect("Client closed due to lack of"
+                                " keepalive response")
+                self.log.debug("Closed %s's client thread due to "
+                               "lack of keepalive response", self.username)
+                return False
+        return True
+
     def _remove_client_and_player(self):
         """
         This is needed when the player is logged into wrapper, but not
@@ -1388,7 +1505,7 @@ class Client(object):
         """
         if self.username in self.proxy.srv_data.players:
             if self.proxy.srv_data.players[self.username].client.state != LOBBY:
-                self.proxy.srv_data.players[self.username].abort = True
+                self.proxy.srv_data.players[self.username]._logout()
                 del self.proxy.srv_data.players[self.username]
 
     def send_client_settings(self):
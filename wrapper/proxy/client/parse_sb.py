@@ -34,6 +34,9 @@ class ParseSB(object):
 
         if data[0] == self.client.keepalive_val:
             self.client.time_client_responded = time.time()
+            self.proxy.srv_data.ticks.keep_alive(
+                self.client.time_client_responded -
+                self.client.time_last_ping_to_client)
         return False
 
     def plugin_message(self):
@@ -712,6 +715,18 @@ class ParseSB(object):
         # the packet is not stopped, sooo...
         return True
 
+    def play_tab_complete(self):
+        """
+        Keep the text being completed, for the server's response
+         (ParseCB.play_tab_complete()).
+        """
+        if not self.client.local:
+            return True
+
+        self.client.tab_text = self.packet.readpkt(
+            self.pktSB.TAB_COMPLETE[PARSER])[-1]
+        return True
+
     def play_click_window(self):  # click window
         if not self.client.local:
             return True
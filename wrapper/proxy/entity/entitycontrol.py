@@ -5,8 +5,6 @@
 # This program is distributed under the terms of the GNU
 # General Public License, version 3 or later.
 
-from time import sleep
-import threading
 from proxy.entity.entitybasics import Entities as Entitytypes
 from proxy.entity.entitybasics import Objects as Objecttypes
 
@@ -68,20 +66,20 @@ class EntityControl(object):
         #   "player-thinning-radius"]
 
         self.entities = {}
+        self.tasks = []
         if self.entityControl:
+            scheduler = self.proxy.eventhandler.scheduler
+            processor = float(self.entityProcessorFrequency)
+            thinning = float(self.thiningFrequency)
 
-            # entity processor thread
-            t = threading.Thread(target=self._entity_processor,
-                                 name="entProc", args=())
-            t.daemon = True
-            t.start()
+            # entity processor (removes stale entities)
+            self.tasks.append(scheduler.schedule(
+                processor, self._entity_processor, interval=processor))
 
-            # entity killer thread
-
-            ekt = threading.Thread(target=self._entity_thinner,
-                                   name="entKill", args=())
-            ekt.daemon = True
-            ekt.start()
+            # entity killer
+            self.tasks.append(scheduler.schedule(
+                thinning, self._entity_thinner, interval=thinning))
+            self._log.debug("entity control tasks scheduled.")
 
     # noinspection PyBroadException
     def getEntityByEID(self, eid):
@@ -217,97 +215,82 @@ class EntityControl(object):
 
         self.proxy.run_command(console_command)
 
+    def _running(self):
+        """ True while the server runs.  Once it stops, this cancels the
+        entity control tasks (and returns False). """
+        if self.srvr_data.state in (1, 2, 4) and not (
+                self.proxy.caller.halt or self.proxy.abort):
+            return True
+        scheduler = self.proxy.eventhandler.scheduler
+        for task in self.tasks:
+            scheduler.cancel(task)
+        if self.tasks:
+            self._log.debug("entity control tasks cancelled.")
+        self.tasks = []
+        return False
+
     def _entity_processor(self):
-        self._log.debug("_entityprocessor thread started.")
-        timer = float(0)
-        # server is running
-        while self.srvr_data.state in (1, 2, 4) and not (
-                self.proxy.caller.halt or self.proxy.abort
-        ):
-            timer += .1
-            sleep(.1)
-            # timer for removing stale entities we want a FAST response
-            # to server shutdowns (activate while loop frequently)
-            if timer < float(self.entityProcessorFrequency):
-                continue
-            timer = float(0)
-
-            # start looking for stale client entities
-            playerlist = []
-            for player in self.srvr_data.clients:
-                playerlist.append(player.username)
-            entity_eids = list(self.entities.keys())
-            for eid in entity_eids:
-                if self.getEntityByEID(eid).clientname not in playerlist:
-                    # noinspection PyBroadException
-                    try:
-                        self.entities.pop(eid, None)
-                    except:
-                        pass
-        self._log.debug("_entityprocessor thread closed.")
+        if not self._running():
+            return
+        # start looking for stale client entities
+        playerlist = []
+        for player in self.srvr_data.clients:
+            playerlist.append(player.username)
+        entity_eids = list(self.entities.keys())
+        for eid in entity_eids:
+            if self.getEntityByEID(eid).clientname not in playerlist:
+                # noinspection PyBroadException
+                try:
+                    self.entities.pop(eid, None)
+                except:
+                    pass
 
     # each entity IS a dictionary, so...
     # noinspection PyTypeChecker
     def _entity_thinner(self):
-        self._log.debug("_entity_thinner thread started.")
-        timer = float(0)
-
-        # while server is running
-        while self.srvr_data.state in (1, 2, 4) and not (
-                self.proxy.caller.halt or self.proxy.abort
-        ):
-
-            timer += .1
-            sleep(.1)
-            # timer for removing stale entities we want a FAST response
-            # to server shutdowns (activate while loop frequently)
-            if timer < float(self.thiningFrequency):
-                continue
-            timer = float(0)
+        if not self._running():
+            return
+        if self.countActiveEntities() < self.startThinningThreshshold:
+            # don't bother, server load is light.
+            return
 
-            if self.countActiveEntities() < self.startThinningThreshshold:
-                # don't bother, server load is light.
+        # gather client list
+        playerlist = self.srvr_data.clients
+        # loop through playerlist
+        for playerclient in playerlist:
+            players_position = playerclient.position
+            his_entities = self.countEntitiesInPlayer(playerclient.username)
+            if len(his_entities) < self.startThinningThreshshold:
+                # don't worry with this player, his load is light.
                 continue
 
-            # gather client list
-            playerlist = self.srvr_data.clients
-            # loop through playerlist
-            for playerclient in playerlist:
-                players_position = playerclient.position
-                his_entities = self.countEntitiesInPlayer(playerclient.username)
-                if len(his_entities) < self.startThinningThreshshold:
-                    # don't worry with this player, his load is light.
-                    continue
-
-                # now we need to count each entity type
-                counts = {}
-                for entity in his_entities:
-                    if entity["name"] in counts:
-                        counts[entity["name"]] += 1
-                    else:
-                        counts[entity["name"]] = 1  # like {"Cow": 1}
-
-                for mob_type in counts:
-                    if "thin-%s" % mob_type in self.ent_config:
-                        maxofthiskind = self.ent_config["thin-%s" % mob_type]
-                        if counts[mob_type] >= maxofthiskind:
-
-                            # turn off console_spam
-                            server_msg = "Teleported %s to" % mob_type
-                            if server_msg not in self.srvr_data.spammy_stuff:
-                                self.srvr_data.spammy_stuff.append(
-                                    "Teleported %s to" % mob_type)
-
-                            # can't be too agressive with killing because
-                            # entitycount might be off/lagging
-                            # kill half of any mob above this number
-                            killcount = (counts[mob_type] - maxofthiskind) // 2
-                            if killcount > 1:
-                                self._kill_around_player(
-                                    players_position, "%s" % mob_type,
-                                    killcount)
-
-        self._log.debug("_entity_thinner thread closed.")
+            # now we need to count each entity type
+            counts = {}
+            for entity in his_entities:
+                if entity["name"] in counts:
+                    counts[entity["name"]] += 1
+                else:
+                    counts[entity["name"]] = 1  # like {"Cow": 1}
+
+            for mob_type in counts:
+                if "thin-%s" % mob_type in self.ent_config:
+                    maxofthiskind = self.ent_config["thin-%s" % mob_type]
+                    if counts[mob_type] >= maxofthiskind:
+
+                        # turn off console_spam
+                        server_msg = "Teleported %s to" % mob_type
+                        if server_msg not in self.srvr_data.spammy_stuff:
+                            self.srvr_data.spammy_stuff.append(
+                                "Teleported %s to" % mob_type)
+
+                        # can't be too agressive with killing because
+                        # entitycount might be off/lagging
+                        # kill half of any mob above this number
+                        killcount = (counts[mob_type] - maxofthiskind) // 2
+                        if killcount > 1:
+                            self._kill_around_player(
+                                players_position, "%s" % mob_type,
+                                killcount)
 
     def _kill_around_player(self, position, entity_name, count):
         pos = position
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Packet layout compiler for `Packet.readpkt()`/`Packet.sendpkt()`.
+
+A packet definition from mcpackets_cb/mcpackets_sb (like
+`[DOUBLE, DOUBLE, DOUBLE, FLOAT, FLOAT, BOOL]`) is compiled once into a
+layout: a tuple of steps where every run of fixed-width fields is a
+single precompiled `struct.Struct` (a `FixedRun`) and every other field
+(VARINT, STRING, SLOT, ...) is left as its data type constant, to be
+read or sent by the Packet's own per-type method.  Layouts are cached by
+definition.
+"""
+
+import struct
+
+from proxy.utils.constants import UBYTE, BYTE, INT, SHORT, USHORT, LONG, \
+    DOUBLE, FLOAT, BOOL
+
+# fixed width data types and their struct format
+_FIXED = {
+    UBYTE: "B",
+    BYTE: "b",
+    INT: "i",
+    SHORT: "h",
+    USHORT: "H",
+    LONG: "q",
+    DOUBLE: "d",
+    FLOAT: "f",
+    BOOL: "b",
+}
+
+# packet definition (as a tuple) -> layout.  Packet looks layouts up
+# here directly and only calls compile_layout() on a miss.
+LAYOUTS = {}
+
+
+class FixedRun(object):
+    """ A run of consecutive fixed width fields. """
+    __slots__ = ("struct", "size", "count", "bools", "unpack")
+
+    def __init__(self, datatypes):
+        self.struct = struct.Struct(
+            ">" + "".join(_FIXED[datatype] for datatype in datatypes))
+        self.size = self.struct.size
+        self.count = len(datatypes)
+        # BOOLs are read/sent as a byte that is 1 or 0
+        self.bools = tuple(
+            index for index, datatype in enumerate(datatypes)
+            if datatype == BOOL)
+        if self.bools:
+            self.unpack = self._unpack_bools
+        else:
+            self.unpack = self.struct.unpack
+
+    def _unpack_bools(self, data):
+        values = list(self.struct.unpack(data))
+        for index in self.bools:
+            values[index] = values[index] == 1
+        return values
+
+    def pack(self, values):
+        if self.bools:
+            values = list(values)
+            for index in self.bools:
+                values[index] = 1 if values[index] else 0
+        return self.struct.pack(*values)
+
+
+def compile_layout(args):
+    """
+    Get the (cached) layout for a packet definition.
+
+    :param args: a list of data type constants.
+    :returns: a tuple of steps, each either a FixedRun or a data type
+     constant.
+    """
+    key = tuple(args)
+    layout = LAYOUTS.get(key)
+    if layout is not None:
+        return layout
+
+    steps = []
+    run = []
+    for datatype in key:
+        if datatype in _FIXED:
+            run.append(datatype)
+            continue
+        if run:
+            steps.append(FixedRun(run))
+            run = []
+        steps.append(datatype)
+    if run:
+        steps.append(FixedRun(run))
+    layout = tuple(steps)
+    LAYOUTS[key] = layout
+    return layout
@@ -69,7 +69,7 @@ class Packets(object):
         self.ENCHANT_ITEM = [0x11, [NULL, ]]
         self.PLAYER_UPDATE_SIGN = [0x12, [NULL, ]]
         self.PLAYER_ABILITIES = [0x13, [NULL, ]]
-        self.TAB_COMPLETE = [0x14, [NULL, ]]
+        self.TAB_COMPLETE = [0x14, [STRING, ]]
         self.CLIENT_SETTINGS = [0x15, [NULL, ]]
         self.CLIENT_STATUS = [0x16, [BYTE, ]]
         self.PLUGIN_MESSAGE = [0x17, [NULL, ]]
@@ -195,3 +195,4 @@ class Packets(object):
             self.CLIENT_STATUS[PKT] = 0x02
             self.CLIENT_SETTINGS[PKT] = 0x03
             self.TAB_COMPLETE[PKT] = 0x04
+            self.TAB_COMPLETE[PARSER] = [VARINT, STRING]
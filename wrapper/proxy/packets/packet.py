@@ -10,14 +10,20 @@
 
 # standard
 from collections import deque
+import errno
 import io  # PY3
 import json
 import struct
 import zlib
 import sys
+import threading
+import time
+from socket import error as socket_error
 # import StringIO
 
 # local
+from proxy.packets.layouts import LAYOUTS, compile_layout
+from proxy.packets.recvbuffer import RecvBuffer
 from proxy.utils.mcuuid import MCUUID
 from proxy.utils.constants import *
 
@@ -75,6 +81,13 @@ class Packet(object):
         self.compression = False
         self.abort = False
 
+        # With lazy_inflate, grabpacket() only inflates the first few bytes
+        # of a compressed packet (enough for the packet ID).  The rest is
+        # inflated the first time the packet is read (`read_data()`), so
+        # packets that are just passed through are never inflated at all.
+        self.lazy_inflate = True
+        self._inflater = None
+
         # this is set by the calling class/method.  Not presently used here,
         #  but could be. maybe to decide which metadata parser to use?
         self.version = self.obj.srv_data.protocolVersion
@@ -82,6 +95,44 @@ class Packet(object):
         # self.buffer = StringIO.StringIO()
 
         self.queue = deque([])
+        # Queued packets are flushed by whoever owns the socket (a flush
+        # thread waiting in `wait_for_flush()`, or an event loop's
+        # `on_queue` hook).  Everything queued by the time of a flush goes
+        # out in batches of up to `max_batch` bytes, each encrypted and
+        # sent with a single call.
+        self._queued = threading.Condition()
+        self.queued_bytes = 0
+        self.max_batch = 65536
+        # a packet with one of these IDs (like keep alives or chat) is
+        # flushed right away instead of waiting to be batched.  Set by the
+        # owner, since the IDs depend on the protocol version.
+        self.urgent_ids = set()
+        self.urgent = False
+        self.on_queue = None
+        # flush stats
+        self.batches_sent = 0
+        self.packets_sent = 0
+
+        # everything received is read into `recvbuf` in bulk and packets
+        # are framed from there.  See proxy/packets/recvbuffer.py
+        self.recvbuf = RecvBuffer()
+
+        # set True by an event loop (proxy/utils/eventloop.py) that owns
+        # this socket.  The loop then `fill()`-s the receive buffer and
+        # transmitted bytes wait in `outbound` until the (non-blocking)
+        # socket can take them.
+        self.nonblocking = False
+        self.outbound = bytearray()
+
+        # a capture.CaptureTap, when "packet-capture" is on.  It is given
+        # every frame this Packet reads.
+        self.tap = None
+        # a trafficstats.PacketStats, when "packet-stats" is on.  It
+        # counts what this Packet reads and sends.  Set it before
+        # anything is sent.
+        self.stats = None
+        # (time queued, packet ID) of each queued packet, if counting.
+        self._queued_at = deque()
 
         # encode/decode for NBT operations
         self._ENCODERS = {
@@ -242,31 +293,139 @@ class Packet(object):
 
         """
 
-        # first field - entire raw packet Length
-        packet_length = self.unpack_varint()
-        length = packet_length
+        frame = self.recvbuf.read_frame(self.socket, self.recvCipher)
+        return self._unpack_frame(frame)
+
+    def _unpack_frame(self, frame):
+        """ Load a framed packet (everything after the packet length) into
+        `self.buffer` for reading and return the grabpacket() tuple. """
+        if self.tap is not None:
+            self.tap.frame(frame)
         datalength = 0  # if 0, an uncompressed packet
+        start = 0
         if self.compressThreshold != -1:  # if compressed:
             # length of the uncompressed (Packet ID + Data)
-            datalength = self.unpack_varint()
-            # find the len of the datalength field and subtract it
-            # using augmented assignment in the next line seems to BREAK this
-            length = packet_length - len(self.pack_varint(datalength))
-        orig_payload = self.recv(length)
-        payload_read = orig_payload
-
+            datalength, start = self._peek_varint(frame, 0)
+            orig_packet = frame.tobytes()
+        else:
+            orig_packet = self.pack_varint(0) + frame.tobytes()
+        payload_read = frame[start:]
+        if not PY3:
+            # Py2 zlib and BytesIO don't take memoryviews
+            payload_read = payload_read.tobytes()
+        self._inflater = None
+
+        pkid = None
         if datalength > 0:  # it is compressed, unpack it
-            payload_read = zlib.decompress(orig_payload)
+            if self.lazy_inflate:
+                pkid = self._peek_packet_id(payload_read)
+            if pkid is None:
+                payload_read = zlib.decompress(payload_read)
+
+        if pkid is None:
+            self.buffer = io.BytesIO(payload_read)
+            pkid = self.read_varint()
+        if self.stats is not None:
+            self.stats.on_receive(pkid, datalength or len(payload_read),
+                                  len(frame))
+        return pkid, orig_packet
+
+    def _peek_packet_id(self, comp_payload):
+        """
+        Inflate just enough of `comp_payload` to read the packet ID
+        VarInt (5 bytes at most).  The inflater is saved so `read_data()`
+        can finish the job if the packet is actually parsed.
+
+        :returns: the packet ID, or None if it could not be peeked.
+        """
+        inflater = zlib.decompressobj()
+        head = inflater.decompress(comp_payload, 5)
+        pkid, pos = self._peek_varint(head, 0)
+        if pkid is None:
+            return None
+        self._inflater = (inflater, head[pos:])
+        self.buffer = None
+        return pkid
+
+    def _inflate_rest(self):
+        """ Finish inflating a packet whose ID was peeked by grabpacket(). """
+        inflater, rest = self._inflater
+        self._inflater = None
+        rest += inflater.decompress(inflater.unconsumed_tail)
+        rest += inflater.flush()
+        self.buffer = io.BytesIO(rest)
+
+    def fill(self):
+        """
+        Event loop only - read whatever the (non-blocking) socket has into
+        the receive buffer.
 
-        self.buffer = io.BytesIO(payload_read)
-        pkid = self.read_varint()
-        return pkid, self.pack_varint(datalength) + orig_payload
+        :returns: the number of bytes read; 0 means the socket closed.
+        """
+        return self.recvbuf.fill(self.socket, self.recvCipher)
+
+    def _peek_varint(self, data, pos):
+        """ Read a varint from `data` at `pos` without consuming it.
+
+        :returns: (value, position after the varint) or (None, pos) if
+         `data` does not hold the entire varint yet.
+        """
+        total = 0
+        shift = 0
+        end = len(data)
+        while pos < end:
+            val = data[pos]
+            if not isinstance(val, int):
+                # Py2 memoryview items are 1 char strings
+                val = ord(val)
+            pos += 1
+            total |= ((val & 0x7F) << shift)
+            if not val & 0x80:
+                if total & (1 << 31):
+                    total = total - (1 << 32)
+                return total, pos
+            shift += 7
+            if shift > 35:
+                raise ValueError("VarInt is too big")
+        return None, pos
+
+    def grab_buffered(self):
+        """
+        The event loop version of grabpacket().  Frames the next packet
+        from the bytes already read by `fill()`.
+
+        :returns: the same (pkid, original_packet) tuple as grabpacket(),
+         or None if the receive buffer does not hold a whole packet yet.
+        """
+        frame = self.recvbuf.next_frame(self.recvCipher)
+        if frame is None:
+            return None
+        return self._unpack_frame(frame)
 
     def socket_transmit(self, packet):
-        if self.sendCipher is None:
-            self.socket.send(packet)
+        if self.sendCipher is not None:
+            packet = self.sendCipher.update(packet)
+        if self.nonblocking:
+            self.outbound += packet
         else:
-            self.socket.send(self.sendCipher.update(packet))
+            self.socket.sendall(packet)
+
+    def drain(self):
+        """
+        Event loop only - write as much of the outbound buffer as the
+        socket will take.
+
+        :returns: True once the outbound buffer is empty.
+        """
+        while self.outbound:
+            try:
+                sent = self.socket.send(self.outbound)
+            except socket_error as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return False
+                raise
+            del self.outbound[:sent]
+        return True
 
     def handle_compression(self, compression_threshhold, payload):
         """  # noqa
@@ -297,22 +456,111 @@ class Packet(object):
             return self.pack_varint(len(payload)) + payload
 
     def flush(self):
-        while len(self.queue) > 0:
-            # grab next packet
-            packet_tuple = self.queue.popleft()
-            # see if it is compressed
-            compression = packet_tuple[0]
-            packet = packet_tuple[1]  # `payload`
+        with self._queued:
+            if not self.queue:
+                return
+            queue = self.queue
+            self.queue = deque([])
+            self.queued_bytes = 0
+            self.urgent = False
+            if self.stats is not None:
+                queued_at = self._queued_at
+                self._queued_at = deque()
+        if self.stats is not None:
+            return self._flush_counted(queue, queued_at)
+        batch = []
+        size = 0
+        for compression, packet in queue:
+            trans_packet = self.handle_compression(compression, packet)
+            batch.append(trans_packet)
+            size += len(trans_packet)
+            if size >= self.max_batch:
+                self._transmit_batch(batch)
+                batch = []
+                size = 0
+        if batch:
+            self._transmit_batch(batch)
+
+    def _transmit_batch(self, batch):
+        self.socket_transmit(b"".join(batch))
+        self.batches_sent += 1
+        self.packets_sent += len(batch)
+
+    def _flush_counted(self, queue, queued_at):
+        """ flush(), counting each packet sent in `self.stats`. """
+        batch = []
+        sent = []
+        size = 0
+        for compression, packet in queue:
+            queued, pkid = queued_at.popleft() if queued_at else (
+                time.time(), -1)
             trans_packet = self.handle_compression(compression, packet)
-            self.socket_transmit(trans_packet)
+            batch.append(trans_packet)
+            sent.append((pkid, len(trans_packet), queued))
+            size += len(trans_packet)
+            if size >= self.max_batch:
+                self._transmit_counted(batch, sent)
+                batch = []
+                sent = []
+                size = 0
+        if batch:
+            self._transmit_counted(batch, sent)
+
+    def _transmit_counted(self, batch, sent):
+        self._transmit_batch(batch)
+        now = time.time()
+        on_send = self.stats.on_send
+        for pkid, wire, queued in sent:
+            on_send(pkid, wire, now - queued)
+
+    def wait_for_flush(self, delay, timeout):
+        """
+        Used by flush threads - wait until there is something to flush.
+        Once a packet is queued, wait up to `delay` seconds more for
+        others to batch with it, unless an urgent packet is queued or the
+        queue reaches `max_batch` bytes first.
 
-    def send_raw_untouched(self, payload):
-        if not self.abort:
-            self.queue.append((-1, payload))
+        :param delay: seconds to let packets accumulate.
+        :param timeout: give up (return False) if nothing is queued
+         within this many seconds.
 
-    def send_raw(self, payload):
-        if not self.abort:
-            self.queue.append((self.compressThreshold, payload))
+        :returns: True if there are packets to flush.
+        """
+        with self._queued:
+            if not self.queue:
+                self._queued.wait(timeout)
+                if not self.queue:
+                    return False
+            deadline = time.time() + delay
+            while not (self.urgent or self.abort or
+                       self.queued_bytes >= self.max_batch):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._queued.wait(remaining)
+        return True
+
+    def _enqueue(self, compression, payload, urgent, pkid):
+        if self.abort:
+            return
+        with self._queued:
+            self.queue.append((compression, payload))
+            if self.stats is not None:
+                self._queued_at.append((time.time(), pkid))
+            self.queued_bytes += len(payload)
+            if urgent:
+                self.urgent = True
+            if urgent or len(self.queue) == 1 or (
+                    self.queued_bytes >= self.max_batch):
+                self._queued.notify()
+        if self.on_queue is not None:
+            self.on_queue(urgent)
+
+    def send_raw_untouched(self, payload, pkid=-1):
+        self._enqueue(-1, payload, pkid in self.urgent_ids, pkid)
+
+    def send_raw(self, payload, urgent=False, pkid=-1):
+        self._enqueue(self.compressThreshold, payload, urgent, pkid)
 
     def readpkt(self, args):
         """
@@ -332,10 +580,17 @@ class Packet(object):
                     same order the args were passed.
 
         """
+        if len(args) == 1:
+            # nothing to gain from a layout
+            return [self._PKTREAD[args[0]]()]
         result = []
-        for arg in args:
-            item = self._PKTREAD[arg]()
-            result.append(item)
+        layout = LAYOUTS.get(tuple(args)) or compile_layout(args)
+        for step in layout:
+            if step.__class__ is int:
+                result.append(self._PKTREAD[step]())
+            else:
+                # a run of fixed width fields, read in one go.
+                result.extend(step.unpack(self.read_data(step.size)))
         return result
 
     def sendpkt(self, pkid, args, payload,):
@@ -357,18 +612,29 @@ class Packet(object):
                             same order the args were passed.
 
                 """
-        result = b""  # PY 2-3
+        if len(args) < 2:
+            # nothing to gain from a layout
+            result = self.send_varint(pkid)
+            if args:
+                result += self._PKTSEND[args[0]](payload[0])
+            self.send_raw(result, pkid in self.urgent_ids, pkid)
+            return result
+
         # start with packet id
-        result += self.send_varint(pkid)
+        parts = [self.send_varint(pkid)]
         # append results to the result packet for each type
-        argcount = len(args)
-        if argcount == 0:
-            self.send_raw(result)
-            return result
-        for x, arg in enumerate(args):
-            pay = payload[x]
-            result += self._PKTSEND[arg](pay)
-        self.send_raw(result)
+        x = 0
+        layout = LAYOUTS.get(tuple(args)) or compile_layout(args)
+        for step in layout:
+            if step.__class__ is int:
+                parts.append(self._PKTSEND[step](payload[x]))
+                x += 1
+            else:
+                # a run of fixed width fields, packed in one go.
+                parts.append(step.pack(payload[x:x + step.count]))
+                x += step.count
+        result = b"".join(parts)  # PY 2-3
+        self.send_raw(result, pkid in self.urgent_ids, pkid)
         return result
 
     # -- SENDING DATA TYPES -- #
@@ -624,22 +890,11 @@ class Packet(object):
     # -- READING Methods  -- #
     # ---------------------- #
     def recv(self, length):
-        if length > 200:
-            d = b""  # Py 2-3
-            while len(d) < length:
-                m = length - len(d)
-                if m > 5000:
-                    m = 5000
-                d += self.socket.recv(m)
-        else:
-            d = self.socket.recv(length)
-            if len(d) == 0:
-                raise EOFError("Packet stream ended (Client disconnected")
-        if self.recvCipher is None:
-            return d
-        return self.recvCipher.update(d)
+        return self.recvbuf.read(self.socket, length, self.recvCipher)
 
     def read_data(self, length):
+        if self.buffer is None:
+            self._inflate_rest()
         d = self.buffer.read(length)
         if len(d) == 0 and length is not 0:
             # "Received no data or less data than expected - connection closed"
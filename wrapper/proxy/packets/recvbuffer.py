@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+The receive side of a Packet's socket.
+
+Rather than asking the socket for each varint byte and each payload
+separately, RecvBuffer reads whatever the socket has (up to the free
+space in its buffer) with a single `recv_into()`, decrypts the new bytes
+with one cipher call and then frames whole packets out of the buffer.
+Frames are handed out as memoryview slices of the buffer (no copy); they
+are only valid until the next `fill()`.
+"""
+
+DEFAULT_SIZE = 65536
+# the protocol's largest packet (a 3 byte length VarInt).  A longer
+#  declared length is refused before any room is made for it.
+MAX_FRAME = 2097151
+
+
+class RecvBuffer(object):
+    def __init__(self, size=DEFAULT_SIZE):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        # buffered bytes are self.buf[self.start:self.end]
+        self.start = 0
+        self.end = 0
+        # True once bytes are being decrypted.  See `_check_cipher()`.
+        self.decrypting = False
+        # number of recv_into() calls (for stats/benchmarks)
+        self.reads = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def _check_cipher(self, cipher):
+        """
+        Bytes are decrypted as they are received.  Any bytes buffered
+        while the cipher was not set yet (but after the packet that
+        turned encryption on) are still encrypted, so decrypt those the
+        first time we see the cipher.
+        """
+        if cipher is not None and not self.decrypting:
+            self.decrypting = True
+            if self.end > self.start:
+                self.buf[self.start:self.end] = cipher.update(
+                    self.view[self.start:self.end])
+
+    def _make_room(self, needed):
+        """ Make sure `needed` bytes (counted from self.start) fit. """
+        size = len(self.buf)
+        if needed > size:
+            # never resize in place; a frame view may still be around.
+            while size < needed:
+                size *= 2
+            newbuf = bytearray(size)
+            newbuf[:self.end - self.start] = self.view[self.start:self.end]
+            self.buf = newbuf
+            self.view = memoryview(newbuf)
+            self.end -= self.start
+            self.start = 0
+        elif self.start + needed > size or (
+                self.start and size - self.end < size // 4):
+            # compact - move what is buffered to the front (through a
+            #  copy; the two ranges may overlap).
+            length = self.end - self.start
+            self.buf[:length] = self.view[self.start:self.end].tobytes()
+            self.start = 0
+            self.end = length
+
+    def fill(self, sock, cipher=None):
+        """
+        Read as much as `sock` has available (and fits) into the buffer,
+        decrypting it with `cipher`, if given.
+
+        :returns: the number of bytes read; 0 means the socket closed.
+        """
+        self._check_cipher(cipher)
+        if self.end == self.start:
+            self.start = self.end = 0
+        self._make_room(self.end - self.start + 1)
+        self.reads += 1
+        received = sock.recv_into(self.view[self.end:])
+        if received and cipher is not None:
+            stop = self.end + received
+            self.buf[self.end:stop] = cipher.update(self.view[self.end:stop])
+        self.end += received
+        return received
+
+    def feed(self, data):
+        """ Add bytes that were already read from the socket (before
+        encryption was turned on). """
+        self._make_room(self.end - self.start + len(data))
+        self.buf[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def read(self, sock, length, cipher=None):
+        """
+        Blocking read of exactly `length` bytes (as bytes).
+
+        :raises: EOFError if the socket closes first, ValueError if
+         `length` is more than MAX_FRAME.
+        """
+        if length > MAX_FRAME:
+            raise ValueError("Read of %d bytes is too big" % length)
+        self._check_cipher(cipher)
+        while self.end - self.start < length:
+            self._make_room(length)
+            if not self.fill(sock, cipher):
+                raise EOFError("Packet stream ended (Client disconnected")
+        data = self.view[self.start:self.start + length].tobytes()
+        self.start += length
+        return data
+
+    def next_frame(self, cipher=None):
+        """
+        Frame the next packet from the buffered bytes.
+
+        :returns: a memoryview of the packet (everything after the packet
+         length VarInt), or None if the whole packet is not buffered yet.
+        :raises: ValueError if the packet is longer than MAX_FRAME (the
+         connection is then closed).
+        """
+        self._check_cipher(cipher)
+        buf = self.buf
+        pos = self.start
+        end = self.end
+        length = 0
+        shift = 0
+        while True:
+            if pos >= end:
+                return None
+            val = buf[pos]
+            pos += 1
+            length |= ((val & 0x7F) << shift)
+            if not val & 0x80:
+                break
+            shift += 7
+            if shift > 35:
+                raise ValueError("Packet length VarInt is too big")
+        if length > MAX_FRAME:
+            raise ValueError("Packet length %d is too big" % length)
+        if end - pos < length:
+            # whole packet is not here yet; make sure it will fit.
+            self._make_room(pos - self.start + length)
+            return None
+        self.start = pos + length
+        return self.view[pos:self.start]
+
+    def read_frame(self, sock, cipher=None):
+        """
+        Blocking version of next_frame().
+
+        :raises: EOFError if the socket closes first.
+        """
+        while True:
+            frame = self.next_frame(cipher)
+            if frame is not None:
+                return frame
+            if not self.fill(sock, cipher):
+                raise EOFError("Packet stream ended (Client disconnected")
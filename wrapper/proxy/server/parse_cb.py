@@ -410,6 +410,7 @@ class ParseCB(object):
         # noinspection PyBroadException
         try:
             self.proxy.srv_data.timeofday = data[1]
+            self.proxy.srv_data.ticks.time_update(data[0])
         except:
             pass
         return True
@@ -444,11 +445,16 @@ class ParseCB(object):
             player = self.client.srv_data.players[self.client.username]
         except KeyError:
             return False
+        # what the server sent (plugins may edit `completes` in place)
+        original = list(data)
+        completes = data
+        if not new_format:
+            completes = self._command_completes(player, data)
         payload = self.proxy.eventhandler.callevent(
             "server.autoCompletes", {
                 "playername": self.client.username,
                 "player": player,
-                "completes": data})
+                "completes": completes})
         """ eventdoc
             <group> Proxy <group>
 
@@ -474,14 +480,39 @@ class ParseCB(object):
         if payload is False:
             return False
         # TODO - parse new_format
+        if new_format:
+            return True
         # change payload.
         if type(payload) == list:
+            completes = payload
+        if completes != original:
             self.client.packet.sendpkt(self.pktCB.TAB_COMPLETE[PKT],
                                        self.pktCB.TAB_COMPLETE[PARSER],
-                                       [payload])
+                                       (None, None, None, completes))
             return False
         return True
 
+    def _command_completes(self, player, completes):
+        """
+        Add the wrapper and plugin commands to the server's completions
+         of a command name (pre-1.13 format; 1.13 clients complete
+         command names themselves).
+
+        :returns: `completes`, or a new list if anything was added.
+        """
+        commands = self.proxy.commands
+        text = self.client.tab_text
+        prefix = self.proxy.srv_data.command_prefix
+        if not commands or not text.startswith(prefix) or " " in text:
+            return completes
+        known = set(completes)
+        added = ["%s%s" % (prefix, name)
+                 for name in commands.complete(player, text[len(prefix):])
+                 if "%s%s" % (prefix, name) not in known]
+        if not added:
+            return completes
+        return sorted(completes + added)
+
     def update_health(self):
         data = self.packet.readpkt(self.pktCB.UPDATE_HEALTH[PARSER])
         self.client.health = data[0]
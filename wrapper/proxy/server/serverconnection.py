@@ -19,6 +19,7 @@ from proxy.packets import mcpackets_sb
 from proxy.packets import mcpackets_cb
 
 from proxy.utils.constants import *
+from proxy.utils.capture import CLIENTBOUND
 from proxy.utils.mcuuid import MCUUID
 
 
@@ -51,6 +52,9 @@ class ServerConnection(object):
         # server setup and operating paramenters
         self.abort = False
         self.flush_rate = self.client.flush_rate
+        self.flush_delay = self.client.flush_delay
+        # shares the client's EventLoop, if the proxy uses them.
+        self.loop = self.client.loop
         self.state = HANDSHAKE
         self.packet = None
         self.parse_cb = None
@@ -84,7 +88,8 @@ class ServerConnection(object):
 
     def connect(self):
         """ This simply establishes the tcp socket connection and
-        starts the flush loop, NOTHING MORE. """
+        starts the flush loop, NOTHING MORE.  (An event loop does the
+        flushing for "eventloop" proxy-engine connections.) """
         self.state = LOGIN
         # Connect to a local server address
         if self.ip is None:
@@ -98,25 +103,40 @@ class ServerConnection(object):
         # start packet handler
         self.packet = Packet(self.server_socket, self)
         self.packet.version = self.client.clientversion
+        self.packet.max_batch = self.client.flush_max_batch
+        self.packet.urgent_ids = set([self.pktSB.KEEP_ALIVE[PKT],
+                                      self.pktSB.CHAT_MESSAGE[PKT]])
+        if self.client.capture:
+            self.packet.tap = self.client.capture.tap(
+                CLIENTBOUND, self, self.packet)
+        if self.client.stats:
+            self.packet.stats = self.client.stats.packet(CLIENTBOUND, self)
+            self.parse = self._parse_counted
 
         # define parsers
         self.parse_cb = ParseCB(self, self.packet)
         self._define_parsers()
 
+        if self.loop:
+            return
         t = threading.Thread(target=self.flush_loop, args=())
         t.daemon = True
         t.start()
 
     def flush_loop(self):
+        """ Sends queued packets to the server.  See the client's
+        `_flush_loop()`. """
         rate = self.flush_rate
         while not self.abort:
-            time.sleep(rate)
             try:
+                if not self.packet.wait_for_flush(self.flush_delay, rate):
+                    continue
                 self.packet.flush()
             except AttributeError:
                 self.log.debug(
                     "%s server packet instance gone.", self.username
                                )
+                time.sleep(rate)
             except socket.error:
                 self.log.debug("Socket_error- server socket was closed"
                                " %s", self.infos_debug)
@@ -142,21 +162,49 @@ class ServerConnection(object):
                         e, traceback.format_exc())
                 )
 
-            # parse it
-            # send packet if parsing passed and client in play mode.
-            # all packets are parsed, but only play mode ones are transmitted.
-            if self.parse(pkid) and self.client.state == PLAY:
-                try:
-                    # self.parse will reject (False) any packet proxy modifies.
-                    self.client.packet.send_raw_untouched(orig_packet)
-                except Exception as e:
-                    return self.close_server(
-                        "handle() could not send packet '%s'.  "
-                        "Exception: %s TRACEBACK: \n%s" % (
-                            pkid, e, traceback.format_exc())
-                    )
+            if not self._handle_packet(pkid, orig_packet):
+                return False
         return self.close_server("handle() received abort signal.")
 
+    def handle_on_loop(self, loop):
+        """
+        The "eventloop" proxy-engine version of handle().  The server
+        socket is served by the client's `loop`, which frames each
+        packet and passes it to _handle_packet().
+        """
+        self.loop = loop
+        loop.add_connection(
+            self.server_socket, self.packet, self._handle_packet,
+            self._loop_ended, lambda: self.abort or self.client.abort,
+            name="server %s" % self.infos_debug
+        )
+
+    def _handle_packet(self, pkid, orig_packet):
+        """
+        Parse one packet from the server and pass it on to the client.
+
+        :returns: False if the server connection was closed.
+        """
+        # parse it
+        # send packet if parsing passed and client in play mode.
+        # all packets are parsed, but only play mode ones are transmitted.
+        if self.parse(pkid) and self.client.state == PLAY:
+            try:
+                # self.parse will reject (False) any packet proxy modifies.
+                self.client.packet.send_raw_untouched(orig_packet, pkid)
+            except Exception as e:
+                self.close_server(
+                    "handle() could not send packet '%s'.  "
+                    "Exception: %s TRACEBACK: \n%s" % (
+                        pkid, e, traceback.format_exc())
+                )
+                return False
+        return True
+
+    def _loop_ended(self):
+        """ Called by the event loop when the server socket is dropped. """
+        self.close_server("event loop connection ended.")
+
     def close_server(self, reason="Disconnected"):
         """
         Client is responsible for closing the server connection and handling
@@ -286,6 +334,17 @@ class ServerConnection(object):
             return self.parsers[self.state][pkid]()
         return True
 
+    def _parse_counted(self, pkid):
+        """ parse(), timing the parser for "packet-stats". """
+        if pkid in self.parsers[self.state]:
+            stats = self.packet.stats
+            start = time.time()
+            try:
+                return self.parsers[self.state][pkid]()
+            finally:
+                stats.on_parse(time.time() - start)
+        return True
+
     def _define_parsers(self):
         # the packets we parse and the methods that parse them.
         self.parsers = {
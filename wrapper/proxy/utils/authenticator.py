@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Mojang session server verification for online mode logins.
+
+Every login used to get its own thread and its own `requests.get()` to
+the session server (new TLS connection, no timeout).  A SessionVerifier
+instead runs a small fixed pool of workers, each with its own keep-alive
+`requests.Session`.  Logins wait in a queue (in order) for a free
+worker; when a lot of players log in at once (say, after a restart),
+only `workers` requests are in flight at a time and the rest are told
+where they are in the queue.
+
+The session server URL is configurable ("session-server"), so the pool
+can be pointed at a local stand-in for testing.
+"""
+
+import threading
+import time
+from collections import deque
+
+import requests
+
+SESSION_SERVER = "https://sessionserver.mojang.com/session/minecraft/hasJoined"
+
+
+class _Job(object):
+    __slots__ = ("username", "serverid", "callback", "queued")
+
+    def __init__(self, username, serverid, callback):
+        self.username = username
+        self.serverid = serverid
+        self.callback = callback
+        self.queued = time.time()
+
+
+class SessionVerifier(object):
+    """
+    :param log: logger.
+    :param url: the session server's `hasJoined` URL.
+    :param workers: how many requests may be in flight at once.
+    :param timeout: seconds to wait for the session server.
+    :param max_queue: logins that may wait for a worker.  Logins beyond
+     this are refused.
+    """
+    def __init__(self, log, url=SESSION_SERVER, workers=4, timeout=5.0,
+                 max_queue=100):
+        self.log = log
+        self.url = url
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.abort = False
+
+        self.queue = deque()
+        self._lock = threading.Condition()
+        self._threads = []
+
+        # stats
+        self.verified = 0
+        self.failed = 0
+        self.busy = 0
+        self.longest_wait = 0
+
+    def start(self):
+        for number in range(self.workers):
+            t = threading.Thread(target=self._worker,
+                                 name="SessionVerifier-%d" % number, args=())
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        with self._lock:
+            self.abort = True
+            self._lock.notify_all()
+
+    def submit(self, username, serverid, callback):
+        """
+        Queue a session server check of `username`.
+
+        :param callback: called (on a worker thread) as
+         `callback(profile, error)`.  `profile` is the session server's
+         JSON response ({"id", "name", "properties"}), or None if the
+         check failed, in which case `error` says why.
+
+        :returns: the login's position among the logins being checked
+         or waiting, its own included (so a position over `workers`
+         means it waits for a worker), or 0 if the queue is full and
+         the login was refused.
+        """
+        with self._lock:
+            if len(self.queue) >= self.max_queue:
+                return 0
+            self.queue.append(_Job(username, serverid, callback))
+            position = self.busy + len(self.queue)
+            self._lock.notify()
+        return position
+
+    def _worker(self):
+        # keep-alive connection to the session server, reused by every
+        #  request this worker makes.
+        session = requests.Session()
+        while True:
+            with self._lock:
+                while not self.queue and not self.abort:
+                    self._lock.wait()
+                if self.abort:
+                    break
+                job = self.queue.popleft()
+                self.busy += 1
+            waited = time.time() - job.queued
+            if waited > self.longest_wait:
+                self.longest_wait = waited
+            try:
+                profile, error = self._verify(session, job)
+                if profile is None:
+                    self.failed += 1
+                else:
+                    self.verified += 1
+                job.callback(profile, error)
+            except Exception as e:
+                self.log.exception("Session verification of %s failed: %s",
+                                   job.username, e)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+        session.close()
+
+    def _verify(self, session, job):
+        try:
+            r = session.get(self.url, params={"username": job.username,
+                                              "serverId": job.serverid},
+                            timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            return None, "Session server timed out"
+        except requests.exceptions.RequestException as e:
+            self.log.debug("Session server request for %s failed: %s",
+                           job.username, e)
+            return None, "Session server could not be reached"
+        if r.status_code != 200:
+            return None, "HTTP Status Code %d" % r.status_code
+        try:
+            return r.json(), None
+        except ValueError:
+            return None, "Session server sent an invalid response"
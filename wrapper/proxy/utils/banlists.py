@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+The server's ban lists (banned-players.json and banned-ips.json), for
+the proxy's ban checks.
+
+A list is read into memory once and indexed by its key fields ("uuid"
+and "name", or "ip"), so the check made during each login is a dict
+lookup.  The file is read again only when its modification time (or
+size) changes, which is looked at no more than every CHECK_INTERVAL
+seconds.  Changes made through the list that are not written yet are
+applied again on top of what was read.
+
+Changes are written back in one batch, WRITE_DELAY seconds after the
+first of them, in the server's format, to a temporary file that is
+renamed over the list.
+
+Temporary bans are kept in a heap by expiry time, so expired ones are
+found (and removed) without going through the whole list.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from api.helpers import read_timestr, write_atomic
+
+# seconds between looks at the file's modification time
+CHECK_INTERVAL = 1.0
+# seconds from the first change to the write
+WRITE_DELAY = 2.0
+
+# what read_timestr() makes of "forever"
+FOREVER = 9999999999
+
+ADD = "add"
+REMOVE = "remove"
+
+
+class ServerList(object):
+    """
+    :param log: logger.
+    :param path: the list's json file.
+    :param fields: the fields entries are looked up by.  The first one
+     is the entry's key: a list has one entry per key.
+    :param scheduler: a core.scheduler.Scheduler, to write changes
+     later in batches.  Without one, each change is written at once.
+    """
+    def __init__(self, log, path, fields, scheduler=None):
+        self.log = log
+        self.path = path
+        self.fields = fields
+        self.key = fields[0]
+        self.scheduler = scheduler
+        # False if the file does not exist
+        self.found = False
+        # key: entry, in file order
+        self.entries = OrderedDict()
+        # field: {value: [entries]}, for the other fields
+        self.index = dict((field, {}) for field in fields[1:])
+        # (expiry time, sequence, key, entry)
+        self.expiry = []
+        self._sequence = itertools.count()
+        # the changes not written yet, (ADD, entry) or (REMOVE, key)
+        self.pending = []
+        self._stat = None
+        self._checked = 0
+        self._write_task = None
+        self._lock = threading.RLock()
+
+    def get(self, field, value):
+        """ :returns: the entry whose `field` is `value`, or None. """
+        with self._lock:
+            self.refresh()
+            if field == self.key:
+                return self.entries.get(value)
+            entries = self.index[field].get(value)
+            return entries[0] if entries else None
+
+    def add(self, entry):
+        """ Add (or replace) an entry. """
+        with self._lock:
+            self.refresh()
+            self._add(entry)
+            self._changed((ADD, entry))
+
+    def remove(self, field, value):
+        """ :returns: the entry removed, or None if there was none. """
+        with self._lock:
+            entry = self.get(field, value)
+            if entry is None:
+                return None
+            self._remove(entry[self.key])
+            self._changed((REMOVE, entry[self.key]))
+            return entry
+
+    def expire(self, now=None):
+        """
+        Remove the entries that expired.
+
+        :returns: a list of them.
+        """
+        if now is None:
+            now = int(time.time())
+        expired = []
+        with self._lock:
+            self.refresh()
+            while self.expiry and self.expiry[0][0] < now:
+                _, _, key, entry = heapq.heappop(self.expiry)
+                if self.entries.get(key) is not entry:
+                    # removed or replaced since
+                    continue
+                self._remove(key)
+                self._changed((REMOVE, key))
+                expired.append(entry)
+        return expired
+
+    def refresh(self, force=False):
+        """ Read the file again if it changed. """
+        now = time.time()
+        if not force and now - self._checked < CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._checked = now
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                self.found = False
+                if self._stat is not None:
+                    # deleted; it starts out empty again
+                    self._stat = None
+                    self._load([])
+                return
+            self.found = True
+            stat = (stat.st_mtime, stat.st_size)
+            if stat == self._stat:
+                return
+            try:
+                with open(self.path, "rb") as f:
+                    entries = json.loads(f.read().decode("utf-8") or "[]")
+            except ValueError as e:
+                # maybe half written; keep what we have and try again
+                self.log.warning("Could not read '%s' (%s)", self.path, e)
+                return
+            except (IOError, OSError) as e:
+                self.log.warning("Could not read '%s' (%s)", self.path, e)
+                return
+            self._stat = stat
+            self._load(entries)
+
+    def flush(self):
+        """
+        Write the changes, if there are any.
+
+        :returns: False if they could not be written.
+        """
+        with self._lock:
+            self._write_task = None
+            if not self.pending:
+                return True
+            data = json.dumps(list(self.entries.values()), ensure_ascii=False,
+                              indent=2, sort_keys=True)
+            try:
+                write_atomic(self.path, data.encode("utf-8"))
+                stat = os.stat(self.path)
+            except (IOError, OSError) as e:
+                self.log.error("Could not write '%s' (%s)", self.path, e)
+                return False
+            self.pending = []
+            self._stat = (stat.st_mtime, stat.st_size)
+            return True
+
+    def _load(self, entries):
+        self.entries = OrderedDict()
+        self.index = dict((field, {}) for field in self.fields[1:])
+        self.expiry = []
+        for entry in entries:
+            if isinstance(entry, dict) and self.key in entry:
+                self._add(entry)
+        # what was not written yet still goes on top
+        for change, item in self.pending:
+            if change == ADD:
+                self._add(item)
+            elif item in self.entries:
+                self._remove(item)
+        self.log.debug("Read %d entries from '%s'", len(self.entries),
+                       self.path)
+
+    def _add(self, entry):
+        key = entry[self.key]
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        for field, index in self.index.items():
+            value = entry.get(field)
+            if value is not None:
+                index.setdefault(value, []).append(entry)
+        expires = entry.get("expires", "forever")
+        if expires != "forever":
+            expiry = read_timestr(expires)
+            if expiry < FOREVER:
+                heapq.heappush(self.expiry,
+                               (expiry, next(self._sequence), key, entry))
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        for field, index in self.index.items():
+            entries = index.get(entry.get(field))
+            if entries is None:
+                continue
+            entries.remove(entry)
+            if not entries:
+                del index[entry.get(field)]
+
+    def _changed(self, change):
+        self.pending.append(change)
+        if self.scheduler is None:
+            self.flush()
+        elif self._write_task is None:
+            self._write_task = self.scheduler.schedule(WRITE_DELAY,
+                                                       self.flush)
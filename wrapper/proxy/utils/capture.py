@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Packet capture, for replaying real proxy traffic offline (see
+benchmarks/replay_capture.py).
+
+With "packet-capture" on, every client connection writes what it reads
+from the client (server bound) and from the server (client bound) to a
+gzipped capture file in "packet-capture-dir".  Packets are captured
+framed (without the length prefix) and decrypted, but still compressed
+if compression was on, so a replay goes through the same `Packet`
+unpacking the proxy does.
+
+A capture file is MAGIC followed by records.  Each record is a RECORD
+header (kind, direction, seconds since the capture started, payload
+length) and its payload:
+
+ - FRAME: one packet, as described above.
+ - CONTEXT: written before a direction's first packet and whenever its
+   connection state, compression threshold, protocol version or
+   username changes.  The payload is a JSON object with "state",
+   "threshold", "version" and "username".
+"""
+
+import gzip
+import json
+import os
+import struct
+import threading
+import time
+
+from api.helpers import mkdir_p
+
+MAGIC = b"WRAPCAP1"
+
+# record kinds
+FRAME = 0
+CONTEXT = 1
+
+# directions
+SERVERBOUND = 0
+CLIENTBOUND = 1
+
+RECORD = struct.Struct(">BBdI")
+
+
+class PacketCapture(object):
+    """
+    The capture file of one client connection.
+
+    :param directory: where to write it.
+    :param addr: the client's address (used in the file name).
+    :param log: logger.
+    """
+    def __init__(self, directory, addr, log):
+        self.log = log
+        mkdir_p(directory)
+        self.path = os.path.join(directory, "%s-%s-%s.wcap" % (
+            time.strftime("%Y%m%d-%H%M%S"), addr[0], addr[1]))
+        # level 1: capturing should cost the proxy as little as possible.
+        self.file = gzip.open(self.path, "wb", 1)
+        self.file.write(MAGIC)
+        self.start = time.time()
+        self.closed = False
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def tap(self, direction, owner, packet):
+        """
+        :param direction: SERVERBOUND or CLIENTBOUND.
+        :param owner: the Client or ServerConnection reading `packet`.
+        :param packet: the Packet to capture.
+        :returns: a CaptureTap, to be set as `packet.tap`.
+        """
+        return CaptureTap(self, direction, owner, packet)
+
+    def write(self, kind, direction, payload):
+        record = RECORD.pack(kind, direction, time.time() - self.start,
+                             len(payload)) + payload
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self.file.write(record)
+            except (IOError, OSError) as e:
+                self.log.error("Packet capture %s stopped: %s", self.path, e)
+                self.closed = True
+                return
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.file.close()
+        self.log.debug("Packet capture %s closed (%d records)", self.path,
+                       self.records)
+
+
+class CaptureTap(object):
+    """ Captures the frames one Packet reads.  See `PacketCapture.tap()`. """
+    __slots__ = ("capture", "direction", "owner", "packet", "context")
+
+    def __init__(self, capture, direction, owner, packet):
+        self.capture = capture
+        self.direction = direction
+        self.owner = owner
+        self.packet = packet
+        self.context = None
+
+    def frame(self, frame):
+        owner = self.owner
+        context = (owner.state, self.packet.compressThreshold, owner.version,
+                   owner.username)
+        if context != self.context:
+            self.context = context
+            self.capture.write(CONTEXT, self.direction, json.dumps({
+                "state": context[0], "threshold": context[1],
+                "version": context[2], "username": context[3]
+            }).encode("utf-8"))
+        self.capture.write(FRAME, self.direction, frame.tobytes())
+
+
+def read_capture(path):
+    """
+    Read a capture file.
+
+    :returns: a generator of (kind, direction, time, payload) records.
+     CONTEXT payloads are returned decoded (as a dict).
+    """
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a packet capture" % path)
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                # end of file (or a capture cut short by a crash)
+                return
+            kind, direction, when, length = RECORD.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            if kind == CONTEXT:
+                payload = json.loads(payload.decode("utf-8"))
+            yield kind, direction, when, payload
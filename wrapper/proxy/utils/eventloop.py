@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Selector based proxy engine (`"proxy-engine": "eventloop"`).
+
+The classic (threaded) proxy engine runs a `handle`, a flush loop and a
+keep alive thread for each client, plus a `handle` and a flush loop for
+each client's server connection.  An EventLoop instead multiplexes the
+sockets of many clients (and their server connections) on one thread.
+Proxy.base starts a small fixed number of loops and hands each new
+client to one of them.  A client and its server connection always share
+the same loop.
+
+The loop only does the socket work: reading, framing (via
+`Packet.fill()` and `Packet.grab_buffered()`), flushing and writing.
+A connection whose Packet queues something is flushed at the end of the
+current loop pass, so everything queued while handling one batch of
+reads goes out together.
+Each framed packet is still handed to the connection's own
+`_handle_packet()`, so the `ParseSB`/`ParseCB` parsers and the `Packet`
+codec work exactly as they do in threaded mode.  Parsers therefore run
+on the loop thread; anything that blocks for long (network lookups,
+world changes) must be passed to another thread by the caller.
+"""
+
+import errno
+import heapq
+import socket
+import threading
+import time
+from collections import deque
+
+try:
+    import selectors
+except ImportError:
+    selectors = False
+
+# errors from a non-blocking socket that just mean "try again later"
+_RETRY = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
+
+class LoopConnection(object):
+    """
+    One socket served by an EventLoop.
+
+    :sock: the connected socket.
+    :packet: the `Packet` instance that codes this socket's packets.
+    :on_packet: called with `(pkid, original_packet)` for each framed
+     packet.  Returning False ends the connection.
+    :on_close: called (once, on the loop thread) after the connection
+     is removed from the loop.
+    :aborted: callable returning True when the owner wants the
+     connection closed (i.e. the owner's `abort` flag).
+    """
+    def __init__(self, sock, packet, on_packet, on_close, aborted, name):
+        self.sock = sock
+        self.packet = packet
+        self.on_packet = on_packet
+        self.on_close = on_close
+        self.aborted = aborted
+        self.name = name
+        self.writing = False
+        self.closed = False
+
+
+class EventLoop(object):
+    def __init__(self, proxy, name="ProxyLoop", flush_rate=.05):
+        self.proxy = proxy
+        self.log = proxy.log
+        self.name = name
+        self.flush_rate = flush_rate
+        self.abort = False
+
+        self.selector = selectors.DefaultSelector()
+        self.connections = {}
+        self.thread = None
+        # connections with queued packets, flushed after each pass
+        self._dirty = set()
+
+        # callbacks queued from other threads, run on the loop thread.
+        self._pending = deque()
+        # (deadline, sequence, callback, args) heap of timers
+        self._timers = []
+        self._timer_seq = 0
+        self._lock = threading.Lock()
+
+        # writing a byte here wakes a sleeping `select()`
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name=self.name,
+                                       args=())
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.abort = True
+        self._wake()
+
+    def in_loop_thread(self):
+        return threading.current_thread() is self.thread
+
+    # Thread-safe scheduling
+    # ----------------------
+
+    def call_soon(self, callback, *args):
+        """Run `callback(*args)` on the loop thread."""
+        self._pending.append((callback, args))
+        if not self.in_loop_thread():
+            self._wake()
+
+    def call_later(self, delay, callback, *args):
+        """Run `callback(*args)` on the loop thread after `delay`
+        seconds."""
+        with self._lock:
+            self._timer_seq += 1
+            heapq.heappush(self._timers, (
+                time.time() + delay, self._timer_seq, callback, args))
+        if not self.in_loop_thread():
+            self._wake()
+
+    def call_every(self, interval, callback, *args):
+        """Run `callback(*args)` every `interval` seconds until it
+        returns False."""
+        def _repeat():
+            if callback(*args) is not False:
+                self.call_later(interval, _repeat)
+        self.call_later(interval, _repeat)
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\x00")
+        except socket.error:
+            # the wake pipe is full, so the loop will wake anyway.
+            pass
+
+    # Connections
+    # -----------
+
+    def add_connection(self, sock, packet, on_packet, on_close, aborted,
+                       name="connection"):
+        """
+        Have this loop serve `sock`.  May be called from any thread.
+        See `LoopConnection` for the arguments.
+
+        :returns: the LoopConnection.
+        """
+        conn = LoopConnection(sock, packet, on_packet, on_close, aborted,
+                              name)
+        packet.nonblocking = True
+        packet.on_queue = lambda urgent: self._queued(conn)
+        self.call_soon(self._register, conn)
+        return conn
+
+    def _queued(self, conn):
+        """ `Packet.on_queue` hook - flush `conn` after this pass. """
+        if conn in self._dirty:
+            return
+        self._dirty.add(conn)
+        if not self.in_loop_thread():
+            self._wake()
+
+    def _register(self, conn):
+        try:
+            conn.sock.setblocking(False)
+            self.selector.register(conn.sock, selectors.EVENT_READ, conn)
+        except (ValueError, socket.error, KeyError) as e:
+            # socket closed before the loop got around to it.
+            self.log.debug("%s could not be added to %s: %s",
+                           conn.name, self.name, e)
+            conn.closed = True
+            self._safe_call(conn, conn.on_close)
+            return
+        self.connections[conn.sock] = conn
+        # the packet may already hold whole packets (see Proxy's
+        # StatusResponder hand off).
+        if len(conn.packet.recvbuf):
+            self._process(conn)
+
+    def close_connection(self, conn, reason="closed"):
+        """Remove `conn` from the loop (loop thread only)."""
+        if conn.closed:
+            return
+        conn.closed = True
+        self.log.debug("%s removed from %s: %s", conn.name, self.name,
+                       reason)
+        try:
+            self.selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        self.connections.pop(conn.sock, None)
+        self._safe_call(conn, conn.on_close)
+
+    def _safe_call(self, conn, callback, *args):
+        try:
+            return callback(*args)
+        except Exception as e:
+            self.log.exception("%s: %s raised an exception on %s: %s",
+                               self.name, callback, conn.name, e)
+            return False
+
+    # Loop
+    # ----
+
+    def run(self):
+        next_flush = time.time() + self.flush_rate
+        while not (self.abort or self.proxy.abort or self.proxy.caller.halt):
+            now = time.time()
+            timeout = next_flush - now
+            if self._timers:
+                timeout = min(timeout, self._timers[0][0] - now)
+            if self._pending or self._dirty:
+                timeout = 0
+
+            for key, mask in self.selector.select(max(timeout, 0)):
+                conn = key.data
+                if conn is None:
+                    self._drain_waker()
+                    continue
+                if mask & selectors.EVENT_READ and not conn.closed:
+                    self._read(conn)
+                if mask & selectors.EVENT_WRITE and not conn.closed:
+                    self._write(conn)
+
+            while self._pending:
+                callback, args = self._pending.popleft()
+                self._safe_call(None, callback, *args)
+
+            self._run_timers()
+            self._flush_dirty()
+
+            # sweep for aborted connections (and anything left queued)
+            if time.time() >= next_flush:
+                next_flush = time.time() + self.flush_rate
+                self._flush_all()
+
+        for conn in list(self.connections.values()):
+            self.close_connection(conn, "%s ended" % self.name)
+        self.selector.close()
+        self.log.debug("%s ended", self.name)
+
+    def _drain_waker(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+    def _run_timers(self):
+        now = time.time()
+        while self._timers and self._timers[0][0] <= now:
+            with self._lock:
+                deadline, seq, callback, args = heapq.heappop(self._timers)
+            self._safe_call(None, callback, *args)
+
+    def _read(self, conn):
+        try:
+            received = conn.packet.fill()
+        except socket.error as e:
+            if e.errno in _RETRY:
+                return
+            return self.close_connection(conn, "socket error %s" % e)
+        if not received:
+            return self.close_connection(conn, "EOF")
+        self._process(conn)
+
+    def _process(self, conn):
+        """ Hand each whole packet in the receive buffer to the owner. """
+        packet = conn.packet
+        while not (conn.closed or conn.aborted()):
+            try:
+                grabbed = packet.grab_buffered()
+            except Exception as e:
+                return self.close_connection(
+                    conn, "could not frame packet: %s" % e)
+            if grabbed is None:
+                break
+            pkid, orig_packet = grabbed
+            if self._safe_call(conn, conn.on_packet,
+                               pkid, orig_packet) is False:
+                return self.close_connection(conn, "handler ended")
+
+    def _flush_dirty(self):
+        while self._dirty:
+            conn = self._dirty.pop()
+            if not conn.closed:
+                self._flush(conn)
+
+    def _flush_all(self):
+        for conn in list(self.connections.values()):
+            if conn.aborted():
+                # flush whatever the owner queued before aborting (like a
+                # disconnect packet), then close.
+                self._flush(conn)
+                self.close_connection(conn, "aborted")
+                continue
+            self._flush(conn)
+
+    def _flush(self, conn):
+        try:
+            conn.packet.flush()
+            done = conn.packet.drain()
+        except socket.error as e:
+            return self.close_connection(conn, "socket error %s" % e)
+        self._want_write(conn, not done)
+
+    def _write(self, conn):
+        try:
+            done = conn.packet.drain()
+        except socket.error as e:
+            return self.close_connection(conn, "socket error %s" % e)
+        self._want_write(conn, not done)
+
+    def _want_write(self, conn, writing):
+        if conn.closed or writing == conn.writing:
+            return
+        conn.writing = writing
+        events = selectors.EVENT_READ
+        if writing:
+            events |= selectors.EVENT_WRITE
+        self.selector.modify(conn.sock, events, conn)
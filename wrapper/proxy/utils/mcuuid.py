@@ -12,6 +12,21 @@ import time
 import requests
 import os
 
+# How long (seconds) a usercache record is trusted before Mojang is
+# polled again.  Each record's "time" is when it was last polled.
+NAME_TTL = 86400
+FORCED_NAME_TTL = 3600
+UUID_TTL = 86400
+FORCED_UUID_TTL = 600
+# a record whose poll failed may be polled again this much sooner.
+RETRY_TTL = 7200
+# how long a name or uuid Mojang says does not exist is remembered.
+NEGATIVE_TTL = 3600
+
+# bulk name -> uuid lookup; takes up to BULK_LIMIT names per request.
+BULK_PROFILES = "https://api.mojang.com/profiles/minecraft"
+BULK_LIMIT = 10
+
 
 class MCUUID(uuid.UUID):
     """
@@ -27,10 +42,82 @@ class MCUUID(uuid.UUID):
         return str(self)
 
 
+class UserCacheIndex(object):
+    """
+    Index over the usercache (uuid: record), so a username can be found
+    without scanning every record.
+
+    `names` maps each lowercase "localname" to its uuid.  Entries are
+    checked against the record on every hit, and the index is rebuilt
+    when a hit is stale or when a miss finds the usercache has changed
+    size since the last rebuild.  Whatever else writes to the usercache
+    (the other UUIDS instance, plugins...) is picked up that way; code
+    that changes a localname should call `add()`.
+
+    `missing` remembers lowercase names and uuids that Mojang says do
+    not exist (name or uuid: time they may be polled again).
+    """
+    def __init__(self, usercache):
+        self.usercache = usercache
+        self.names = {}
+        self.size = -1
+        self.missing = {}
+        self.rebuilds = 0
+
+    def rebuild(self):
+        names = {}
+        for useruuid, record in list(self.usercache.items()):
+            localname = record.get("localname")
+            if localname:
+                names[localname.lower()] = useruuid
+        self.names = names
+        self.size = len(self.usercache)
+        self.rebuilds += 1
+
+    def find(self, name):
+        """ :returns: the uuid (string) whose localname is `name`, or None. """
+        key = name.lower()
+        useruuid = self.names.get(key)
+        if useruuid is not None:
+            record = self.usercache.get(useruuid)
+            if record and (record["localname"] or "").lower() == key:
+                return useruuid
+        elif len(self.usercache) == self.size:
+            return None
+        self.rebuild()
+        return self.names.get(key)
+
+    def add(self, useruuid):
+        """ (Re)index a record that was just added or renamed. """
+        record = self.usercache.get(useruuid)
+        if not record or not record["localname"]:
+            return
+        key = record["localname"].lower()
+        if len(self.usercache) == self.size + 1 and key not in self.names:
+            self.size += 1
+        self.names[key] = useruuid
+        self.missing.pop(key, None)
+        self.missing.pop(useruuid, None)
+
+    def is_missing(self, key):
+        key = key.lower()
+        expires = self.missing.get(key)
+        if expires is None:
+            return False
+        if time.time() < expires:
+            return True
+        self.missing.pop(key, None)
+        return False
+
+    def set_missing(self, key):
+        self.missing[key.lower()] = time.time() + NEGATIVE_TTL
+
+
 class UUIDS(object):
     def __init__(self, loginstance, usercache):
         self.log = loginstance
         self.usercache = usercache
+        self.index = UserCacheIndex(usercache)
 
     @staticmethod
     def formatuuid(playeruuid):
@@ -62,39 +149,54 @@ class UUIDS(object):
 
     def getuuidbyusername(self, username, forcepoll=False):
         """
-        Lookup user's UUID using the username. Primarily searches the usercache.  If record is
-        older than 30 days (or cannot be found in the cache), it will poll Mojang and also attempt a full
-        update of the cache using getusernamebyuuid as well.
+        Lookup user's UUID using the username. Primarily searches the
+        usercache.  If record is older than 30 days (or cannot be found in
+        the cache), it will poll Mojang and also attempt a full update of
+        the cache using getusernamebyuuid as well.
 
         :param username:  username as string
-        :param forcepoll:  force polling even if record has been cached in past 30 days
-        :returns: returns the online/Mojang MCUUID object from the given name. Updates the wrapper usercache.json
+        :param forcepoll:  force polling even if record has been cached in
+                past 30 days
+        :returns: returns the online/Mojang MCUUID object from the given
+                name. Updates the wrapper usercache.json
                 Yields False if failed.
         """
-        user_name = "%s" % username  # create a new name variable that is unrelated the the passed variable.
-        frequency = 86400  # daily (to ensure a new persons name gets loaded
+        # create a new name variable that is unrelated the the passed
+        #  variable.
+        user_name = "%s" % username
+        frequency = NAME_TTL  # daily (to ensure a new persons name gets loaded
         if forcepoll:
-            frequency = 3600  # do not allow more than hourly
-        user_uuid_matched = None
-        for useruuid in self.usercache:  # try wrapper cache first
-            if user_name.lower() == self.usercache[useruuid]["localname"].lower():
-                # This search need only be done by 'localname', which is always populated and is always
-                # the same as the 'name', unless a localname has been assigned on the server (such as
-                # when "falling back' on an old name).'''
-                if (time.time() - self.usercache[useruuid]["time"]) < frequency:
-                    return MCUUID(useruuid)
-                # if over the time frequency, it needs to be updated by using actual last polled name.
-                user_name = self.usercache[useruuid]["name"]
-                user_uuid_matched = useruuid  # cache for later in case multiple name changes require a uuid lookup.
+            frequency = FORCED_NAME_TTL  # do not allow more than hourly
+        # This search need only be done by 'localname', which is always
+        # populated and is always the same as the 'name', unless a
+        # localname has been assigned on the server (such as when "falling
+        # back' on an old name).
+        # try wrapper cache first
+        user_uuid_matched = self.index.find(user_name)
+        if user_uuid_matched:
+            polled = self.usercache[user_uuid_matched]["time"]
+            if (time.time() - polled) < frequency:
+                return MCUUID(user_uuid_matched)
+            # if over the time frequency, it needs to be updated by using
+            # actual last polled name.
+            user_name = self.usercache[user_uuid_matched]["name"]
+        elif self.index.is_missing(user_name):
+            return False  # Mojang recently said there is no such player
 
         # try mojang  (a new player or player changed names.)
-        r = requests.get("https://api.mojang.com/users/profiles/minecraft/%s" % user_name)
+        r = requests.get("https://api.mojang.com/users/profiles/minecraft/%s"
+                         % user_name)
         if r.status_code == 200:
-            useruuid = self.formatuuid(r.json()["id"])  # returns a string uuid with dashes
+            # returns a string uuid with dashes
+            useruuid = self.formatuuid(r.json()["id"])
             correctcapname = r.json()["name"]
-            if user_name != correctcapname:  # this code may not be needed if problems with /perms are corrected.
-                self.log.warning("%s's name is not correctly capitalized (offline name warning!)", correctcapname)
-            # This should only run subject to the above frequency (hence use of forcepoll=True)
+            # this code may not be needed if problems with /perms are
+            #  corrected.
+            if user_name != correctcapname:
+                self.log.warning("%s's name is not correctly capitalized "
+                                 "(offline name warning!)", correctcapname)
+            # This should only run subject to the above frequency (hence use
+            # of forcepoll=True)
             nameisnow = self.getusernamebyuuid(useruuid, forcepoll=True)
             if nameisnow:
                 return MCUUID(useruuid)
@@ -102,21 +204,96 @@ class UUIDS(object):
                              "(a non-MCUUID object).  This will likely "
                              "create other logical/program flow errors")
             return False
-        elif r.status_code == 204:  # try last matching UUID instead.  This will populate current name back in 'name'
+        elif r.status_code == 204:
+            # try last matching UUID instead.  This will populate current
+            #  name back in 'name'
             if user_uuid_matched:
-                nameisnow = self.getusernamebyuuid(user_uuid_matched, forcepoll=True)
+                nameisnow = self.getusernamebyuuid(user_uuid_matched,
+                                                   forcepoll=True)
                 if nameisnow:
                     return MCUUID(user_uuid_matched)
                 self.log.warning("Status code was 204 and returned False "
                                  "(a non-MCUUID object).  This will likely "
                                  "create other logical/program flow errors")
                 return False
+            self.index.set_missing(user_name)
+            return False
         else:
             self.log.warning(
                 "UUID returned False (a non-MCUUID object).  This "
                 "will likely create other logical/program flow errors")
             return False  # No other options but to fail request
 
+    def getuuidsbyusernames(self, usernames):
+        """
+        Lookup several users' UUIDs at once.  Names that are cached (and not
+        due to be re-polled) are answered from the usercache; the rest are
+        looked up together with Mojang's bulk profile lookup, BULK_LIMIT
+        names per request, instead of one request each.
+
+        :param usernames:  list of usernames
+        :returns: a dict of each username: its MCUUID, or False if it could
+                not be found.
+        """
+        results = {}
+        polled = {}  # name to ask Mojang for (lowercase): usernames asking
+        matched = {}  # name to ask Mojang for (lowercase): cached uuid
+        for username in usernames:
+            user_name = "%s" % username
+            useruuid = self.index.find(user_name)
+            if useruuid:
+                record = self.usercache[useruuid]
+                if (time.time() - record["time"]) < NAME_TTL:
+                    results[username] = MCUUID(useruuid)
+                    continue
+                user_name = record["name"] or user_name
+                matched[user_name.lower()] = useruuid
+            elif self.index.is_missing(user_name):
+                results[username] = False
+                continue
+            polled.setdefault(user_name.lower(), []).append(username)
+
+        names = list(polled)
+        for start in range(0, len(names), BULK_LIMIT):
+            batch = names[start:start + BULK_LIMIT]
+            try:
+                r = requests.post(BULK_PROFILES, json=batch, timeout=10)
+            except requests.exceptions.RequestException as e:
+                self.log.warning("Bulk UUID lookup failed: %s", e)
+                r = None
+            if r is None or r.status_code != 200:
+                if r is not None:
+                    self.log.warning("Bulk UUID lookup failed (status "
+                                     "code %s)", r.status_code)
+                for name in batch:
+                    for username in polled[name]:
+                        results[username] = False
+                continue
+
+            found = {}
+            for profile in r.json():
+                found[profile["name"].lower()] = self.formatuuid(profile["id"])
+            for name in batch:
+                useruuid = found.get(name, matched.get(name))
+                cached = self.usercache.get(useruuid)
+                if useruuid is None:
+                    self.index.set_missing(name)
+                    result = False
+                elif name in found and cached and \
+                        (cached["name"] or "").lower() == name:
+                    # same player, same name; just mark it as polled.
+                    cached["time"] = time.time()
+                    result = MCUUID(useruuid)
+                elif self.getusernamebyuuid(useruuid, forcepoll=True):
+                    # a new player, a name change, or a name Mojang no longer
+                    #  knows (like a 204 in getuuidbyusername); poll the uuid.
+                    result = MCUUID(useruuid)
+                else:
+                    result = False
+                for username in polled[name]:
+                    results[username] = result
+        return results
+
     def getusernamebyuuid(self, useruuid, forcepoll=False, uselocalname=True):
         # type: (str, bool, bool) -> bool or str
         """
@@ -132,9 +309,9 @@ class UUIDS(object):
         :returns: returns the username from the specified uuid, else returns False if failed.
         """
         # if called directly, can update cache daily (refresh names list, etc)
-        frequency = 86400
+        frequency = UUID_TTL
         if forcepoll:
-            frequency = 600  # 10 minute limit
+            frequency = FORCED_UUID_TTL  # 10 minute limit
 
         theirname = None
         if useruuid in self.usercache:  # if user is in the cache...
@@ -144,6 +321,8 @@ class UUIDS(object):
                 theirname = self.usercache[useruuid]["name"]
             if int((time.time() - self.usercache[useruuid]["time"])) < frequency:
                 return theirname  # dont re-poll if same time frame (daily = 86400).
+        elif self.index.is_missing(useruuid):
+            return False  # Mojang recently said there is no such uuid
 
         # continue on and poll... because user is not in cache or is old record that needs re-polled
         # else:  # user is not in cache
@@ -154,7 +333,7 @@ class UUIDS(object):
 
         if numbofnames == 0:
             if theirname is not None:
-                self.usercache[useruuid]["time"] = time.time() - frequency + 7200  # may try again in 2 hours
+                self.usercache[useruuid]["time"] = time.time() - frequency + RETRY_TTL  # may try again in 2 hours
                 return theirname
             self.log.warning("Instead of a name, this UUID returned False "
                              "because the name was not found locally and "
@@ -200,6 +379,7 @@ class UUIDS(object):
             self.usercache[useruuid]["name"] = pastnames[0]["name"]
             if self.usercache[useruuid]["localname"] is None:
                 self.usercache[useruuid]["localname"] = pastnames[0]["name"]
+        self.index.add(useruuid)
         if uselocalname:
             return self.usercache[useruuid]["localname"]
         else:
@@ -220,6 +400,7 @@ class UUIDS(object):
         if r.status_code == 200:
             return r.json()
         if r.status_code == 204:
+            self.index.set_missing(str(user_uuid))
             return False
         else:
             rx = requests.get("https://status.mojang.com/check")
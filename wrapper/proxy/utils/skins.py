@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Skin texture cache for `Proxy.getskintexture()`.
+
+Skin textures are stored by texture hash: the last part of the texture
+URL in a player's profile ("textures.minecraft.net/texture/<hash>").
+The hash is a hash of the image itself, so a cached texture never goes
+stale (a player who changes skins gets a new hash) and is never
+re-checked with Mojang.
+
+Textures are kept as .png files in `root` (at most `max_disk` of them)
+and the most recently used `max_memory` are also kept in memory, base64
+encoded, ready for the web panel.  Both drop their least recently used
+texture first.
+
+Textures that are not cached yet are downloaded by one background
+thread; `get()` never waits for the download and returns False until
+the texture is in.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+import requests
+
+from api.helpers import mkdir_p
+
+_HASH = re.compile("^[0-9a-f]+$")
+
+# a texture that could not be downloaded is not tried again for this
+# many seconds.
+RETRY_AFTER = 300
+
+
+def texture_of(blob):
+    """
+    :param blob: the base64 "textures" property of a player profile.
+    :returns: (hash, url) of the player's skin, or (None, None) if the
+     player has no skin (and uses the default one).
+    """
+    textual = base64.b64decode(blob).decode("utf-8", "ignore")
+    textures = json.loads(textual)["textures"]
+    if "SKIN" not in textures:
+        return None, None
+    url = textures["SKIN"]["url"]
+    texturehash = url.rsplit("/", 1)[-1].lower()
+    if not _HASH.match(texturehash):
+        texturehash = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return texturehash, url
+
+
+class SkinCache(object):
+    """
+    :param log: logger.
+    :param root: directory for the texture files.
+    :param max_disk: textures kept on disk.
+    :param max_memory: textures also kept in memory.
+    :param default: the texture (png bytes) of players with no skin.
+    :param timeout: seconds to wait for a texture download.
+    """
+    def __init__(self, log, root="wrapper-data/skins", max_disk=2000,
+                 max_memory=64, default=None, timeout=10):
+        self.log = log
+        self.root = root
+        self.max_disk = max_disk
+        self.max_memory = max_memory
+        self.timeout = timeout
+        self.abort = False
+        self.default = False
+        if default:
+            self.default = base64.b64encode(default).decode("ascii")
+
+        # hash: base64 texture, least recently used first
+        self.memory = OrderedDict()
+        # hash: None, least recently used first
+        self.disk = OrderedDict()
+        self._load_disk()
+
+        # hash: url
+        self.pending = {}
+        # hash: time it may be tried again (the expired ones are dropped
+        #  as others are added)
+        self.failed = {}
+        self.queue = deque()
+        self._lock = threading.Condition()
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+        self.downloads = 0
+
+    def _load_disk(self):
+        mkdir_p(self.root)
+        files = []
+        for filename in os.listdir(self.root):
+            if filename.endswith(".png"):
+                path = os.path.join(self.root, filename)
+                files.append((os.path.getmtime(path), filename[:-4]))
+        for _, texturehash in sorted(files):
+            self.disk[texturehash] = None
+
+    def start(self):
+        t = threading.Thread(target=self._worker, name="SkinCache", args=())
+        t.daemon = True
+        t.start()
+
+    def stop(self):
+        with self._lock:
+            self.abort = True
+            self._lock.notify()
+
+    def get(self, blob):
+        """
+        :param blob: the base64 "textures" property of a player profile.
+        :returns: the base64 encoded skin texture, or False if it is not
+         cached yet (it will be downloaded in the background).
+        """
+        texturehash, url = texture_of(blob)
+        if texturehash is None:
+            return self.default
+
+        with self._lock:
+            texture = self.memory.pop(texturehash, None)
+            if texture is not None:
+                self.memory[texturehash] = texture
+                self.hits += 1
+                return texture
+            ondisk = texturehash in self.disk
+
+        if ondisk:
+            texture = self._read(texturehash)
+            if texture:
+                self.hits += 1
+                return texture
+
+        with self._lock:
+            self.misses += 1
+            if texturehash in self.pending or \
+                    self.failed.get(texturehash, 0) > time.time():
+                return False
+            self.failed.pop(texturehash, None)
+            self.pending[texturehash] = url
+            self.queue.append(texturehash)
+            self._lock.notify()
+        return False
+
+    def _path(self, texturehash):
+        return os.path.join(self.root, "%s.png" % texturehash)
+
+    def _read(self, texturehash):
+        path = self._path(texturehash)
+        try:
+            with open(path, "rb") as f:
+                texture = base64.b64encode(f.read()).decode("ascii")
+            os.utime(path, None)
+        except (IOError, OSError):
+            with self._lock:
+                self.disk.pop(texturehash, None)
+            return False
+        with self._lock:
+            self.disk.pop(texturehash, None)
+            self.disk[texturehash] = None
+            self._remember(texturehash, texture)
+        return texture
+
+    def _remember(self, texturehash, texture):
+        """ Keep a texture in memory.  Call with the lock held. """
+        self.memory[texturehash] = texture
+        while len(self.memory) > self.max_memory:
+            self.memory.popitem(last=False)
+
+    def _store(self, texturehash, content):
+        path = self._path(texturehash)
+        temp = "%s.tmp" % path
+        try:
+            with open(temp, "wb") as f:
+                f.write(content)
+            os.rename(temp, path)
+        except (IOError, OSError) as e:
+            self.log.warning("Could not save skin texture %s: %s",
+                             texturehash, e)
+            saved = False
+        else:
+            saved = True
+        evicted = []
+        with self._lock:
+            if saved:
+                self.disk.pop(texturehash, None)
+                self.disk[texturehash] = None
+                while len(self.disk) > self.max_disk:
+                    evicted.append(self.disk.popitem(last=False)[0])
+            self._remember(texturehash,
+                           base64.b64encode(content).decode("ascii"))
+        for oldest in evicted:
+            try:
+                os.remove(self._path(oldest))
+            except OSError:
+                pass
+
+    def _failed(self, texturehash):
+        """ Note a failed download.  Call with the lock held. """
+        now = time.time()
+        for expired in [texture for texture, retry in self.failed.items()
+                        if retry <= now]:
+            del self.failed[expired]
+        self.failed[texturehash] = now + RETRY_AFTER
+
+    def _worker(self):
+        session = requests.Session()
+        while True:
+            with self._lock:
+                while not self.queue and not self.abort:
+                    self._lock.wait()
+                if self.abort:
+                    break
+                texturehash = self.queue.popleft()
+                url = self.pending[texturehash]
+            fetched = False
+            try:
+                r = session.get(url, timeout=self.timeout)
+                if r.status_code == 200:
+                    self._store(texturehash, r.content)
+                    self.downloads += 1
+                    fetched = True
+                else:
+                    self.log.warning("Could not fetch skin texture! "
+                                     "(status code %d)", r.status_code)
+            except requests.exceptions.RequestException as e:
+                self.log.warning("Could not fetch skin texture! (%s)", e)
+            finally:
+                with self._lock:
+                    self.pending.pop(texturehash, None)
+                    if not fetched:
+                        self._failed(texturehash)
+        session.close()
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Fast path for server list pings.
+
+Server list pings (handshake, status request, ping) used to get a full
+`Client` - its own thread, a `Packet`, packet sets and parsers - just to
+send back the MOTD.  A StatusResponder instead reads each new connection
+on one shared selector thread until its handshake says what it wants:
+
+ - STATUS connections are answered right here, with the proxy's cached
+   status response (`Proxy.status_response()`), and closed.
+ - anything else (LOGIN, legacy pings...) is handed back to the proxy,
+   along with the bytes already read, to become a normal `Client`.
+
+PingThrottle limits how many server list pings each IP may send.  It is
+checked once a handshake asks for STATUS (or is a legacy ping), so
+logins are never throttled.
+"""
+
+import errno
+import socket
+import threading
+import time
+from collections import deque
+
+try:
+    import selectors
+except ImportError:
+    selectors = False
+
+from proxy.utils.constants import STATUS
+
+# status packet IDs are the same in every protocol version
+_REQUEST = 0x00
+_PING = 0x01
+
+# a handshake is tiny (the address is at most 255 chars); anything
+# bigger than this that still is not a whole packet is garbage.
+_MAX_PENDING = 1024
+
+_RETRY = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
+
+def pack_varint(val):
+    total = bytearray()
+    if val < 0:
+        val = (1 << 32) + val
+    while val >= 0x80:
+        total.append(0x80 | (val & 0x7F))
+        val >>= 7
+    total.append(val)
+    return bytes(total)
+
+
+def _read_varint(data, pos):
+    """ :returns: (value, new position), or (None, pos) if incomplete. """
+    total = 0
+    shift = 0
+    while pos < len(data):
+        val = data[pos]
+        pos += 1
+        total |= ((val & 0x7F) << shift)
+        if not val & 0x80:
+            return total, pos
+        shift += 7
+        if shift > 35:
+            raise ValueError("VarInt is too big")
+    return None, pos
+
+
+class PingThrottle(object):
+    """
+    Per IP server list ping rate limit (a token bucket per IP).
+
+    :param per_minute: pings each IP may send per minute.  Up to this
+     many may be sent at once.  0 means no limit.
+    """
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.refill = per_minute / 60.0
+        # ip: [tokens, time last checked]
+        self.buckets = {}
+        self.refused = 0
+        self._next_prune = time.time() + 60
+        # checked by the StatusResponder and the Clients' threads
+        self._lock = threading.Lock()
+
+    def allow(self, ip):
+        if not self.per_minute:
+            return True
+        with self._lock:
+            return self._allow(ip)
+
+    def _allow(self, ip):
+        now = time.time()
+        if now > self._next_prune:
+            self._prune(now)
+        bucket = self.buckets.get(ip)
+        if bucket is None:
+            self.buckets[ip] = [self.per_minute - 1, now]
+            return True
+        tokens = min(self.per_minute,
+                     bucket[0] + (now - bucket[1]) * self.refill)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            self.refused += 1
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def _prune(self, now):
+        """ Forget IPs whose bucket has filled back up. """
+        self._next_prune = now + 60
+        full = self.per_minute / self.refill
+        for ip in list(self.buckets):
+            if now - self.buckets[ip][1] > full:
+                del self.buckets[ip]
+
+
+class _Pending(object):
+    """ A connection that is still in HANDSHAKE or STATUS. """
+    __slots__ = ("sock", "addr", "data", "outbound", "deadline", "status",
+                 "protocol", "closing")
+
+    def __init__(self, sock, addr, timeout):
+        self.sock = sock
+        self.addr = addr
+        self.data = bytearray()
+        self.outbound = bytearray()
+        self.deadline = time.time() + timeout
+        self.status = False
+        self.protocol = 0
+        self.closing = False
+
+
+class StatusResponder(object):
+    """
+    :param proxy: the Proxy.
+    :param handoff: called with `(sock, addr, data)` for connections
+     that are not server list pings.  `data` is what was already read
+     from `sock`.
+    :param timeout: seconds a connection may take to finish its
+     handshake (or its ping).
+    """
+    def __init__(self, proxy, handoff, timeout=5):
+        self.proxy = proxy
+        self.log = proxy.log
+        self.handoff = handoff
+        self.timeout = timeout
+        self.abort = False
+        self.answered = 0
+
+        self.selector = selectors.DefaultSelector()
+        self.pending = {}
+        self._new = deque()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    def start(self):
+        t = threading.Thread(target=self.run, name="StatusResponder",
+                             args=())
+        t.daemon = True
+        t.start()
+
+    def stop(self):
+        self.abort = True
+        self._wake()
+
+    def add(self, sock, addr):
+        """ Take a newly accepted connection (from any thread). """
+        self._new.append((sock, addr))
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\x00")
+        except socket.error:
+            pass
+
+    def run(self):
+        next_expire = time.time() + 1
+        while not (self.abort or self.proxy.abort or self.proxy.caller.halt):
+            for key, mask in self.selector.select(1):
+                conn = key.data
+                if conn is None:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except socket.error:
+                        pass
+                    continue
+                if mask & selectors.EVENT_READ:
+                    self._read(conn)
+                if mask & selectors.EVENT_WRITE and conn.sock in self.pending:
+                    self._write(conn)
+
+            while self._new:
+                self._register(*self._new.popleft())
+
+            now = time.time()
+            if now >= next_expire:
+                next_expire = now + 1
+                for conn in list(self.pending.values()):
+                    if now > conn.deadline:
+                        self._close(conn)
+
+        for conn in list(self.pending.values()):
+            self._close(conn)
+        self.selector.close()
+
+    def _register(self, sock, addr):
+        conn = _Pending(sock, addr, self.timeout)
+        try:
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ, conn)
+        except (ValueError, socket.error, KeyError):
+            return self._close(conn)
+        self.pending[sock] = conn
+
+    def _close(self, conn):
+        self._unregister(conn)
+        try:
+            conn.sock.close()
+        except socket.error:
+            pass
+
+    def _unregister(self, conn):
+        self.pending.pop(conn.sock, None)
+        try:
+            self.selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+
+    def _read(self, conn):
+        try:
+            data = conn.sock.recv(4096)
+        except socket.error as e:
+            if e.errno in _RETRY:
+                return
+            return self._close(conn)
+        if not data:
+            return self._close(conn)
+        conn.data += data
+        try:
+            self._process(conn)
+        except Exception as e:
+            self.log.debug("StatusResponder dropped %s: %s", conn.addr, e)
+            self._close(conn)
+
+    def _process(self, conn):
+        data = conn.data
+        while data and not conn.closing:
+            if not conn.status and data[0] == 0xfe:
+                # legacy (pre-1.7) ping; let the Client deal with it.
+                if not self.proxy.ping_throttle.allow(conn.addr[0]):
+                    return self._close(conn)
+                return self._handoff(conn)
+            length, start = _read_varint(data, 0)
+            if length is None or len(data) - start < length:
+                if len(data) > _MAX_PENDING:
+                    self._close(conn)
+                return
+            end = start + length
+            pkid, pos = _read_varint(data, start)
+
+            if not conn.status:
+                if pkid != 0x00:
+                    return self._handoff(conn)
+                # handshake: version|address|port|state
+                conn.protocol, pos = _read_varint(data, pos)
+                address_length, pos = _read_varint(data, pos)
+                state, pos = _read_varint(data, pos + address_length + 2)
+                if state != STATUS:
+                    return self._handoff(conn)
+                if not self.proxy.ping_throttle.allow(conn.addr[0]):
+                    return self._close(conn)
+                conn.status = True
+
+            elif pkid == _REQUEST:
+                self._send(conn, self.proxy.status_response(conn.protocol)[1])
+
+            elif pkid == _PING:
+                # the pong is the ping, sent back.
+                self._send(conn, bytes(data[:end]))
+                conn.closing = True
+                self.answered += 1
+            else:
+                return self._close(conn)
+            del data[:end]
+
+    def _handoff(self, conn):
+        self._unregister(conn)
+        try:
+            conn.sock.setblocking(True)
+        except socket.error:
+            return self._close(conn)
+        self.handoff(conn.sock, conn.addr, bytes(conn.data))
+
+    def _send(self, conn, frame):
+        conn.outbound += frame
+        self._write(conn)
+
+    def _write(self, conn):
+        try:
+            while conn.outbound:
+                sent = conn.sock.send(conn.outbound)
+                del conn.outbound[:sent]
+        except socket.error as e:
+            if e.errno not in _RETRY:
+                return self._close(conn)
+        if not conn.outbound:
+            if conn.closing:
+                return self._close(conn)
+            events = selectors.EVENT_READ
+        else:
+            events = selectors.EVENT_READ | selectors.EVENT_WRITE
+        self.selector.modify(conn.sock, events, conn)
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2016 - 2018 - BenBaptist and Wrapper.py developer(s).
+# https://github.com/benbaptist/minecraft-wrapper
+# This program is distributed under the terms of the GNU
+# General Public License, version 3 or later.
+
+"""
+Per packet type traffic statistics ("packet-stats").
+
+Counters are kept per client connection, in a table keyed by (direction,
+connection state, packet ID).  Each entry holds:
+
+ - packets received, their size (uncompressed) and their size on the
+   wire (compressed, if compression is on), and the time spent in the
+   packet's parser.
+ - packets sent, their size on the wire and their queue-to-wire latency
+   (from being queued to being handed to the socket in a flush).
+
+A packet forwarded by the proxy is counted as received by one side and
+sent by the other, under the same key.
+
+Each table belongs to one connection.  Received counts are only updated
+by the thread reading packets and sent counts by the thread flushing
+them, so counting needs no locks.  TrafficStats.totals() adds the tables
+of open connections to those of closed ones when asked.
+
+With "packet-stats" off, no Packet or parser dispatcher has anything to
+count into (their `stats` stay None) and nothing is counted.
+"""
+
+import threading
+import time
+
+from proxy.packets import mcpackets_cb, mcpackets_sb
+from proxy.utils.capture import SERVERBOUND, CLIENTBOUND
+from proxy.utils.constants import PKT
+
+# entry fields
+RECEIVED, RAW_BYTES, WIRE_BYTES, PARSE_TIME, SENT, SENT_BYTES, LATENCY, \
+    LATENCY_MAX = range(8)
+_FIELDS = 8
+
+DIRECTIONS = {SERVERBOUND: "SB", CLIENTBOUND: "CB"}
+STATES = {0: "HANDSHAKE", 1: "STATUS", 2: "LOGIN", 3: "PLAY", 4: "LOBBY"}
+# packet names that are not PLAY packets
+_NOT_PLAY = ("LOGIN_", "PING_", "STATUS_", "LEGACY_", "HANDSHAKE",
+             "REQUEST")
+_NAMES = {}
+
+
+def packet_names(version):
+    """ :returns: {direction: {pkid: name}} of `version`'s PLAY packets. """
+    names = _NAMES.get(version)
+    if names is not None:
+        return names
+    names = {}
+    for direction, module in ((SERVERBOUND, mcpackets_sb),
+                              (CLIENTBOUND, mcpackets_cb)):
+        names[direction] = {}
+        for name, value in sorted(vars(module.Packets(version)).items()):
+            if not isinstance(value, list) or name.startswith(_NOT_PLAY) \
+                    or value[PKT] == 0xee:
+                continue
+            names[direction].setdefault(value[PKT], name)
+    _NAMES[version] = names
+    return names
+
+
+def describe(key, version):
+    """ :returns: a readable name, like "CB 0x20 CHUNK_DATA", for a key. """
+    direction, state, pkid = key
+    if pkid < 0:
+        return "%s ? (sent raw)" % DIRECTIONS[direction]
+    if state in (3, 4):
+        try:
+            name = packet_names(version)[direction].get(pkid, "?")
+        except ValueError:
+            name = "?"
+    else:
+        name = STATES.get(state, state)
+    return "%s 0x%02x %s" % (DIRECTIONS[direction], pkid, name)
+
+
+def _merge(into, table):
+    for key, entry in list(table.items()):
+        total = into.get(key)
+        if total is None:
+            into[key] = list(entry)
+            continue
+        for field in range(LATENCY_MAX):
+            total[field] += entry[field]
+        if entry[LATENCY_MAX] > total[LATENCY_MAX]:
+            total[LATENCY_MAX] = entry[LATENCY_MAX]
+
+
+class TrafficStats(object):
+    """
+    The proxy's statistics.
+
+    :param enabled: count the traffic of new connections.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.since = time.time()
+        self.live = []
+        self.closed = {}
+        self._lock = threading.Lock()
+
+    def connection(self, client):
+        """ :returns: a ConnectionStats for `client`, or None if off. """
+        if not self.enabled:
+            return None
+        stats = ConnectionStats(self, client)
+        with self._lock:
+            self.live.append(stats)
+        return stats
+
+    def retire(self, stats):
+        with self._lock:
+            if stats in self.live:
+                self.live.remove(stats)
+                _merge(self.closed, stats.table)
+
+    def reset(self):
+        with self._lock:
+            self.since = time.time()
+            self.closed = {}
+            for stats in self.live:
+                stats.clear()
+
+    def totals(self):
+        """ :returns: {key: entry} for all connections, open or closed. """
+        with self._lock:
+            totals = {}
+            _merge(totals, self.closed)
+            for stats in self.live:
+                _merge(totals, stats.table)
+        return totals
+
+    def rows(self, table=None, version=None, sort=PARSE_TIME, top=None):
+        """
+        :returns: a list of dicts, one per packet type, most `sort` first.
+        """
+        if table is None:
+            table = self.totals()
+        rows = []
+        for key, entry in sorted(table.items(),
+                                 key=lambda item: -item[1][sort])[:top]:
+            rows.append({
+                "packet": describe(key, version) if version else key,
+                "direction": DIRECTIONS[key[0]],
+                "state": key[1],
+                "id": key[2],
+                "received": entry[RECEIVED],
+                "raw_bytes": entry[RAW_BYTES],
+                "wire_bytes": entry[WIRE_BYTES],
+                "parse_time": entry[PARSE_TIME],
+                "sent": entry[SENT],
+                "sent_bytes": entry[SENT_BYTES],
+                "latency_avg": entry[LATENCY] / entry[SENT]
+                if entry[SENT] else 0,
+                "latency_max": entry[LATENCY_MAX],
+            })
+        return rows
+
+    def snapshot(self, version=None, top=50):
+        """ Everything, for the web panel. """
+        connections = []
+        with self._lock:
+            live = list(self.live)
+        for stats in live:
+            table = dict(stats.table)
+            connections.append({
+                "name": stats.client.username,
+                "received": sum(entry[RECEIVED] for entry in table.values()),
+                "wire_bytes": sum(entry[WIRE_BYTES]
+                                  for entry in table.values()),
+                "sent": sum(entry[SENT] for entry in table.values()),
+                "sent_bytes": sum(entry[SENT_BYTES]
+                                  for entry in table.values()),
+                "parse_time": sum(entry[PARSE_TIME]
+                                  for entry in table.values()),
+            })
+        return {"enabled": self.enabled,
+                "since": self.since,
+                "connections": connections,
+                "packets": self.rows(version=version, top=top)}
+
+
+class ConnectionStats(object):
+    """ The statistics of one client (and its server connections). """
+    def __init__(self, traffic, client):
+        self.traffic = traffic
+        self.client = client
+        self.table = {}
+        self.packets = []
+
+    def packet(self, direction, owner):
+        """
+        :param direction: the direction of the packets `owner`'s Packet
+         receives.
+        :param owner: the Client or ServerConnection the Packet is for.
+        :returns: a PacketStats, to be set as the Packet's `stats`.
+        """
+        stats = PacketStats(self.table, direction, owner)
+        self.packets.append(stats)
+        return stats
+
+    def clear(self):
+        self.table.clear()
+        for stats in self.packets:
+            # look the entries up again
+            stats.state = None
+
+    def close(self):
+        self.traffic.retire(self)
+
+
+class PacketStats(object):
+    """
+    Counts what one Packet receives and sends.  Entries are looked up by
+    packet ID in `received` and `sent`, the entries of the owner's
+    current state; `state` tells when they have to be looked up again.
+    """
+    __slots__ = ("table", "direction", "owner", "state", "received", "sent",
+                 "last")
+
+    def __init__(self, table, direction, owner):
+        self.table = table
+        self.direction = direction
+        self.owner = owner
+        self.state = None
+        self.received = {}
+        self.sent = {}
+        # the entry of the last packet received, for on_parse()
+        self.last = None
+
+    def _entry(self, direction, pkid):
+        key = (direction, self.state, pkid)
+        entry = self.table.get(key)
+        if entry is None:
+            entry = self.table[key] = [0] * _FIELDS
+        return entry
+
+    def _check_state(self):
+        if self.owner.state != self.state:
+            self.state = self.owner.state
+            self.received = {}
+            self.sent = {}
+
+    def on_receive(self, pkid, raw, wire):
+        if self.owner.state != self.state:
+            self._check_state()
+        entry = self.received.get(pkid)
+        if entry is None:
+            entry = self.received[pkid] = self._entry(self.direction, pkid)
+        entry[RECEIVED] += 1
+        entry[RAW_BYTES] += raw
+        entry[WIRE_BYTES] += wire
+        self.last = entry
+
+    def on_parse(self, seconds):
+        """ Time spent parsing the last packet received. """
+        self.last[PARSE_TIME] += seconds
+
+    def on_send(self, pkid, wire, latency):
+        if self.owner.state != self.state:
+            self._check_state()
+        entry = self.sent.get(pkid)
+        if entry is None:
+            entry = self.sent[pkid] = self._entry(
+                CLIENTBOUND if self.direction == SERVERBOUND else
+                SERVERBOUND, pkid)
+        entry[SENT] += 1
+        entry[SENT_BYTES] += wire
+        entry[LATENCY] += latency
+        if latency > entry[LATENCY_MAX]:
+            entry[LATENCY_MAX] = latency